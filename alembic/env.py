@@ -8,6 +8,7 @@ from alembic import context
 from app.core.config import DATABASE_URL
 from app.core.database import Base
 import app.db.models  # noqa: F401 - registers all models on Base.metadata
+from app.db.search_index import include_name as include_search_index_name
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -35,9 +36,14 @@ target_metadata = Base.metadata
 #
 # compare_type jest w Alembicu 1.19 domyślnie włączone; podane jawnie, żeby
 # wersja biblioteki nie decydowała po cichu o zakresie kontroli.
+#
+# include_name: indeks wyszukiwania przepisów (FTS5 na SQLite, GIN/pg_trgm na
+# PostgreSQL, migracja 9c3d4e5f6a72) nie ma odpowiednika w modelach - bez tego
+# filtra każde porównanie zgłaszałoby go jako drift do usunięcia.
 COMPARISON_OPTIONS = {
     "compare_type": True,
     "compare_server_default": True,
+    "include_name": include_search_index_name,
 }
 
 # other values from the config, defined by the needs of env.py,
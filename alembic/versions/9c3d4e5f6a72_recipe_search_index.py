@@ -0,0 +1,88 @@
+"""recipe full-text search index
+
+Revision ID: 9c3d4e5f6a72
+Revises: 8b2c3d4e5f61
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "9c3d4e5f6a72"
+down_revision: Union[str, Sequence[str], None] = "8b2c3d4e5f61"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must stay the same expression as PG_DOCUMENT_SQL in app/services/recipe_search.py -
+# PostgreSQL only uses an expression index for the exact same expression.
+_PG_DOCUMENT = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(name, '') || ' ' || "
+    "coalesce(description, '') || ' ' || "
+    "coalesce(ingredients, ''))"
+)
+_TRIGRAM_COLUMNS = ("name", "description", "ingredients")
+
+
+def _upgrade_postgresql() -> None:
+    # pg_trgm keeps `ILIKE '%term%'` (the existing ?search= contract)
+    # index-backed; the tsvector index serves word matches and ts_rank().
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(f"CREATE INDEX ix_recipes_search_document ON recipes USING gin ({_PG_DOCUMENT})")
+    for column in _TRIGRAM_COLUMNS:
+        op.execute(
+            f"CREATE INDEX ix_recipes_{column}_trgm ON recipes USING gin ({column} gin_trgm_ops)"
+        )
+
+
+def _upgrade_sqlite() -> None:
+    # External-content FTS5 table: it stores only the index, the text stays
+    # in `recipes`. The trigram tokenizer gives case-insensitive substring
+    # matching, i.e. the same semantics as the ILIKE it replaces.
+    op.execute(
+        "CREATE VIRTUAL TABLE recipes_fts USING fts5("
+        "name, description, ingredients, "
+        "content='recipes', content_rowid='id', tokenize='trigram')"
+    )
+    op.execute(
+        "CREATE TRIGGER recipes_fts_ai AFTER INSERT ON recipes BEGIN "
+        "INSERT INTO recipes_fts(rowid, name, description, ingredients) "
+        "VALUES (new.id, new.name, new.description, new.ingredients); END"
+    )
+    op.execute(
+        "CREATE TRIGGER recipes_fts_ad AFTER DELETE ON recipes BEGIN "
+        "INSERT INTO recipes_fts(recipes_fts, rowid, name, description, ingredients) "
+        "VALUES ('delete', old.id, old.name, old.description, old.ingredients); END"
+    )
+    op.execute(
+        "CREATE TRIGGER recipes_fts_au AFTER UPDATE ON recipes BEGIN "
+        "INSERT INTO recipes_fts(recipes_fts, rowid, name, description, ingredients) "
+        "VALUES ('delete', old.id, old.name, old.description, old.ingredients); "
+        "INSERT INTO recipes_fts(rowid, name, description, ingredients) "
+        "VALUES (new.id, new.name, new.description, new.ingredients); END"
+    )
+    # Index the rows that already exist; recipe text itself is not touched.
+    op.execute("INSERT INTO recipes_fts(recipes_fts) VALUES ('rebuild')")
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        _upgrade_postgresql()
+    elif dialect == "sqlite":
+        _upgrade_sqlite()
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for column in reversed(_TRIGRAM_COLUMNS):
+            op.execute(f"DROP INDEX IF EXISTS ix_recipes_{column}_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_recipes_search_document")
+        # pg_trgm is left installed: other objects may depend on it and
+        # dropping an extension is not this revision's call.
+    elif dialect == "sqlite":
+        for suffix in ("au", "ad", "ai"):
+            op.execute(f"DROP TRIGGER IF EXISTS recipes_fts_{suffix}")
+        op.execute("DROP TABLE IF EXISTS recipes_fts")
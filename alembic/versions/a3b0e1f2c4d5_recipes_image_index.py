@@ -0,0 +1,25 @@
+"""recipes.image index
+
+Revision ID: a3b0e1f2c4d5
+Revises: f29dae1fc0b8
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "a3b0e1f2c4d5"
+down_revision: Union[str, Sequence[str], None] = "f29dae1fc0b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # image_store.release sprawdza, czy jakiś przepis nadal wskazuje plik -
+    # z indeksem to jedno wyszukanie, nie przejście całej tabeli recipes.
+    op.create_index(op.f("ix_recipes_image"), "recipes", ["image"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_recipes_image"), table_name="recipes")
@@ -0,0 +1,29 @@
+"""recipe keyset pagination indexes
+
+Revision ID: ad4e5f6a7b83
+Revises: 9c3d4e5f6a72
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "ad4e5f6a7b83"
+down_revision: Union[str, Sequence[str], None] = "9c3d4e5f6a72"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The visible list is own recipes plus public ones; each branch gets its
+    # own (…, created_at, id) index and is queried as a separate ordered,
+    # limited scan, so a keyset page is two short index scans merged with
+    # UNION ALL, not a table scan plus sort.
+    op.create_index("ix_recipes_owner_recency", "recipes", ["user_id", "created_at", "id"], unique=False)
+    op.create_index("ix_recipes_public_recency", "recipes", ["is_public", "created_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recipes_public_recency", table_name="recipes")
+    op.drop_index("ix_recipes_owner_recency", table_name="recipes")
@@ -0,0 +1,29 @@
+"""store layout version
+
+Revision ID: be5f6a7b8c94
+Revises: ad4e5f6a7b83
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "be5f6a7b8c94"
+down_revision: Union[str, Sequence[str], None] = "ad4e5f6a7b83"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing stores start at version 1; server_default keeps ALTER TABLE
+    # valid on a populated table.
+    op.add_column(
+        "stores",
+        sa.Column("layout_version", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("stores", "layout_version")
@@ -0,0 +1,47 @@
+"""image download jobs
+
+Revision ID: cf6a7b8c9da5
+Revises: be5f6a7b8c94
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "cf6a7b8c9da5"
+down_revision: Union[str, Sequence[str], None] = "be5f6a7b8c94"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "image_download_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("recipe_id", sa.Integer(), nullable=False),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("error_code", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["recipe_id"], ["recipes.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_image_download_jobs_id"), "image_download_jobs", ["id"], unique=False)
+    op.create_index(
+        op.f("ix_image_download_jobs_recipe_id"), "image_download_jobs", ["recipe_id"], unique=False
+    )
+    op.create_index(
+        "ix_image_download_jobs_due", "image_download_jobs", ["status", "next_attempt_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_image_download_jobs_due", table_name="image_download_jobs")
+    op.drop_index(op.f("ix_image_download_jobs_recipe_id"), table_name="image_download_jobs")
+    op.drop_index(op.f("ix_image_download_jobs_id"), table_name="image_download_jobs")
+    op.drop_table("image_download_jobs")
@@ -0,0 +1,25 @@
+"""recipes image variant widths
+
+Revision ID: d07b8c9daeb6
+Revises: cf6a7b8c9da5
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d07b8c9daeb6"
+down_revision: Union[str, Sequence[str], None] = "cf6a7b8c9da5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable: istniejące zdjęcia nie mają wariantów i dalej wyświetlają oryginał.
+    op.add_column("recipes", sa.Column("image_variant_widths", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("recipes", "image_variant_widths")
@@ -0,0 +1,60 @@
+"""meal plans
+
+Revision ID: e18c9d0ebfa7
+Revises: d07b8c9daeb6
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e18c9d0ebfa7"
+down_revision: Union[str, Sequence[str], None] = "d07b8c9daeb6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "meal_plans",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("week_start", sa.Date(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "week_start", name="uq_meal_plans_user_week"),
+    )
+    op.create_index(op.f("ix_meal_plans_id"), "meal_plans", ["id"], unique=False)
+    op.create_index(op.f("ix_meal_plans_user_id"), "meal_plans", ["user_id"], unique=False)
+
+    op.create_table(
+        "meal_plan_entries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("meal_plan_id", sa.Integer(), nullable=False),
+        sa.Column("recipe_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Integer(), nullable=False),
+        sa.Column("meal", sa.String(), nullable=True),
+        sa.Column("sort_order", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["meal_plan_id"], ["meal_plans.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["recipe_id"], ["recipes.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_meal_plan_entries_id"), "meal_plan_entries", ["id"], unique=False)
+    op.create_index(
+        op.f("ix_meal_plan_entries_meal_plan_id"), "meal_plan_entries", ["meal_plan_id"], unique=False
+    )
+    op.create_index(op.f("ix_meal_plan_entries_recipe_id"), "meal_plan_entries", ["recipe_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_meal_plan_entries_recipe_id"), table_name="meal_plan_entries")
+    op.drop_index(op.f("ix_meal_plan_entries_meal_plan_id"), table_name="meal_plan_entries")
+    op.drop_index(op.f("ix_meal_plan_entries_id"), table_name="meal_plan_entries")
+    op.drop_table("meal_plan_entries")
+    op.drop_index(op.f("ix_meal_plans_user_id"), table_name="meal_plans")
+    op.drop_index(op.f("ix_meal_plans_id"), table_name="meal_plans")
+    op.drop_table("meal_plans")
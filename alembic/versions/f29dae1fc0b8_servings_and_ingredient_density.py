@@ -0,0 +1,30 @@
+"""servings and ingredient density
+
+Revision ID: f29dae1fc0b8
+Revises: e18c9d0ebfa7
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f29dae1fc0b8"
+down_revision: Union[str, Sequence[str], None] = "e18c9d0ebfa7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Wszystkie nullable: istniejące przepisy i składniki po prostu nie skalują
+    # się i nie przeliczają objętości na masę, dopóki ktoś ich nie uzupełni.
+    op.add_column("recipes", sa.Column("servings", sa.Integer(), nullable=True))
+    op.add_column("meal_plan_entries", sa.Column("servings", sa.Integer(), nullable=True))
+    op.add_column("ingredients", sa.Column("density_g_per_ml", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("ingredients", "density_g_per_ml")
+    op.drop_column("meal_plan_entries", "servings")
+    op.drop_column("recipes", "servings")
@@ -2,9 +2,22 @@ from fastapi import APIRouter, Depends, Request, Query
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import engine, get_db
+from app.core.async_database import async_engine
+from app.core.db_pool import async_pool_stats, pool_status
 from app.db.models.login_log import LoginLog, RequestLog
 from app.core.dependencies import super_admin_required
+from app.core.principal import principal_cache
+from app.core.request_log_writer import request_log_writer
+from app.services.ingredient_index import ingredient_name_index
+from app.services.recipe_ingredient_index import recipe_ingredient_index
+from app.services.ingredient_parsing.parser import parse_cache_stats
+from app.services.recipe_import import image_jobs
+from app.services.recipe_import.fetcher import dns_cache, host_clients
+from app.services.recipe_import.parse_pool import parse_pool
+from app.services.recipe_import.preview_cache import preview_cache
+from app.services.store_route_plan import route_plan_cache
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -85,3 +98,43 @@ def get_request_logs(
         }
         for log in logs
     ]
+
+
+@router.get("/cache-stats", dependencies=[Depends(super_admin_required)])
+def get_cache_stats():
+    """Liczniki in-process cache'y (per proces workera, zerowane przy restarcie)."""
+    return {
+        "ingredient_name_index": ingredient_name_index.stats(),
+        "store_route_plans": route_plan_cache.stats(),
+        "ingredient_parser": parse_cache_stats(),
+        "user_principals": principal_cache.stats(),
+        "recipe_import_dns": dns_cache.stats(),
+        "recipe_import_clients": host_clients.stats(),
+        "recipe_import_previews": preview_cache.stats(),
+        "recipe_import_parse": parse_pool.stats(),
+        "recipe_ingredient_index": recipe_ingredient_index.stats(),
+    }
+
+
+@router.get("/request-log-stats", dependencies=[Depends(super_admin_required)])
+def get_request_log_stats():
+    """Kolejka zapisu request_log: ile czeka, ile zapisano, ile odrzucono."""
+    return request_log_writer.stats()
+
+
+@router.get("/db-pool-stats", dependencies=[Depends(super_admin_required)])
+def get_db_pool_stats():
+    """Pula połączeń tego workera: konfiguracja, bieżące użycie, czekanie na połączenie.
+
+    `async` to osobna pula silnika asynchronicznego (None przy DB_ASYNC=0).
+    """
+    return {
+        **pool_status(engine, settings),
+        "async": pool_status(async_engine.sync_engine, settings, async_pool_stats) if async_engine else None,
+    }
+
+
+@router.get("/image-job-stats", dependencies=[Depends(super_admin_required)])
+def get_image_job_stats(db: Session = Depends(get_db)):
+    """Pobieranie zdjęć importu w tle: runner i liczba zadań w każdym statusie."""
+    return {**image_jobs.image_job_runner.stats(), "jobs": image_jobs.status_counts(db)}
@@ -26,7 +26,7 @@ async def login(
 
     if not user:
         # 🔐 DELAY LOGIKI
-        fails = get_login_fail_count(db, ip)
+        fails = get_login_fail_count(ip)
 
         delay = min(fails, 3)  # max 3 sekundy
         if delay > 0:
@@ -0,0 +1,77 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session
+
+from app.core.async_database import get_async_db
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.db.models.store import Store
+from app.schemas.meal_plan import MealPlanRead, MealPlanUpdate, ShoppingListResponse
+from app.services import meal_plan_service
+from app.services.ingredient_index import ingredient_name_index
+from app.services.store_route_plan import route_plan_cache
+
+router = APIRouter()
+
+
+@router.get("/{week_start}", response_model=MealPlanRead)
+def get_meal_plan(
+    week_start: date,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    meal_plan_service.require_week_start(week_start)
+    plan = meal_plan_service.get_plan(db, user, week_start)
+    return meal_plan_service.to_plan_read(db, week_start, plan)
+
+
+@router.put("/{week_start}", response_model=MealPlanRead)
+def replace_meal_plan(
+    week_start: date,
+    data: MealPlanUpdate,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    meal_plan_service.require_week_start(week_start)
+    plan = meal_plan_service.replace_plan(db, user, week_start, data)
+    return meal_plan_service.to_plan_read(db, week_start, plan)
+
+
+@router.delete("/{week_start}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_meal_plan(
+    week_start: date,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    meal_plan_service.require_week_start(week_start)
+    meal_plan_service.delete_plan(db, user, week_start)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/{week_start}/shopping-list", response_model=ShoppingListResponse)
+async def get_shopping_list(
+    week_start: date,
+    store_id: int = Query(...),
+    db=Depends(get_async_db),
+    user=Depends(get_current_user),
+):
+    meal_plan_service.require_week_start(week_start)
+
+    def build(session: Session) -> ShoppingListResponse:
+        store = session.get(Store, store_id)
+        if store is None:
+            raise HTTPException(status_code=404, detail="Store not found")
+        route = route_plan_cache.get(session, store)
+        plan = meal_plan_service.get_plan(session, user, week_start)
+        if plan is None:
+            totals = []
+        else:
+            lines = meal_plan_service.load_plan_lines(session, user, plan, ingredient_name_index.names(session))
+            totals = meal_plan_service.aggregate_lines(lines, meal_plan_service.load_densities(session, lines))
+        items, unassigned = meal_plan_service.sort_by_route(totals, route)
+        return ShoppingListResponse(
+            week_start=week_start, store_id=store_id, items=items, unassigned_count=unassigned
+        )
+
+    return await db.run_sync(build)
@@ -1,32 +1,35 @@
+import asyncio
+import logging
+import math
+from urllib.parse import urlsplit
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.security import get_current_user
+from app.db.models.image_download_job import ImageDownloadJob
+from app.db.models.recipe import Recipe
 from app.schemas.recipe_import import (
+    ImageDownloadJobRead,
     ImportedIngredientOut,
     RecipeImportConfirmRequest,
     RecipeImportConfirmResponse,
+    RecipeImportPreviewBatchItem,
+    RecipeImportPreviewBatchRequest,
     RecipeImportPreviewRequest,
     RecipeImportPreviewResponse,
 )
 from app.services import recipe_service
-from app.services.ingredient_parsing.parser import parse_ingredient_line
-from app.services.recipe_import import parser as recipe_parser
-from app.services.recipe_import.errors import (
-    BlockedHostError,
-    FetchTimeoutError,
-    InvalidUrlError,
-    NoRecipeFoundError,
-    RecipeImportError,
-    ResponseTooLargeError,
-    TooManyRedirectsError,
-    UnsupportedContentTypeError,
-    UpstreamFetchError,
-)
+from app.services.recipe_import.errors import ParseQueueFullError, RecipeImportError, error_code_for
 from app.services.recipe_import.fetcher import fetch_html
-from app.services.recipe_import.image_storage import delete_stored_image, download_and_store_image
+from app.services.recipe_import.http_clients import FetchLimiter
+from app.services.recipe_import import image_jobs
+from app.services.recipe_import.image_jobs import image_job_runner
+from app.services.recipe_import.parse_pool import PARSE_WALL_SECONDS, parse_pool
+from app.services.recipe_import.preview_cache import CachedPreview, preview_cache
 from app.services.recipe_import.preview_tokens import (
     PreviewTokenError,
     PreviewTokenExpired,
@@ -37,26 +40,10 @@ from app.services.recipe_import.preview_tokens import (
 )
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# Ordered most-specific-first: RecipeImportError subclasses are checked with
-# isinstance, so a subclass listed after its parent would never be reached.
-_ERROR_CODES: list[tuple[type[RecipeImportError], str]] = [
-    (InvalidUrlError, "invalid_url"),
-    (BlockedHostError, "blocked_host"),
-    (TooManyRedirectsError, "too_many_redirects"),
-    (FetchTimeoutError, "timeout"),
-    (ResponseTooLargeError, "too_large"),
-    (UnsupportedContentTypeError, "unsupported_content_type"),
-    (NoRecipeFoundError, "no_recipe_found"),
-    (UpstreamFetchError, "upstream_error"),
-]
-
-
-def _error_code_for(exc: RecipeImportError) -> str:
-    for exc_type, code in _ERROR_CODES:
-        if isinstance(exc, exc_type):
-            return code
-    return "import_failed"
+# Wspólny dla wszystkich batchy w procesie (patrz http_clients.FetchLimiter).
+batch_fetch_limiter = FetchLimiter()
 
 
 def _raise_as_http_error(exc: RecipeImportError) -> None:
@@ -66,8 +53,17 @@ def _raise_as_http_error(exc: RecipeImportError) -> None:
     logach serwera przez oryginalny wyjątek (widoczny w tracebacku FastAPI
     w trybie dev; w prod niezalogowany tu świadomie, żeby nie rozdymać
     zakresu tej zmiany o nowy logger).
+
+    Pełna kolejka parsowania to chwilowe przeciążenie serwera, nie wada
+    strony: 503 z Retry-After (kolejka opróżnia się w PARSE_WALL_SECONDS).
     """
-    raise HTTPException(status_code=400, detail={"error_code": _error_code_for(exc)}) from exc
+    if isinstance(exc, ParseQueueFullError):
+        raise HTTPException(
+            status_code=503,
+            detail={"error_code": error_code_for(exc)},
+            headers={"Retry-After": str(math.ceil(PARSE_WALL_SECONDS))},
+        ) from exc
+    raise HTTPException(status_code=400, detail={"error_code": error_code_for(exc)}) from exc
 
 
 def _raise_preview_token_http_error(exc: PreviewTokenError) -> None:
@@ -82,19 +78,38 @@ def _raise_preview_token_http_error(exc: PreviewTokenError) -> None:
     raise HTTPException(status_code=status_code, detail={"error_code": error_code}) from exc
 
 
-@router.post("/preview", response_model=RecipeImportPreviewResponse)
-async def preview_recipe_import(
-    payload: RecipeImportPreviewRequest,
-    user=Depends(get_current_user),
-):
-    """Pobiera i parsuje przepis pod danym URL. Nic nie zapisuje do bazy."""
-    try:
-        page = await fetch_html(payload.url)
-    except RecipeImportError as e:
-        _raise_as_http_error(e)
+async def _load_preview(url: str) -> CachedPreview:
+    """Podgląd z cache (patrz preview_cache.py) albo świeżo pobrany i sparsowany."""
+    cached, fresh = preview_cache.lookup(url)
+    if cached is not None and fresh:
+        return cached
 
-    draft = recipe_parser.parse_page(page.html, page.url)
-    parsed_ingredients = [parse_ingredient_line(line) for line in draft.ingredients]
+    if cached is not None:
+        page = await fetch_html(url, etag=cached.etag, last_modified=cached.last_modified)
+        if page.not_modified:
+            preview_cache.mark_revalidated(url, cached)
+            return cached
+    else:
+        page = await fetch_html(url)
+
+    # Parsowanie to czysty CPU - w osobnym procesie, z limitem czasu (parse_pool.py).
+    draft, ingredients = await parse_pool.parse(page.html, page.url)
+    preview = CachedPreview(
+        draft=draft,
+        ingredients=ingredients,
+        etag=page.etag,
+        last_modified=page.last_modified,
+    )
+    if page.no_store:
+        preview_cache.record_miss()
+    else:
+        preview_cache.store(url, preview)
+    return preview
+
+
+def _preview_response(preview: CachedPreview, user_id: int) -> RecipeImportPreviewResponse:
+    draft = preview.draft
+    parsed_ingredients = preview.ingredients
 
     warnings: list[str] = []
     if draft.used_fallback_parser:
@@ -109,7 +124,7 @@ async def preview_recipe_import(
         warnings.append("some_ingredients_need_review")
 
     return RecipeImportPreviewResponse(
-        preview_token=issue_preview_token(user.id, draft.source_url),
+        preview_token=issue_preview_token(user_id, draft.source_url),
         source_url=draft.source_url,
         source_name=draft.source_name,
         source_author=draft.author,
@@ -133,6 +148,86 @@ async def preview_recipe_import(
     )
 
 
+@router.post("/preview", response_model=RecipeImportPreviewResponse)
+async def preview_recipe_import(
+    payload: RecipeImportPreviewRequest,
+    user=Depends(get_current_user),
+):
+    """Pobiera i parsuje przepis pod danym URL. Nic nie zapisuje do bazy."""
+    try:
+        preview = await _load_preview(payload.url)
+    except RecipeImportError as e:
+        _raise_as_http_error(e)
+
+    return _preview_response(preview, user.id)
+
+
+async def _load_batch_preview(url: str) -> CachedPreview | str:
+    """Podgląd albo kod błędu - jeden zły URL nie przerywa całego batcha."""
+    host = urlsplit(url).hostname or ""
+    try:
+        async with batch_fetch_limiter.slot(host):
+            return await _load_preview(url)
+    except RecipeImportError as e:
+        return error_code_for(e)
+    except Exception:
+        logger.exception("batch preview of %s failed", url)
+        return "import_failed"
+
+
+@router.post("/preview-batch")
+async def preview_recipe_import_batch(
+    payload: RecipeImportPreviewBatchRequest,
+    user=Depends(get_current_user),
+):
+    """Podgląd wielu URL-i naraz (migracja zakładek). Strony są pobierane
+    równolegle z limitem globalnym i per host, a wyniki wracają jako NDJSON
+    (jedna linia `RecipeImportPreviewBatchItem` na URL) w kolejności
+    ukończenia. Powtórzone URL-e (po kanonizacji) są pobierane raz.
+    """
+    indexes_by_key: dict[str, list[int]] = {}
+    for index, url in enumerate(payload.urls):
+        key = preview_cache.key_for(url) or url
+        indexes_by_key.setdefault(key, []).append(index)
+    user_id = user.id
+
+    async def load(indexes: list[int]) -> tuple[list[int], CachedPreview | str]:
+        return indexes, await _load_batch_preview(payload.urls[indexes[0]])
+
+    async def lines():
+        tasks = [asyncio.ensure_future(load(indexes)) for indexes in indexes_by_key.values()]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                indexes, result = await finished
+                for index in indexes:
+                    item = RecipeImportPreviewBatchItem(index=index, url=payload.urls[index])
+                    if isinstance(result, str):
+                        item.error_code = result
+                    else:
+                        item.preview = _preview_response(result, user_id)
+                    yield item.model_dump_json() + "\n"
+        finally:
+            # Klient się rozłączył: nie pobieramy dalej stron, których nikt nie odczyta.
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _image_job_read(job: ImageDownloadJob | None, recipe: Recipe | None = None) -> ImageDownloadJobRead | None:
+    if job is None:
+        return None
+    return ImageDownloadJobRead(
+        id=job.id,
+        recipe_id=job.recipe_id,
+        status=job.status,
+        attempts=job.attempts,
+        next_attempt_at=job.next_attempt_at if job.status == image_jobs.STATUS_PENDING else None,
+        error_code=job.error_code,
+        image=recipe.image if recipe is not None and job.status == image_jobs.STATUS_DONE else None,
+    )
+
+
 @router.post("/confirm", response_model=RecipeImportConfirmResponse)
 async def confirm_recipe_import(
     payload: RecipeImportConfirmRequest,
@@ -140,8 +235,11 @@ async def confirm_recipe_import(
     user=Depends(get_current_user),
 ):
     """Zapisuje wyłącznie dane zatwierdzone przez użytkownika. Nigdy nie
-    pobiera strony ponownie - jedyny opcjonalny network call tutaj jest do
-    zdjęcia, i tylko jeśli payload.download_image=True.
+    pobiera strony ponownie. Zdjęcie (tylko jeśli payload.download_image=True)
+    nie jest pobierane w trakcie zapisu: przepis powstaje od razu razem
+    z zadaniem `image_download_jobs`, które dociąga obraz w tle (patrz
+    recipe_import/image_jobs.py), więc blokada użytkownika nie czeka na
+    zewnętrzny serwer. Stan zadania: GET /image-jobs/{id}.
     """
     try:
         verify_preview_token(payload.preview_token, user.id, payload.source_url)
@@ -156,36 +254,60 @@ async def confirm_recipe_import(
                 db, existing, "pl", is_owner=True, author_username=user.username
             ),
             warnings=["duplicate_import_returned_existing"],
+            image_job=_image_job_read(image_jobs.latest_job(db, existing.id), existing),
         )
 
-    warnings: list[str] = []
-    image_path: str | None = None
-    if payload.download_image and payload.image_url:
-        try:
-            image_path = await download_and_store_image(payload.image_url)
-        except (RecipeImportError, OSError):
-            warnings.append("image_download_failed")
-
+    image_url = payload.image_url if payload.download_image else None
     try:
-        recipe = recipe_service.create_recipe_from_import(db, payload, user.id, image_path=image_path)
+        recipe = recipe_service.create_recipe_from_import(db, payload, user.id, image_url=image_url)
     except IntegrityError:
         db.rollback()
-        if image_path:
-            delete_stored_image(image_path)
         raise HTTPException(
             status_code=409,
             detail={"error_code": "recipe_persistence_conflict"},
         ) from None
     except Exception:
         db.rollback()
-        if image_path:
-            delete_stored_image(image_path)
         raise HTTPException(
             status_code=500,
             detail={"error_code": "recipe_persistence_failed"},
         ) from None
 
+    warnings: list[str] = []
+    job = image_jobs.latest_job(db, recipe.id) if image_url else None
+    if job is not None:
+        if image_job_runner.running:
+            image_job_runner.wake()
+            warnings.append("image_download_queued")
+        else:
+            # Bez runnera (skrypty, TestClient bez lifespanu) - jedna próba od
+            # razu, po zapisie przepisu; kolejne zrobi runner po starcie.
+            await image_jobs.run_job(job.id)
+            db.refresh(job)
+            db.refresh(recipe)
+            if job.status != image_jobs.STATUS_DONE:
+                warnings.append("image_download_failed")
+
     return RecipeImportConfirmResponse(
         recipe=recipe_service.to_recipe_read(db, recipe, "pl", is_owner=True, author_username=user.username),
         warnings=warnings,
+        image_job=_image_job_read(job, recipe),
+    )
+
+
+@router.get("/image-jobs/{job_id}", response_model=ImageDownloadJobRead)
+def get_image_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Stan pobierania zdjęcia zaimportowanego przepisu (tylko dla właściciela)."""
+    row = (
+        db.query(ImageDownloadJob, Recipe)
+        .join(Recipe, Recipe.id == ImageDownloadJob.recipe_id)
+        .filter(ImageDownloadJob.id == job_id, Recipe.user_id == user.id)
+        .first()
     )
+    if row is None:
+        raise HTTPException(status_code=404, detail={"error_code": "image_job_not_found"})
+    return _image_job_read(*row)
@@ -1,13 +1,24 @@
 import uuid, os
 
+import anyio
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
+from app.core.async_database import get_async_db
 from app.core.database import get_db
-from app.schemas.recipe import RecipeCreate, RecipeRead, RecipeVisibilityUpdate
+from app.schemas.recipe import (
+    PantryMatchRead,
+    PantryMatchRequest,
+    RecipeCreate,
+    RecipeRead,
+    RecipeVisibilityUpdate,
+    ScaledIngredientsRead,
+)
 from app.services import recipe_service
+from app.services.recipe_ingredient_index import recipe_ingredient_index
 from app.core.security import get_current_user
-from app.utils.file_utils import save_image, delete_image
+from app.utils import image_store
+from app.utils.image_pipeline import format_widths
 
 UPLOAD_DIR = "app/static/uploads"
 
@@ -19,34 +30,67 @@ router = APIRouter()
 # =========================
 
 @router.get("/", response_model=list[RecipeRead])
-def list_recipes(
+async def list_recipes(
     response: Response,
-    db: Session = Depends(get_db),
+    db=Depends(get_async_db),
     user=Depends(get_current_user),
     page: int = Query(1, ge=1),
-    page_size: int = Query(24, ge=1, le=100),
+    page_size: int = Query(recipe_service.RECIPES_PAGE_SIZE, ge=1, le=100),
     search: str | None = Query(None, max_length=200),
+    cursor: str | None = Query(None, max_length=200),
 ):
-    recipes = recipe_service.get_visible_recipes(
-        db, user, page=page, page_size=page_size, search=search
-    )
-    has_next = len(recipes) > page_size
-    recipes = recipes[:page_size]
+    # Presence of `cursor` selects keyset mode; an empty value is the first
+    # page. Offset paging (`page`) stays the default for older clients.
+    keyset = cursor is not None
+    after = None
+    if cursor:
+        try:
+            after = recipe_service.decode_recipe_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    def load_page(session: Session):
+        recipes = recipe_service.get_visible_recipes(
+            session, user, page=page, page_size=page_size, search=search, after=after, keyset=keyset
+        )
+        has_next = len(recipes) > page_size
+        recipes = recipes[:page_size]
+        # Only chronological pages have a keyset position; a ranked search page
+        # (offset mode + search) does not.
+        next_cursor = None
+        if has_next and (keyset or not (search and search.strip())):
+            next_cursor = recipe_service.encode_recipe_cursor(recipes[-1])
+        return [recipe_service.to_recipe_list_item(session, r, user) for r in recipes], has_next, next_cursor
+
+    items, has_next, next_cursor = await db.run_sync(load_page)
     response.headers["X-Recipes-Page"] = str(page)
     response.headers["X-Recipes-Page-Size"] = str(page_size)
     response.headers["X-Recipes-Has-Next"] = "true" if has_next else "false"
+    if next_cursor:
+        response.headers["X-Recipes-Next-Cursor"] = next_cursor
 
-    return [
-        RecipeRead(
-            **r.__dict__,
-            is_owner=(r.user_id == user.id),
-            author_username=r.author.username if r.author else None
-        )
-        for r in recipes
-    ]
+    return items
 
 
 
+# =========================
+# PANTRY MATCH
+# =========================
+
+@router.post("/pantry-match", response_model=list[PantryMatchRead])
+async def match_pantry(
+    data: PantryMatchRequest,
+    db=Depends(get_async_db),
+    user=Depends(get_current_user)
+):
+    def rank(session: Session) -> list[PantryMatchRead]:
+        return recipe_service.match_pantry(session, data, user)
+
+    # A cold index is built in its own thread; wait for it off the event loop.
+    await anyio.to_thread.run_sync(recipe_ingredient_index.ensure_built)
+    return await db.run_sync(rank)
+
+
 # =========================
 # CREATE
 # =========================
@@ -65,20 +109,40 @@ def create_recipe(
 # =========================
 
 @router.get("/{recipe_id}", response_model=RecipeRead)
-def get_recipe(
+async def get_recipe(
+    recipe_id: int,
+    db=Depends(get_async_db),
+    user=Depends(get_current_user)
+):
+    def load(session: Session) -> RecipeRead:
+        recipe = recipe_service.get_recipe_by_id(session, recipe_id)
+
+        if not recipe:
+            raise HTTPException(404)
+
+        if recipe.is_public or recipe.user_id == user.id or user.role in ("admin", "super_admin"):
+            # Serialize inside run_sync: lazy relationships load here, not after the session is gone.
+            return RecipeRead.model_validate(recipe)
+
+        raise HTTPException(status_code=403)
+
+    return await db.run_sync(load)
+
+
+@router.get("/{recipe_id}/ingredients/scaled", response_model=ScaledIngredientsRead)
+def get_scaled_ingredients(
     recipe_id: int,
+    servings: int = Query(..., ge=1, le=100),
     db: Session = Depends(get_db),
     user=Depends(get_current_user)
 ):
     recipe = recipe_service.get_recipe_by_id(db, recipe_id)
-
     if not recipe:
         raise HTTPException(404)
+    if not (recipe.is_public or recipe.user_id == user.id or user.role in ("admin", "super_admin")):
+        raise HTTPException(status_code=403)
 
-    if recipe.is_public or recipe.user_id == user.id or user.role in ("admin", "super_admin"):
-        return recipe
-
-    raise HTTPException(status_code=403)
+    return recipe_service.scaled_ingredients(recipe, servings)
 
 
 # =========================
@@ -150,17 +214,23 @@ def set_recipe_image(
     if recipe.user_id != user.id:
         raise HTTPException(403)
 
-    delete_image(recipe.image)
-
     try:
-        image_url, _ = save_image(file)
+        stored = image_store.save_upload(file)
+    except image_store.ImageTooLargeError:
+        raise HTTPException(413, "Image too large")
     except ValueError:
         raise HTTPException(400, "Invalid image type")
 
-    recipe.image = image_url
+    previous = recipe.image
+    recipe.image = stored.url
+    recipe.image_variant_widths = format_widths(stored.variant_widths)
     db.commit()
     db.refresh(recipe)
 
+    # Stary plik dopiero po commicie i tylko, jeśli nikt inny go nie używa.
+    if previous != stored.url:
+        image_store.release(db, previous)
+
     return {"image": recipe.image}
 
 
@@ -177,10 +247,12 @@ def delete_recipe_image(
     if recipe.user_id != user.id:
         raise HTTPException(403)
 
-    delete_image(recipe.image)
-
-    recipe.image = None
+    previous = recipe.image
+    recipe.image = ""
+    recipe.image_variant_widths = None
     db.commit()
     db.refresh(recipe)
 
+    image_store.release(db, previous)
+
     return {"detail": "Image deleted"}
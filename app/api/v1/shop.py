@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.core.async_database import get_async_db
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.db.models.ingredient import Ingredient
 from app.db.models.store import Store
 from app.db.models.ingredient_store_placement import IngredientStorePlacement
 from app.db.models.store_section import StoreSection
-from app.services.ingredient_parsing.parser import parse_ingredient_line
+from app.services.ingredient_index import find_ingredient_id, ingredient_name_index
+from app.services.ingredient_parsing.parser import parse_ingredient_lines_batch
+from app.services.store_route_plan import (
+    bump_layout_version,
+    layout_etag,
+    route_plan_cache,
+)
+from app.utils.http_cache import etag_matches
 from app.schemas.shop import (
     IngredientCreate,
     IngredientRead,
@@ -36,9 +44,20 @@ def require_catalog_editor(user):
     return user
 
 
+def _commit_layout_change(db: Session, store_id: int) -> None:
+    """Commit a section/placement/name change and retire the cached route plan."""
+    bump_layout_version(db, store_id)
+    db.commit()
+    route_plan_cache.invalidate(store_id)
+
+
 @router.get("/stores", response_model=list[StoreRead])
-def list_stores(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    return db.query(Store).order_by(func.lower(Store.name), Store.id).all()
+async def list_stores(db=Depends(get_async_db), user=Depends(get_current_user)):
+    def load(session: Session) -> list[StoreRead]:
+        stores = session.query(Store).order_by(func.lower(Store.name), Store.id).all()
+        return [StoreRead.model_validate(store) for store in stores]
+
+    return await db.run_sync(load)
 
 
 @router.post("/stores", response_model=StoreRead, status_code=status.HTTP_201_CREATED)
@@ -75,7 +94,7 @@ def update_store(
     if duplicate:
         raise HTTPException(status_code=409, detail="A store with this name already exists")
     store.name = data.name
-    db.commit()
+    _commit_layout_change(db, store_id)
     db.refresh(store)
     return store
 
@@ -108,10 +127,22 @@ def _store_layout(db: Session, store: Store) -> StoreLayoutRead:
 
 
 @router.get("/stores/{store_id}/layout", response_model=StoreLayoutRead)
-def get_store_layout(store_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
+def get_store_layout(
+    store_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
     store = db.get(Store, store_id)
     if store is None:
         raise HTTPException(status_code=404, detail="Store not found")
+    # no-cache = "revalidate every time": the browser sends If-None-Match and
+    # an unchanged layout costs one primary-key lookup and an empty 304.
+    headers = {"ETag": layout_etag(store), "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
     return _store_layout(db, store)
 
 
@@ -136,7 +167,7 @@ def create_store_section(
         sort_order=position,
     )
     db.add(section)
-    db.commit()
+    _commit_layout_change(db, store_id)
     db.refresh(section)
     return StoreSectionRead(id=section.id, store_id=store_id, name=section.name_pl, position=section.sort_order)
 
@@ -164,7 +195,7 @@ def update_store_section(
     section.name_en = data.name
     if data.position is not None:
         section.sort_order = data.position
-    db.commit()
+    _commit_layout_change(db, store_id)
     db.refresh(section)
     return StoreSectionRead(id=section.id, store_id=store_id, name=section.name_pl, position=section.sort_order)
 
@@ -179,7 +210,7 @@ def delete_store_section(
     require_catalog_editor(user)
     section = _owned_section(db, store_id, section_id)
     db.delete(section)
-    db.commit()
+    _commit_layout_change(db, store_id)
 
 
 @router.post("/stores/{store_id}/placements", response_model=IngredientStorePlacementRead, status_code=status.HTTP_201_CREATED)
@@ -204,7 +235,7 @@ def create_ingredient_placement(
         position=data.position,
     )
     db.add(placement)
-    db.commit()
+    _commit_layout_change(db, store_id)
     db.refresh(placement)
     return placement
 
@@ -225,7 +256,7 @@ def update_ingredient_placement(
         _owned_section(db, store_id, data.store_section_id)
         placement.store_section_id = data.store_section_id
     placement.position = data.position
-    db.commit()
+    _commit_layout_change(db, store_id)
     db.refresh(placement)
     return placement
 
@@ -242,58 +273,48 @@ def delete_ingredient_placement(
     if placement is None:
         raise HTTPException(status_code=404, detail="Placement not found")
     db.delete(placement)
-    db.commit()
-
-
-def _norm(value: str) -> str:
-    return " ".join(value.casefold().split())
+    _commit_layout_change(db, store_id)
 
 
 @router.post("/stores/{store_id}/sort-items", response_model=ShoppingRouteResponse)
-def sort_shopping_items(
+async def sort_shopping_items(
     store_id: int,
     data: ShoppingRouteRequest,
-    db: Session = Depends(get_db),
+    db=Depends(get_async_db),
     user=Depends(get_current_user),
 ):
-    store = db.get(Store, store_id)
-    if store is None:
-        raise HTTPException(status_code=404, detail="Store not found")
-    section_order = {section.id: (section.sort_order, section.id) for section in store.sections}
-    placements = {
-        placement.ingredient_id: placement
-        for placement in store.placements
-        if placement.store_section_id in section_order
-    }
-    names: dict[str, int] = {}
-    for ingredient in db.query(Ingredient).all():
-        for value in (ingredient.name, ingredient.canonical_name_pl, ingredient.canonical_name_en):
-            if value:
-                names[_norm(value)] = ingredient.id
-        for alias in ingredient.aliases:
-            names[_norm(alias.alias_text)] = ingredient.id
-
-    ranked = []
-    unassigned = 0
-    for index, item in enumerate(data.items):
-        parsed = parse_ingredient_line(item.name)
-        ingredient_id = names.get(_norm(parsed.name)) or names.get(_norm(item.name))
-        placement = placements.get(ingredient_id)
-        if placement is None:
-            rank = (1, 0, 0, index)
-            unassigned += 1
-        else:
-            section_rank = section_order[placement.store_section_id]
-            position_rank = placement.position if placement.position is not None else 10**9
-            rank = (0, section_rank[0], position_rank, index)
-        ranked.append((item.done, rank, item))
-    ranked.sort(key=lambda entry: (entry[0], *entry[1]))
-    return ShoppingRouteResponse(items=[entry[2] for entry in ranked], unassigned_count=unassigned)
+    def sort_items(session: Session) -> ShoppingRouteResponse:
+        store = session.get(Store, store_id)
+        if store is None:
+            raise HTTPException(status_code=404, detail="Store not found")
+        plan = route_plan_cache.get(session, store)
+        # One snapshot per request: a concurrent catalogue write cannot split a list.
+        names = ingredient_name_index.names(session)
+        ranked = []
+        unassigned = 0
+        parsed_items = parse_ingredient_lines_batch(item.name for item in data.items)
+        for index, (item, parsed) in enumerate(zip(data.items, parsed_items)):
+            ingredient_id = find_ingredient_id(names, parsed.name, item.name)
+            route_rank = plan.rank(ingredient_id)
+            if route_rank is None:
+                rank = (1, 0, 0, index)
+                unassigned += 1
+            else:
+                rank = (0, *route_rank, index)
+            ranked.append((item.done, rank, item))
+        ranked.sort(key=lambda entry: (entry[0], *entry[1]))
+        return ShoppingRouteResponse(items=[entry[2] for entry in ranked], unassigned_count=unassigned)
+
+    return await db.run_sync(sort_items)
 
 
 @router.get("/ingredients", response_model=list[IngredientRead])
-def list_ingredients(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    return db.query(Ingredient).order_by(func.lower(Ingredient.name), Ingredient.id).all()
+async def list_ingredients(db=Depends(get_async_db), user=Depends(get_current_user)):
+    def load(session: Session) -> list[IngredientRead]:
+        ingredients = session.query(Ingredient).order_by(func.lower(Ingredient.name), Ingredient.id).all()
+        return [IngredientRead.model_validate(ingredient) for ingredient in ingredients]
+
+    return await db.run_sync(load)
 
 
 @router.post("/ingredients", response_model=IngredientRead, status_code=status.HTTP_201_CREATED)
@@ -310,6 +331,7 @@ def create_ingredient(
         name=data.name,
         canonical_name_pl=data.canonical_name_pl,
         canonical_name_en=data.canonical_name_en,
+        density_g_per_ml=data.density_g_per_ml,
     )
     db.add(ingredient)
     db.commit()
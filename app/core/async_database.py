@@ -0,0 +1,101 @@
+"""Async database access for the hottest read endpoints.
+
+The recipe list, recipe by id, store and ingredient lists and `sort-items`
+are `async def` routes that take `get_async_db`. Each one keeps its query
+code in a plain function over a sync `Session` and calls it with
+`await db.run_sync(fn)`:
+
+* With `DB_ASYNC=1` `db` is an `AsyncSession` on a second engine
+  with an async driver: asyncpg for PostgreSQL, aiosqlite for SQLite.
+  `run_sync` runs the same ORM code (caches, lazy loads) on the event loop,
+  with I/O awaited through the driver. No threadpool thread is taken while
+  the query waits.
+* With `DB_ASYNC=0` (default), or for in-memory SQLite, `db` is a `ThreadedSession`
+  with the same `run_sync` signature. The function runs in the threadpool on
+  the request's sync session, so the behaviour is the same as the sync
+  routes.
+
+Services and caches therefore stay sync-only and are shared by both paths.
+The async engine has its own pool, sized by the same DB_POOL_* settings, so
+a worker can hold twice as many connections. See docs/operations/production-guardrails.md.
+"""
+
+from functools import partial
+
+import anyio
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+from app.core.config import DATABASE_URL, settings
+from app.core.database import (
+    REQUEST_SESSION_SCOPE,
+    SessionLocal,
+    close_session,
+    enable_sqlite_foreign_keys,
+    request_session,
+)
+from app.core.db_pool import async_pool_stats, instrument, pool_options
+
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(database_url: str) -> str | None:
+    """DATABASE_URL with the async driver, or None when there is none."""
+    url = make_url(database_url)
+    driver = _ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        # Every in-memory SQLite connection is a separate, empty database.
+        return None
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def _create_async_engine() -> AsyncEngine | None:
+    if not settings.DB_ASYNC:
+        return None
+    url = async_database_url(DATABASE_URL)
+    if url is None:
+        return None
+    async_engine = create_async_engine(url, **pool_options(settings, url, is_async=True))
+    if async_engine.dialect.name == "sqlite":
+        event.listen(async_engine.sync_engine, "connect", enable_sqlite_foreign_keys)
+    instrument(async_engine.sync_engine, async_pool_stats)
+    return async_engine
+
+
+async_engine = _create_async_engine()
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if async_engine is not None else None
+)
+
+
+class ThreadedSession:
+    """`run_sync` of AsyncSession on top of a sync Session, in the threadpool."""
+
+    def __init__(self, session: Session) -> None:
+        self.sync_session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await anyio.to_thread.run_sync(partial(fn, self.sync_session, *args, **kwargs))
+
+
+async def get_async_db(request: Request):
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+    if request.scope.get(REQUEST_SESSION_SCOPE):
+        yield ThreadedSession(request_session(request))
+        return
+    db = SessionLocal()
+    try:
+        yield ThreadedSession(db)
+    finally:
+        await close_session(db)
+
+
+async def dispose_async_engine() -> None:
+    if async_engine is not None:
+        await async_engine.dispose()
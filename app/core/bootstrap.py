@@ -1,7 +1,11 @@
 from app.core.config import AUTO_CREATE_SCHEMA
 from app.core.database import Base, engine
+from app.services.recipe_search import ensure_sqlite_search_index
 
 
 def initialize_database_schema() -> None:
     if AUTO_CREATE_SCHEMA:
         Base.metadata.create_all(bind=engine)
+        # create_all() knows nothing about FTS5 virtual tables; PostgreSQL
+        # gets its search indexes from Alembic, dev SQLite gets them here.
+        ensure_sqlite_search_index(engine)
@@ -22,6 +22,12 @@ class Settings:
     SECRET_KEY: str
     DATABASE_NAME: str
     MAP_CONTROL_CENTER_ORIGINS: tuple[str, ...]
+    DB_POOL_SIZE: int
+    DB_MAX_OVERFLOW: int
+    DB_POOL_TIMEOUT: float
+    DB_POOL_RECYCLE: int
+    DB_POOL_PRE_PING: bool
+    DB_ASYNC: bool
 
 
 def _require_value(values: Mapping[str, str], name: str, *, allow_default: str | None = None) -> str:
@@ -35,6 +41,21 @@ def _require_value(values: Mapping[str, str], name: str, *, allow_default: str |
     raise RuntimeError(f"{name} environment variable is required")
 
 
+def _non_negative(values: Mapping[str, str], name: str, default: str, cast=int):
+    raw = values.get(name) or default
+    try:
+        value = cast(raw)
+    except ValueError:
+        raise RuntimeError(f"{name} must be a number, got '{raw}'") from None
+    if value < 0:
+        raise RuntimeError(f"{name} cannot be negative")
+    return value
+
+
+def _flag(values: Mapping[str, str], name: str, default: str) -> bool:
+    return (values.get(name) or default).lower() not in {"0", "false", "no"}
+
+
 def _database_name_from_url(database_url: str) -> str:
     url = make_url(database_url)
 
@@ -87,6 +108,10 @@ def load_settings(
     database_name = _database_name_from_url(database_url)
     production_database_name = values.get("PRODUCTION_DATABASE_NAME", "fastapi_db")
     control_center_origins = _control_center_origins(values.get("MAP_CONTROL_CENTER_ORIGINS", ""))
+    # Na proces workera: najwyżej DB_POOL_SIZE + DB_MAX_OVERFLOW połączeń.
+    pool_size = _non_negative(values, "DB_POOL_SIZE", "5")
+    if pool_size == 0:
+        raise RuntimeError("DB_POOL_SIZE must be at least 1")
 
     if expected_database_name and database_name != expected_database_name:
         raise RuntimeError(
@@ -109,6 +134,12 @@ def load_settings(
         SECRET_KEY=secret_key,
         DATABASE_NAME=database_name,
         MAP_CONTROL_CENTER_ORIGINS=control_center_origins,
+        DB_POOL_SIZE=pool_size,
+        DB_MAX_OVERFLOW=_non_negative(values, "DB_MAX_OVERFLOW", "5"),
+        DB_POOL_TIMEOUT=_non_negative(values, "DB_POOL_TIMEOUT", "10", cast=float),
+        DB_POOL_RECYCLE=_non_negative(values, "DB_POOL_RECYCLE", "1800"),
+        DB_POOL_PRE_PING=_flag(values, "DB_POOL_PRE_PING", "1"),
+        DB_ASYNC=_flag(values, "DB_ASYNC", "0"),
     )
 
 
@@ -127,3 +158,9 @@ DATABASE_URL = settings.DATABASE_URL
 SECRET_KEY = settings.SECRET_KEY
 DATABASE_NAME = settings.DATABASE_NAME
 MAP_CONTROL_CENTER_ORIGINS = settings.MAP_CONTROL_CENTER_ORIGINS
+DB_POOL_SIZE = settings.DB_POOL_SIZE
+DB_MAX_OVERFLOW = settings.DB_MAX_OVERFLOW
+DB_POOL_TIMEOUT = settings.DB_POOL_TIMEOUT
+DB_POOL_RECYCLE = settings.DB_POOL_RECYCLE
+DB_POOL_PRE_PING = settings.DB_POOL_PRE_PING
+DB_ASYNC = settings.DB_ASYNC
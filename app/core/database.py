@@ -1,11 +1,21 @@
+import anyio
 from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker, declarative_base
-from app.core.config import DATABASE_URL
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.requests import Request
+
+from app.core.config import DATABASE_URL, settings
+from app.core.db_pool import instrument, pool_options
+
+# Klucz w scope ASGI ustawiany przez DBSessionMiddleware (app/core/middleware.py):
+# sesję żądania zamyka middleware, nie get_db.
+REQUEST_SESSION_SCOPE = "meal_planner.request_session"
 
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+    **pool_options(settings, DATABASE_URL),
 )
+instrument(engine)
 
 
 def enable_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:
@@ -30,7 +40,37 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-def get_db():
+def request_session(request: Request) -> Session:
+    """Jedna sesja na żądanie, otwierana przy pierwszym użyciu.
+
+    Middleware i zależności, które potrzebują bazy, dostają tę samą sesję,
+    więc żądanie trzyma najwyżej jedno połączenie z puli. Zamyka ją
+    DBSessionMiddleware po wysłaniu odpowiedzi.
+    """
+    db = getattr(request.state, "db", None)
+    if db is None:
+        db = SessionLocal()
+        request.state.db = db
+    return db
+
+
+# Osobny limiter na zamykanie sesji. Gdy wszystkie wątki threadpoola czekają
+# na połączenie z pełnej puli, close() ze wspólnego limitera nie dostałoby
+# wątku i nie oddało połączenia - zakleszczenie do DB_POOL_TIMEOUT.
+_close_limiter = anyio.CapacityLimiter(settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+
+
+async def close_session(db: Session) -> None:
+    """close() oddaje połączenie do puli (ROLLBACK), więc idzie do wątku."""
+    await anyio.to_thread.run_sync(db.close, limiter=_close_limiter)
+
+
+def get_db(request: Request):
+    if request.scope.get(REQUEST_SESSION_SCOPE):
+        yield request_session(request)
+        return
+    # Aplikacja bez DBSessionMiddleware (np. sam router w teście): sesja
+    # żyje tyle, co zależność.
     db = SessionLocal()
     try:
         yield db
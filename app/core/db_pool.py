@@ -0,0 +1,175 @@
+"""Connection pool settings and counters for the application engine.
+
+Every worker process has its own pool, so the PostgreSQL connections Meal
+Planner can hold add up to
+
+    workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+
+The request_log writer and the image download runner share the same engine,
+so they are inside that budget, not on top of it. `GET /api/v1/admin/db-pool-stats`
+shows how much of the pool a worker really uses. If `peak_checked_out` stays
+well below the limit, the pool can shrink. If `timeouts` or long waits show up,
+the pool is too small for the worker's concurrency, or sessions are held
+too long.
+
+Waiting for a free connection is measured in `InstrumentedQueuePool._do_get`.
+The pool exposes no event for it: "checkout" fires only after a connection
+has been handed out.
+"""
+
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+
+class PoolStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.connects = 0
+            self.invalidated = 0
+            self.timeouts = 0
+            self.checked_out = 0
+            self.peak_checked_out = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def record_checkout(self) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidate(self) -> None:
+        with self._lock:
+            self.invalidated += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidated": self.invalidated,
+                "timeouts": self.timeouts,
+                "peak_checked_out": self.peak_checked_out,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+            }
+
+
+pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+
+class _WaitTiming:
+    """Records how long callers waited for a free connection.
+
+    `stats` is a class attribute: engine.dispose() replaces the pool
+    instance, the counters stay.
+    """
+
+    stats: PoolStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.stats.record_wait(time.perf_counter() - started, timed_out)
+
+
+class InstrumentedQueuePool(_WaitTiming, QueuePool):
+    stats = pool_stats
+
+
+class InstrumentedAsyncQueuePool(_WaitTiming, AsyncAdaptedQueuePool):
+    stats = async_pool_stats
+
+
+def pool_options(settings, database_url: str, *, is_async: bool = False) -> dict:
+    """Keyword arguments for create_engine()/create_async_engine() from Settings.
+
+    DB_POOL_RECYCLE=0 disables recycling.
+    """
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE or -1,
+    }
+    if database_url.startswith("sqlite"):
+        if is_async:
+            # aiosqlite runs every connection in its own non-daemon thread.
+            # SQLite is dev/test only, so connections are closed right away
+            # instead of being pooled.
+            options["poolclass"] = NullPool
+            return options
+        if ":memory:" in database_url or database_url.rstrip("/") == "sqlite:":
+            # In-memory SQLite uses SingletonThreadPool (one database per
+            # connection); there is nothing to size or queue.
+            return options
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    return options
+
+
+def instrument(engine: Engine, stats: PoolStats = pool_stats) -> None:
+    event.listen(engine, "connect", lambda *_: stats.record_connect())
+    event.listen(engine, "checkout", lambda *_: stats.record_checkout())
+    event.listen(engine, "checkin", lambda *_: stats.record_checkin())
+    event.listen(engine, "invalidate", lambda *_: stats.record_invalidate())
+
+
+def pool_status(engine: Engine, settings, stats: PoolStats = pool_stats) -> dict:
+    """Current pool state plus counters since process start (per worker)."""
+    pool = engine.pool
+    current = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        current.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(0, pool.overflow()),
+        )
+    return {
+        "config": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            "max_connections_per_worker": settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+        },
+        "current": current,
+        **stats.snapshot(),
+    }
@@ -1,30 +1,119 @@
+"""Blokada IP liczona w pamięci procesu zamiast dwóch COUNT(*) na każde żądanie.
+
+Reguły się nie zmieniły: IP jest blokowane, gdy w ciągu ostatnich 5 minut
+miało co najmniej 5 nieudanych logowań albo 3 podejrzane żądania. Zdarzenia
+trafiają tu w tym samym miejscu, w którym powstają wiersze `login_log` /
+`request_log` - tabele pozostają trwałym zapisem. Po restarcie procesu
+`load_recent()` (lifespan aplikacji) odtwarza okno z bazy, więc restart
+nie zdejmuje blokady.
+
+Na IP i regułę pamiętamy tylko `limit` ostatnich zdarzeń: reguła jest
+spełniona, gdy najstarsze z nich mieści się w oknie. Sprawdzenie jest O(1)
+i nie dotyka bazy. Stan jest per proces (produkcja to jeden worker uvicorn).
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+
 from app.db.models.login_log import LoginLog, RequestLog
 
+WINDOW_SECONDS = 5 * 60
+LOGIN_FAILURE_LIMIT = 5
+SUSPICIOUS_REQUEST_LIMIT = 3
+# Górna granica pamięci przy skanowaniu z wielu adresów naraz.
+MAX_TRACKED_IPS = 10_000
+
+
+class SlidingWindowCounter:
+    """Ostatnie `limit` znaczników czasu zdarzeń per klucz."""
+
+    def __init__(self, limit: int, window_seconds: float, max_keys: int = MAX_TRACKED_IPS) -> None:
+        self.limit = limit
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self._events: OrderedDict[str, deque[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, key: str, at: float | None = None) -> None:
+        at = time.time() if at is None else at
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                events = self._events[key] = deque(maxlen=self.limit)
+            events.append(at)
+            self._events.move_to_end(key)
+            if len(self._events) > self.max_keys:
+                self._evict(at)
+
+    def count(self, key: str, now: float | None = None) -> int:
+        """Zdarzenia w oknie, maksymalnie `limit`."""
+        now = time.time() if now is None else now
+        since = now - self.window
+        with self._lock:
+            return sum(1 for at in self._events.get(key, ()) if at >= since)
+
+    def reached(self, key: str, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        events = self._events.get(key)
+        return events is not None and len(events) == self.limit and events[0] >= now - self.window
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def _evict(self, now: float) -> None:
+        since = now - self.window
+        for key in [key for key, events in self._events.items() if events[-1] < since]:
+            del self._events[key]
+        while len(self._events) > self.max_keys:
+            self._events.popitem(last=False)
+
+
+class IPActivity:
+    def __init__(self) -> None:
+        self.login_failures = SlidingWindowCounter(LOGIN_FAILURE_LIMIT, WINDOW_SECONDS)
+        self.suspicious_requests = SlidingWindowCounter(SUSPICIOUS_REQUEST_LIMIT, WINDOW_SECONDS)
+
+    def record_login_failure(self, ip: str | None, at: float | None = None) -> None:
+        if ip:
+            self.login_failures.record(ip, at)
+
+    def record_suspicious_request(self, ip: str | None, at: float | None = None) -> None:
+        if ip:
+            self.suspicious_requests.record(ip, at)
+
+    def is_blocked(self, ip: str | None) -> bool:
+        if not ip:
+            return False
+        return self.login_failures.reached(ip) or self.suspicious_requests.reached(ip)
 
-def is_ip_blocked(db: Session, ip: str):
-    now = datetime.utcnow()
+    def load_recent(self, db: Session) -> None:
+        """Odtwarza okno z `login_log` / `request_log` (start procesu)."""
+        since = datetime.utcnow() - timedelta(seconds=WINDOW_SECONDS)
+        failures = db.query(LoginLog.ip_address, LoginLog.created_at).filter(
+            LoginLog.success == False,  # noqa: E712
+            LoginLog.created_at >= since,
+        ).order_by(LoginLog.created_at)
+        for ip, created_at in failures:
+            self.record_login_failure(ip, _epoch(created_at))
+        suspicious = db.query(RequestLog.ip_address, RequestLog.created_at).filter(
+            RequestLog.is_suspicious == True,  # noqa: E712
+            RequestLog.created_at >= since,
+        ).order_by(RequestLog.created_at)
+        for ip, created_at in suspicious:
+            self.record_suspicious_request(ip, _epoch(created_at))
 
-    # === 1️⃣ LOGIN BRUTE FORCE ===
-    login_fails = db.query(LoginLog).filter(
-        LoginLog.ip_address == ip,
-        LoginLog.success == False,
-        LoginLog.created_at >= now - timedelta(minutes=5)
-    ).count()
 
-    if login_fails >= 5:
-        return True
+def _epoch(created_at: datetime) -> float:
+    # Kolumny created_at są naiwne, zapisywane przez datetime.utcnow().
+    return created_at.replace(tzinfo=timezone.utc).timestamp()
 
-    # === 2️⃣ REQUEST SCANNING ===
-    suspicious_requests = db.query(RequestLog).filter(
-        RequestLog.ip_address == ip,
-        RequestLog.is_suspicious == True,
-        RequestLog.created_at >= now - timedelta(minutes=5)
-    ).count()
 
-    if suspicious_requests >= 3:
-        return True
+ip_activity = IPActivity()
 
-    return False
 
+def is_ip_blocked(ip: str | None) -> bool:
+    return ip_activity.is_blocked(ip)
@@ -1,12 +1,9 @@
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from app.db.models.login_log import LoginLog
+from app.core.ip_block import ip_activity
 
-def get_login_fail_count(db: Session, ip: str, minutes: int = 5) -> int:
-    since = datetime.utcnow() - timedelta(minutes=minutes)
 
-    return db.query(LoginLog).filter(
-        LoginLog.ip_address == ip,
-        LoginLog.success == False,
-        LoginLog.created_at >= since
-    ).count()
+def get_login_fail_count(ip: str | None) -> int:
+    """Nieudane logowania z IP w ostatnich 5 minutach (z licznika w pamięci,
+    maksymalnie LOGIN_FAILURE_LIMIT - opóźnienie i tak jest ucinane na 3 s)."""
+    if not ip:
+        return 0
+    return ip_activity.login_failures.count(ip)
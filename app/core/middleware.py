@@ -1,9 +1,34 @@
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 from fastapi.responses import JSONResponse
-from app.core.database import SessionLocal
+from app.core.database import REQUEST_SESSION_SCOPE, close_session
 from app.core.ip_block import is_ip_blocked
 
+
+class DBSessionMiddleware:
+    """Zamyka sesję żądania (app.core.database.request_session) po odpowiedzi.
+
+    Czyste ASGI zamiast BaseHTTPMiddleware: sesja ma żyć do końca wysyłania
+    odpowiedzi, a żądania bez bazy (np. /static) nie otwierają nic.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        scope[REQUEST_SESSION_SCOPE] = True
+        state = scope.setdefault("state", {})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            db = state.pop("db", None)
+            if db is not None:
+                await close_session(db)
+
 class IPBlockMiddleware(BaseHTTPMiddleware):
 
     async def dispatch(self, request: Request, call_next):
@@ -34,15 +59,11 @@ class IPBlockMiddleware(BaseHTTPMiddleware):
         if path in ("/login", "/logout"):
             return await call_next(request)
 
-        # 3️⃣ teraz dopiero sprawdzamy blokadę IP
-        ip = request.client.host
+        # 3️⃣ teraz dopiero sprawdzamy blokadę IP (w pamięci, bez bazy)
+        ip = request.client.host if request.client else None
 
-        db = SessionLocal()
-        try:
-            if is_ip_blocked(db, ip):
-                request.state.blocked = True
-                return JSONResponse(status_code=404, content={"detail": "Not Found"})
-        finally:
-            db.close()
+        if is_ip_blocked(ip):
+            request.state.blocked = True
+            return JSONResponse(status_code=404, content={"detail": "Not Found"})
 
         return await call_next(request)
@@ -0,0 +1,116 @@
+"""Short-lived cache of the authenticated user's identity.
+
+`get_current_user` runs on nearly every request and used to load the full
+`User` row each time. Request handlers only ever read id/username/role/language,
+so the dependency now returns an immutable `UserPrincipal` with those fields,
+cached per token subject (the user id) for `TTL_SECONDS`.
+
+Committed changes to a `User` made through `SessionLocal` (role changes,
+`/set-lang`, deletes) drop the entry right away. The TTL bounds staleness for
+changes made elsewhere (another worker process, `psql`, bulk `Query.update()`).
+Changes of that kind can also call `principal_cache.invalidate(user_id)`.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.db.models.user import User
+
+TTL_SECONDS = 30.0
+MAX_ENTRIES = 1024
+_SESSION_FLAG = "changed_user_ids"
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Who is calling - read-only. Use `db.get(User, principal.id)` to modify the account."""
+
+    id: int
+    username: str
+    role: str
+    language: str
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: float = TTL_SECONDS, max_entries: int = MAX_ENTRIES) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, tuple[float, UserPrincipal]] = OrderedDict()
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int) -> UserPrincipal | None:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, principal: UserPrincipal) -> None:
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + self._ttl, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+principal_cache = PrincipalCache()
+
+
+def load_principal(db: Session, user_id: int) -> UserPrincipal | None:
+    """Cached principal, or one column-only query on a miss (no ORM entity)."""
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    row = (
+        db.query(User.id, User.username, User.role, User.language)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if row is None:
+        return None
+    principal = UserPrincipal(*row)
+    principal_cache.put(principal)
+    return principal
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_changed_users(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            session.info.setdefault(_SESSION_FLAG, set()).add(obj.id)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for user_id in session.info.pop(_SESSION_FLAG, ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_rolled_back_changes(session: Session) -> None:
+    session.info.pop(_SESSION_FLAG, None)
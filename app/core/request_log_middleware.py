@@ -1,12 +1,21 @@
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
-from app.core.database import SessionLocal
-from app.db.models.login_log import RequestLog
+from app.core.ip_block import ip_activity
+from app.core.request_log_writer import request_log_writer
+
+SUSPICIOUS_PATHS = (
+    "/wp-admin",
+    "/admin.php",
+    "/config.php",
+    "/autodiscover",
+    "/.env",
+    "/phpmyadmin",
+)
+
 
 class RequestLogMiddleware(BaseHTTPMiddleware):
 
     async def dispatch(self, request: Request, call_next):
-        db = SessionLocal()
         response = None
 
         try:
@@ -14,33 +23,19 @@ class RequestLogMiddleware(BaseHTTPMiddleware):
             return response
 
         finally:
-            try:
-                if not getattr(request.state, "blocked", False) and response is not None:
-
-                    suspicious_paths = [
-                        "/wp-admin",
-                        "/admin.php",
-                        "/config.php",
-                        "/autodiscover",
-                        "/.env",
-                        "/phpmyadmin"
-                    ]
-
-                    path = request.url.path.lower()
-                    is_suspicious = any(p in path for p in suspicious_paths)
-
-                    log = RequestLog(
-                        ip_address=request.client.host if request.client else None,
-                        method=request.method,
-                        path=request.url.path,
-                        status_code=response.status_code,
-                        user_agent=request.headers.get("user-agent"),
-                        is_suspicious=is_suspicious,
-                    )
-
-                    db.add(log)
-                    db.commit()
-
-            finally:
-                db.close()
-
+            if not getattr(request.state, "blocked", False) and response is not None:
+                path = request.url.path.lower()
+                is_suspicious = any(p in path for p in SUSPICIOUS_PATHS)
+                client_ip = request.client.host if request.client else None
+                if is_suspicious:
+                    ip_activity.record_suspicious_request(client_ip)
+
+                # Tylko kolejka w pamięci - INSERT robi wątek request_log_writer.
+                request_log_writer.submit(
+                    ip_address=client_ip,
+                    method=request.method,
+                    path=request.url.path,
+                    status_code=response.status_code,
+                    user_agent=request.headers.get("user-agent"),
+                    is_suspicious=is_suspicious,
+                )
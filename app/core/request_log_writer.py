@@ -0,0 +1,172 @@
+"""Zapis `request_log` poza ścieżką żądania.
+
+RequestLogMiddleware tylko wrzuca gotowy wiersz do ograniczonej kolejki.
+Osobny wątek zapisuje je paczkami: co `BATCH_SIZE` wierszy albo co
+`FLUSH_INTERVAL_SECONDS`, jednym INSERT-em wielowierszowym (executemany /
+insertmanyvalues). Latencja żądania nie obejmuje już INSERT-a ani commitu.
+
+Backpressure: gdy baza nie nadąża i kolejka jest pełna, kolejne wiersze są
+odrzucane i liczone w `dropped` - żądania nigdy nie czekają na log. Zamknięcie
+aplikacji (lifespan) opróżnia kolejkę przed wyjściem. `created_at` jest
+ustawiane przy wrzuceniu do kolejki, więc opóźniony zapis nie przesuwa czasu.
+
+Bez uruchomionego wątku (aplikacja bez lifespanu, np. TestClient bez `with`)
+wiersz jest zapisywany od razu, jak przed wprowadzeniem kolejki.
+"""
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app.core.database import SessionLocal
+from app.db.models.login_log import RequestLog
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 10_000
+BATCH_SIZE = 200
+FLUSH_INTERVAL_SECONDS = 0.5
+STOP_TIMEOUT_SECONDS = 10.0
+# Wrzucane przez stop(), żeby wątek nie czekał do końca FLUSH_INTERVAL_SECONDS.
+_WAKE_UP = None
+
+
+class RequestLogWriter:
+    def __init__(
+        self,
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+    ) -> None:
+        self._queue: queue.Queue[dict] = queue.Queue(maxsize=queue_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def submit(self, **values) -> bool:
+        """Kolejkuje jeden wiersz; False = odrzucony (pełna kolejka)."""
+        values.setdefault("created_at", datetime.utcnow())
+        if not self.running:
+            self._write([values])
+            return True
+        try:
+            self._queue.put_nowait(values)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="request-log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = STOP_TIMEOUT_SECONDS) -> None:
+        """Zatrzymuje wątek po zapisaniu wszystkiego, co jest w kolejce."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._stopping.set()
+        try:
+            self._queue.put_nowait(_WAKE_UP)
+        except queue.Full:
+            pass  # pełna kolejka i tak nie da wątkowi zasnąć
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning("request log writer did not stop within %.1fs", timeout)
+
+    def flush(self) -> None:
+        """Zapisuje synchronicznie to, co czeka w kolejce (testy, diagnostyka)."""
+        while self._write(self._drain(self._batch_size)):
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "running": self.running,
+        }
+
+    @property
+    def running(self) -> bool:
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                continue
+            batch = [] if first is _WAKE_UP else [first]
+            deadline = time.monotonic() + self._flush_interval
+            while batch and len(batch) < self._batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is _WAKE_UP:
+                    break
+                batch.append(row)
+            self._write(batch)
+        self.flush()
+
+    def _drain(self, limit: int) -> list[dict]:
+        rows = []
+        while len(rows) < limit:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not _WAKE_UP:
+                rows.append(row)
+        return rows
+
+    def _write(self, rows: list[dict]) -> int:
+        if not rows:
+            return 0
+        db = SessionLocal()
+        try:
+            db.execute(insert(RequestLog), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Log żądań nie jest krytyczny - gubimy paczkę zamiast zatrzymać wątek.
+            self.failed += len(rows)
+            logger.exception("request log batch of %d rows could not be written", len(rows))
+        else:
+            self.written += len(rows)
+            self.batches += 1
+        finally:
+            db.close()
+        return len(rows)
+
+
+request_log_writer = RequestLogWriter()
@@ -5,7 +5,7 @@ from fastapi import Request, HTTPException, status, Depends
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
-from app.db.models.user import User
+from app.core.principal import load_principal
 
 # --- CONFIG ---
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -31,6 +31,12 @@ def create_access_token(data: dict, expires_minutes: int = ACCESS_TOKEN_EXPIRE_M
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 # --- CURRENT USER ---
 def get_current_user(request: Request, db: Session = Depends(get_db)):
+    """Zwraca UserPrincipal (id, username, role, language), nie encję ORM.
+
+    Principal jest cache'owany per użytkownik (app/core/principal.py), więc
+    typowe żądanie nie robi żadnego zapytania o użytkownika. Do zmiany konta
+    trzeba załadować encję: db.get(User, user.id).
+    """
     token = request.cookies.get("access_token")
 
     if not token:
@@ -43,7 +49,7 @@ def get_current_user(request: Request, db: Session = Depends(get_db)):
         if not user_id:
             raise HTTPException(status_code=401, detail="Not authenticated")
 
-        user = db.query(User).filter(User.id == int(user_id)).first()
+        user = load_principal(db, int(user_id))
         if not user:
             raise HTTPException(status_code=401, detail="Not authenticated")
 
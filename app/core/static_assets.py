@@ -0,0 +1,194 @@
+"""Cache headers, fingerprints and compression for `/static`.
+
+Templates link assets through the `static_url('recipes.js')` Jinja global,
+which appends a content hash: `/static/recipes.js?v=3fa2c41b09de`. A request
+whose `v` matches the file's current hash gets
+`Cache-Control: public, max-age=31536000, immutable`, so browsers stop
+revalidating recipes.js/main.css/themes.css on every page load. Editing a file
+changes its hash and therefore the URL; nothing has to be built or renamed.
+Requests without `v` (or with a stale one) get `no-cache` and revalidate with
+the content-hash ETag.
+
+Text assets are compressed once per file version and kept in memory
+(brotli when the client accepts `br`, otherwise gzip), with
+`Vary: Accept-Encoding`. The checkout may be read-only, so nothing is written
+next to the files. The cache key is (mtime, size), so edits during development
+are picked up without a restart.
+
+Uploads are never read into memory. Content-addressed files from
+`app/utils/image_store.py` (`<sha256>.jpg`, `<sha256>.w320.webp`) never change
+under the same name, so they are immutable and their ETag is the name itself.
+Older uuid4 uploads keep Starlette's mtime/size ETag and revalidate. Both
+answer `If-None-Match` with 304.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from pathlib import Path
+
+import brotli
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.utils.http_cache import etag_matches
+
+STATIC_DIR = Path("app/static")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+FINGERPRINT_LENGTH = 12
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".json", ".svg", ".txt", ".html"}
+# Below this the compressed body plus headers is not worth the CPU.
+MIN_COMPRESS_BYTES = 1024
+_CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{64}(\.w\d+)?\.(jpg|png|webp)$")
+
+
+@dataclass(frozen=True)
+class Asset:
+    key: tuple[int, int]
+    fingerprint: str
+    # Content-Encoding -> body; only encodings that came out smaller.
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+
+def _compress(path: Path, data: bytes) -> dict[str, bytes]:
+    if path.suffix not in COMPRESSIBLE_SUFFIXES or len(data) < MIN_COMPRESS_BYTES:
+        return {}
+    candidates = {
+        "br": brotli.compress(data, quality=11),
+        "gzip": gzip.compress(data, compresslevel=9, mtime=0),
+    }
+    return {encoding: body for encoding, body in candidates.items() if len(body) < len(data)}
+
+
+class AssetManifest:
+    """Content hashes and compressed bodies of files under `directory`, by relative path."""
+
+    def __init__(self, directory: Path = STATIC_DIR) -> None:
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._assets: dict[str, Asset] = {}
+
+    def get(self, relative_path: str, stat_result: os.stat_result | None = None) -> Asset:
+        path = self.directory / relative_path
+        stat_result = stat_result or path.stat()
+        key = (stat_result.st_mtime_ns, stat_result.st_size)
+        asset = self._assets.get(relative_path)
+        if asset is not None and asset.key == key:
+            return asset
+        data = path.read_bytes()
+        asset = Asset(
+            key=key,
+            fingerprint=hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH],
+            encoded=_compress(path, data),
+        )
+        with self._lock:
+            self._assets[relative_path] = asset
+        return asset
+
+    def url(self, relative_path: str) -> str:
+        """URL with the content hash; the `static_url` Jinja global."""
+        relative_path = relative_path.lstrip("/")
+        return f"/static/{relative_path}?v={self.get(relative_path).fingerprint}"
+
+
+asset_manifest = AssetManifest()
+
+
+def _accepted_encodings(accept_encoding: str | None) -> set[str]:
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _choose_encoding(asset: Asset, accept_encoding: str | None) -> str | None:
+    accepted = _accepted_encodings(accept_encoding)
+    for encoding in ("br", "gzip"):
+        if encoding in asset.encoded and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+class CachedStaticFiles(StaticFiles):
+    """`StaticFiles` with fingerprint-aware Cache-Control, precompressed
+    text assets and content ETags for uploads."""
+
+    def __init__(self, *, directory: str | os.PathLike[str], manifest: AssetManifest | None = None, **kwargs) -> None:
+        super().__init__(directory=directory, **kwargs)
+        self.manifest = manifest or AssetManifest(Path(directory))
+
+    def is_not_modified(self, response_headers: Headers, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match:
+            return etag_matches(if_none_match, response_headers["etag"])
+        return super().is_not_modified(response_headers, request_headers)
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        relative_path = Path(os.path.relpath(full_path, os.path.realpath(self.directory))).as_posix()
+        if relative_path.startswith("uploads/"):
+            response = self._upload_response(full_path, stat_result, status_code)
+        else:
+            response = self._asset_response(relative_path, full_path, stat_result, scope, status_code)
+
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def _upload_response(self, full_path, stat_result: os.stat_result, status_code: int) -> Response:
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        name = os.path.basename(full_path)
+        if _CONTENT_ADDRESSED.match(name):
+            # Storing the same bytes again touches the mtime (image_store), so
+            # an mtime/size ETag would change while the content does not.
+            response.headers["etag"] = f'"{name.rsplit(".", 1)[0]}"'
+            response.headers["cache-control"] = IMMUTABLE
+        else:
+            response.headers["cache-control"] = REVALIDATE
+        return response
+
+    def _asset_response(
+        self, relative_path: str, full_path, stat_result: os.stat_result, scope: Scope, status_code: int
+    ) -> Response:
+        asset = self.manifest.get(relative_path, stat_result)
+        request_headers = Headers(scope=scope)
+        version = QueryParams(scope.get("query_string", b"")).get("v")
+        headers = {"cache-control": IMMUTABLE if version == asset.fingerprint else REVALIDATE}
+        if asset.encoded:
+            headers["vary"] = "Accept-Encoding"
+
+        encoding = _choose_encoding(asset, request_headers.get("accept-encoding"))
+        if encoding is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+            response.headers["etag"] = f'"{asset.fingerprint}"'
+            return response
+
+        media_type = mimetypes.guess_type(relative_path)[0] or "application/octet-stream"
+        headers.update(
+            {
+                "content-encoding": encoding,
+                "etag": f'"{asset.fingerprint}-{encoding}"',
+                "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+            }
+        )
+        return Response(asset.encoded[encoding], status_code=status_code, media_type=media_type, headers=headers)
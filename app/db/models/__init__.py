@@ -8,3 +8,6 @@ from .ingredient_alias import IngredientAlias
 from .store_section import StoreSection
 from .store import Store
 from .ingredient_store_placement import IngredientStorePlacement
+from .image_download_job import ImageDownloadJob
+from .meal_plan import MealPlan
+from .meal_plan_entry import MealPlanEntry
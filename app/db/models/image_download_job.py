@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+
+from app.core.database import Base
+
+
+class ImageDownloadJob(Base):
+    """Zaległe pobranie zdjęcia do zaimportowanego przepisu.
+
+    Wiersz powstaje w tej samej transakcji co przepis (confirm importu), a
+    ImageJobRunner w tle pobiera obraz i dopiero wtedy ustawia Recipe.image.
+    Tabela jest jedyną kolejką - restart procesu niczego nie gubi. Statusy:
+    pending -> running -> done / failed; nieudana próba wraca do pending
+    z `next_attempt_at` przesuniętym o backoff, aż do MAX_ATTEMPTS.
+    """
+
+    __tablename__ = "image_download_jobs"
+    # Runner pyta wyłącznie o "pending z next_attempt_at <= teraz".
+    __table_args__ = (Index("ix_image_download_jobs_due", "status", "next_attempt_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Usunięcie przepisu kasuje zaległe zadanie (ON DELETE CASCADE w bazie).
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False, index=True)
+    url = Column(String, nullable=False)
+
+    status = Column(String, nullable=False, default="pending", server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Kod z recipe_import.errors.error_code_for, nigdy treść wyjątku.
+    error_code = Column(String, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
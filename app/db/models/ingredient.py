@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from datetime import datetime
@@ -21,6 +21,9 @@ class Ingredient(Base):
     # because one ingredient can have a different location per store.
     preferred_store_id = Column(Integer, ForeignKey("stores.id"), nullable=True)
     default_store_section_id = Column(Integer, ForeignKey("store_sections.id"), nullable=True)
+    # Gęstość w g/ml - pozwala zsumować "1 szklanka" z "200 g" tego samego
+    # składnika (patrz ingredient_parsing/units.py). NULL = objętość i masa osobno.
+    density_g_per_ml = Column(Float, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
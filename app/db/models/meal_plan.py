@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+
+
+class MealPlan(Base):
+    """Plan posiłków jednego użytkownika na jeden tydzień (od poniedziałku).
+
+    Tydzień jest kluczem naturalnym: PUT /meal-plans/{week_start} zastępuje
+    wszystkie wpisy planu naraz, więc na parę (user_id, week_start) przypada
+    co najwyżej jeden wiersz.
+    """
+
+    __tablename__ = "meal_plans"
+    __table_args__ = (UniqueConstraint("user_id", "week_start", name="uq_meal_plans_user_week"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    week_start = Column(Date, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    entries = relationship(
+        "MealPlanEntry",
+        back_populates="meal_plan",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="(MealPlanEntry.day, MealPlanEntry.sort_order, MealPlanEntry.id)",
+    )
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+
+
+class MealPlanEntry(Base):
+    """Jeden przepis w planie: dzień tygodnia (0 = poniedziałek) i posiłek.
+
+    Ten sam przepis może wystąpić w tygodniu kilka razy - lista zakupów liczy
+    go tyle razy, ile ma wpisów.
+    """
+
+    __tablename__ = "meal_plan_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    meal_plan_id = Column(Integer, ForeignKey("meal_plans.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Usunięcie przepisu usuwa go z planów (ON DELETE CASCADE w bazie); Recipe
+    # celowo nie ma relacji zwrotnej, patrz recipe_ingredient.py.
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False, index=True)
+    day = Column(Integer, nullable=False)
+    meal = Column(String, nullable=True)
+    # Porcje do ugotowania; NULL = tyle, na ile jest przepis (Recipe.servings).
+    servings = Column(Integer, nullable=True)
+    sort_order = Column(Integer, nullable=False, default=0)
+
+    meal_plan = relationship("MealPlan", back_populates="entries")
+    recipe = relationship("Recipe")
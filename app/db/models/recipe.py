@@ -1,10 +1,19 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from datetime import datetime
 
 class Recipe(Base):
     __tablename__ = "recipes"
+    # Keyset pagination of the visible list: own recipes and public ones,
+    # ordered by (created_at, id). Each branch is a separate ordered, limited
+    # scan of its own index, merged with UNION ALL (see
+    # recipe_service._visible_recipes_keyset); an OR would be a BitmapOr plus
+    # a sort of every visible row.
+    __table_args__ = (
+        Index("ix_recipes_owner_recency", "user_id", "created_at", "id"),
+        Index("ix_recipes_public_recency", "is_public", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -13,11 +22,18 @@ class Recipe(Base):
     description = Column(String, default="", nullable=False)
     instructions = Column(String, default="", nullable=False)
     ingredients = Column(String, default="", nullable=False)  # JSON/string
+    # Liczba porcji, na którą napisano ilości składników; NULL = nieznana,
+    # przepis nie daje się skalować.
+    servings = Column(Integer, nullable=True)
 
     # Metadane
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     is_public = Column(Boolean, default=False, nullable=False)
-    image = Column(String, default="", nullable=False)
+    # Indeks: image_store.release liczy odwołania do pliku po tej kolumnie.
+    image = Column(String, default="", nullable=False, index=True)
+    # Szerokości wariantów WebP obok `image` ("320,640"); NULL = tylko oryginał.
+    # Patrz app/utils/image_pipeline.py.
+    image_variant_widths = Column(String, nullable=True)
 
     # Pochodzenie przepisu - wypełniane wyłącznie dla przepisów zaimportowanych
     # z URL. Import jeszcze nie istnieje, więc dziś te kolumny są zawsze NULL;
@@ -14,6 +14,9 @@ class Store(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Bumped by every section/placement/name change; keys the cached route
+    # plan and the layout ETag (app/services/store_route_plan.py).
+    layout_version = Column(Integer, nullable=False, default=1, server_default="1")
 
     sections = relationship(
         "StoreSection", back_populates="store", cascade="all, delete-orphan"
@@ -0,0 +1,30 @@
+"""Names of the recipe search objects that live outside ``Base.metadata``.
+
+The FTS5 table (SQLite) and the GIN/trigram indexes (PostgreSQL) from
+migration 9c3d4e5f6a72 are not expressible as portable models, so schema
+comparison must skip them - otherwise `alembic check` would report them as
+drift on every run. Kept free of app imports so `alembic/env.py` and the
+migration tests can use it before settings are loaded.
+"""
+
+SEARCH_INDEX_TABLE = "recipes_fts"
+SEARCH_INDEX_NAMES = frozenset({
+    "ix_recipes_search_document",
+    "ix_recipes_name_trgm",
+    "ix_recipes_description_trgm",
+    "ix_recipes_ingredients_trgm",
+})
+
+
+def is_search_index_table(name: str | None) -> bool:
+    """FTS5 owns ``recipes_fts`` and its shadow tables (``recipes_fts_data``...)."""
+    return bool(name) and (name == SEARCH_INDEX_TABLE or name.startswith(f"{SEARCH_INDEX_TABLE}_"))
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Alembic ``include_name`` hook hiding the search objects from autogenerate."""
+    if type_ == "table":
+        return not is_search_index_table(name)
+    if type_ == "index":
+        return name not in SEARCH_INDEX_NAMES
+    return True
@@ -1,9 +1,9 @@
 import os
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
 from fastapi import FastAPI, Request, Depends, Form, HTTPException
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
@@ -13,6 +13,7 @@ from sqlalchemy.orm import Session
 # CORE
 # =========================
 from app.core.database import Base, engine, get_db, SessionLocal
+from app.core.async_database import dispose_async_engine
 from app.core.bootstrap import initialize_database_schema
 from app.core.config import COOKIE_SECURE, MAP_CONTROL_CENTER_ORIGINS
 from app.core import security
@@ -25,7 +26,13 @@ from app.core.i18n import (
 )
 from app.core.redirects import safe_local_return_path
 from app.core.request_log_middleware import RequestLogMiddleware
-from app.core.middleware import IPBlockMiddleware
+from app.core.middleware import DBSessionMiddleware, IPBlockMiddleware
+from app.core.ip_block import ip_activity
+from app.core.request_log_writer import request_log_writer
+from app.core.static_assets import CachedStaticFiles, asset_manifest
+from app.services.recipe_import import fetcher as recipe_import_fetcher
+from app.services.recipe_import.image_jobs import image_job_runner
+from app.services.recipe_import.parse_pool import parse_pool
 
 # =========================
 # MODELS
@@ -41,6 +48,7 @@ from app.db.models.ingredient import Ingredient
 from app.services.user_service import create_user as create_user_service
 from app.services.auth_service import login_user
 from app.services.admin_service import get_login_logs
+from app.services.recipe_service import get_recipes_bootstrap
 
 # =========================
 # ROUTERS
@@ -59,10 +67,31 @@ from app.schemas.user import UserCreate
 # =========================
 # FASTAPI APP
 # =========================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Blokady IP z ostatnich 5 minut przeżywają restart procesu.
+    db = SessionLocal()
+    try:
+        ip_activity.load_recent(db)
+    finally:
+        db.close()
+    request_log_writer.start()
+    image_job_runner.start()
+    yield
+    await image_job_runner.stop()
+    parse_pool.shutdown()
+    # Wiersze request_log czekające w kolejce trafiają do bazy przed wyjściem.
+    request_log_writer.stop()
+    # Keep-alive połączenia importu przepisów (współdzielone klienty httpx).
+    await recipe_import_fetcher.host_clients.aclose()
+    await dispose_async_engine()
+
+
 app = FastAPI(
     docs_url=None,
     redoc_url=None,
-    openapi_url=None
+    openapi_url=None,
+    lifespan=lifespan,
 )
 
 # The MAP Control Center reads Meal-owned admin endpoints with the browser's
@@ -87,7 +116,10 @@ templates = Jinja2Templates(directory="app/templates")
 # `t` jako global Jinja: szablony wołają t('klucz', lang) bez przekazywania
 # helpera w każdym kontekście z osobna.
 templates.env.globals["t"] = t
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# static_url('main.css') -> /static/main.css?v=<hash>; z hashem w URL plik
+# dostaje Cache-Control: immutable (app/core/static_assets.py).
+templates.env.globals["static_url"] = asset_manifest.url
+app.mount("/static", CachedStaticFiles(directory="app/static", manifest=asset_manifest), name="static")
 
 
 # =========================
@@ -101,6 +133,9 @@ app.include_router(api_router, prefix="/api/v1")
 # =========================
 app.add_middleware(IPBlockMiddleware)
 app.add_middleware(RequestLogMiddleware)
+# Najbardziej zewnętrzny: sesja żądania jest wspólna dla middleware'ów
+# i zależności, a zamykana po wysłaniu odpowiedzi.
+app.add_middleware(DBSessionMiddleware)
 
 
 # =========================
@@ -190,7 +225,9 @@ def set_lang(
         raise HTTPException(status_code=400, detail="Unsupported language")
 
     if user is not None:
-        user.language = code
+        # `user` to tylko principal z cache - zapis idzie przez encję, a commit
+        # unieważnia wpis cache (app/core/principal.py).
+        db.get(User, user.id).language = code
         db.commit()
 
     # Wracamy tam, skąd użytkownik przyszedł - Referer jest sterowany przez
@@ -276,13 +313,6 @@ def recipes_ui(
     if not user:
         return RedirectResponse("/login", status_code=302)
 
-    recipes = db.query(Recipe).all()
-
-    ingredients_map = {
-        i.name.lower(): i.is_essential
-        for i in db.query(Ingredient).all()
-    }
-
     lang = resolve_language(request, user)
 
     return templates.TemplateResponse(
@@ -290,8 +320,9 @@ def recipes_ui(
     name="recipes.html",
     context={
         "user": user,
-        "recipes": recipes,
-        "ingredients_map": ingredients_map,
+        # Tylko pierwsza strona widocznych przepisów - resztę recipes.js
+        # dociąga kursorem z /api/v1/recipes/, zamiast renderować całą tabelę.
+        "recipes_bootstrap": get_recipes_bootstrap(db, user),
         "lang": lang,
         # Ten sam słownik, z którego korzysta Jinja - front nie ma własnej
         # kopii stringów.
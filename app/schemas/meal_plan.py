@@ -0,0 +1,57 @@
+from datetime import date
+
+from pydantic import BaseModel, Field, field_validator
+
+MAX_PLAN_ENTRIES = 100
+
+
+class MealPlanEntryWrite(BaseModel):
+    recipe_id: int
+    day: int = Field(ge=0, le=6)
+    meal: str | None = Field(default=None, max_length=40)
+    # Portions to cook; None = the recipe's own servings.
+    servings: int | None = Field(default=None, ge=1, le=100)
+
+    @field_validator("meal")
+    @classmethod
+    def trim_meal(cls, value: str | None) -> str | None:
+        if value is None:
+            return None
+        value = " ".join(value.split())
+        return value or None
+
+
+class MealPlanUpdate(BaseModel):
+    entries: list[MealPlanEntryWrite] = Field(max_length=MAX_PLAN_ENTRIES)
+
+
+class MealPlanEntryRead(BaseModel):
+    id: int
+    recipe_id: int
+    recipe_name: str
+    day: int
+    meal: str | None
+    servings: int | None
+    sort_order: int
+
+
+class MealPlanRead(BaseModel):
+    week_start: date
+    entries: list[MealPlanEntryRead]
+
+
+class ShoppingListItem(BaseModel):
+    ingredient_id: int | None
+    name: str
+    quantity: float | None
+    unit: str | None
+    # Lines of this ingredient/unit without a quantity ("sól do smaku").
+    unquantified_count: int
+    recipe_ids: list[int]
+
+
+class ShoppingListResponse(BaseModel):
+    week_start: date
+    store_id: int
+    items: list[ShoppingListItem]
+    unassigned_count: int
@@ -1,7 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, computed_field
 from datetime import datetime
 from typing import Optional
 
+from app.utils.image_pipeline import variant_urls
+
 
 class RecipeBase(BaseModel):
     name: str
@@ -9,6 +11,7 @@ class RecipeBase(BaseModel):
     ingredients: Optional[str] = None
     instructions: Optional[str] = None
     is_public: bool = False
+    servings: Optional[int] = Field(None, ge=1, le=100)
 
 
 class RecipeCreate(RecipeBase):
@@ -20,12 +23,49 @@ class RecipeRead(RecipeBase):
     created_at: datetime
     user_id: int
     image: Optional[str] = None   # 👈 tylko ścieżka, nie plik
+    image_variant_widths: Optional[str] = Field(None, exclude=True)
     is_owner: bool = False
     author_username: Optional[str] = None
     model_config = {
         "from_attributes": True
     }
 
+    @computed_field
+    @property
+    def image_variants(self) -> dict[int, str]:
+        """Szerokość -> URL wariantu WebP (srcset); pusta = tylko `image`."""
+        return variant_urls(self.image, self.image_variant_widths)
+
 
 class RecipeVisibilityUpdate(BaseModel):
     is_public: bool
+
+
+class ScaledIngredientRead(BaseModel):
+    original_text: str
+    name: str
+    quantity: Optional[float] = None
+    unit: Optional[str] = None
+    note: Optional[str] = None
+
+
+class PantryMatchRequest(BaseModel):
+    ingredient_ids: list[int] = Field(default_factory=list, max_length=500)
+    # Free-text pantry items, resolved through catalogue names and aliases.
+    names: list[str] = Field(default_factory=list, max_length=500)
+    limit: int = Field(20, ge=1, le=100)
+
+
+class PantryMatchRead(BaseModel):
+    recipe_id: int
+    name: str
+    coverage: float
+    covered: int
+    required: int
+    missing_ingredient_ids: list[int]
+
+
+class ScaledIngredientsRead(BaseModel):
+    recipe_id: int
+    servings: int
+    ingredients: list[ScaledIngredientRead]
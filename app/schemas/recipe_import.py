@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Annotated
+
 from pydantic import BaseModel, Field, field_validator
 
 from app.schemas.recipe import RecipeRead
@@ -9,12 +12,19 @@ MAX_INSTRUCTIONS_LENGTH = 20000
 MAX_SHORT_FIELD_LENGTH = 300
 MAX_INGREDIENT_TEXT_LENGTH = 500
 MAX_INGREDIENTS = 200
+MAX_BATCH_URLS = 50
 
 
 class RecipeImportPreviewRequest(BaseModel):
     url: str = Field(min_length=1, max_length=MAX_URL_LENGTH)
 
 
+class RecipeImportPreviewBatchRequest(BaseModel):
+    urls: list[Annotated[str, Field(min_length=1, max_length=MAX_URL_LENGTH)]] = Field(
+        min_length=1, max_length=MAX_BATCH_URLS
+    )
+
+
 class ImportedIngredientOut(BaseModel):
     """Jedna linia składnika w draftcie zwracanym przez /preview."""
 
@@ -40,6 +50,19 @@ class RecipeImportPreviewResponse(BaseModel):
     warnings: list[str] = []
 
 
+class RecipeImportPreviewBatchItem(BaseModel):
+    """Jedna linia NDJSON z /preview-batch: podgląd albo kod błędu dla URL-a.
+
+    `index` to pozycja w `urls` żądania - linie przychodzą w kolejności
+    ukończenia, nie w kolejności żądania.
+    """
+
+    index: int
+    url: str
+    preview: RecipeImportPreviewResponse | None = None
+    error_code: str | None = None
+
+
 class ImportedIngredientIn(BaseModel):
     """Jedna linia składnika tak, jak wraca z klienta po korekcie użytkownika."""
 
@@ -91,6 +114,20 @@ class RecipeImportConfirmRequest(BaseModel):
         return stripped
 
 
+class ImageDownloadJobRead(BaseModel):
+    """Stan pobierania zdjęcia w tle - odpytywany przez UI po confirm."""
+
+    id: int
+    recipe_id: int
+    status: str
+    attempts: int
+    next_attempt_at: datetime | None = None
+    error_code: str | None = None
+    # Ścieżka zdjęcia przepisu, gdy status == "done".
+    image: str | None = None
+
+
 class RecipeImportConfirmResponse(BaseModel):
     recipe: RecipeRead
     warnings: list[str] = []
+    image_job: ImageDownloadJobRead | None = None
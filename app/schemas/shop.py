@@ -78,6 +78,7 @@ class IngredientCreate(BaseModel):
     name: str = Field(min_length=1, max_length=160)
     canonical_name_pl: str | None = Field(default=None, max_length=160)
     canonical_name_en: str | None = Field(default=None, max_length=160)
+    density_g_per_ml: float | None = Field(default=None, gt=0, le=25)
 
     @field_validator("name", "canonical_name_pl", "canonical_name_en")
     @classmethod
@@ -97,6 +98,7 @@ class IngredientRead(BaseModel):
     name: str
     canonical_name_pl: str | None = None
     canonical_name_en: str | None = None
+    density_g_per_ml: float | None = None
     preferred_store_id: int | None = None
     preferred_store: StoreRead | None = None
 
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from app.db.models.user import User
 from app.db.models.login_log import LoginLog
 from app.core import security
+from app.core.ip_block import ip_activity
 
 
 def authenticate_user(db: Session, username: str, password: str):
@@ -26,6 +27,8 @@ def log_login(db: Session, user_id, username, ip, agent, success: bool):
     )
     db.add(log)
     db.commit()
+    if not success:
+        ip_activity.record_login_failure(ip)
 
 
 def login_user(db: Session, username: str, password: str, ip: str, agent: str):
@@ -0,0 +1,143 @@
+"""Shared, versioned name -> ingredient_id index for the shopping route sorter.
+
+`POST /stores/{id}/sort-items` used to reload the whole catalogue (plus one
+lazy `aliases` query per ingredient) on every call. The index is built once
+per process with two flat queries and reused until the catalogue changes:
+any committed write to `Ingredient` or `IngredientAlias` - `create_ingredient`,
+`set_ingredient_store`, alias writes from scripts or future endpoints - bumps
+the version and drops the snapshot. Rolled-back writes do not.
+
+Invalidation is in-process only. `MAX_AGE_SECONDS` bounds staleness if the
+app ever runs with several worker processes.
+"""
+
+import threading
+import time
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.db.models.ingredient import Ingredient
+from app.db.models.ingredient_alias import IngredientAlias
+
+MAX_AGE_SECONDS = 300.0
+_CATALOGUE_MODELS = (Ingredient, IngredientAlias)
+_SESSION_FLAG = "ingredient_catalogue_changed"
+
+
+def normalize_name(value: str) -> str:
+    return " ".join(value.casefold().split())
+
+
+def _load_names(db: Session) -> dict[str, int]:
+    aliases: dict[int, list[str]] = {}
+    for ingredient_id, alias_text in db.query(IngredientAlias.ingredient_id, IngredientAlias.alias_text).order_by(
+        IngredientAlias.id
+    ):
+        aliases.setdefault(ingredient_id, []).append(alias_text)
+
+    names: dict[str, int] = {}
+    rows = db.query(
+        Ingredient.id, Ingredient.name, Ingredient.canonical_name_pl, Ingredient.canonical_name_en
+    ).order_by(Ingredient.id)
+    for ingredient_id, *values in rows:
+        for value in (*values, *aliases.get(ingredient_id, ())):
+            if value:
+                names[normalize_name(value)] = ingredient_id
+    return names
+
+
+def find_ingredient_id(names: Mapping[str, int], *candidates: str) -> int | None:
+    """First candidate (in order) that names a catalogue ingredient."""
+    for candidate in candidates:
+        ingredient_id = names.get(normalize_name(candidate))
+        if ingredient_id is not None:
+            return ingredient_id
+    return None
+
+
+class IngredientNameIndex:
+    def __init__(self, max_age_seconds: float = MAX_AGE_SECONDS) -> None:
+        self._lock = threading.Lock()
+        self._names: Mapping[str, int] | None = None
+        self._built_at = 0.0
+        self._max_age = max_age_seconds
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.invalidations = 0
+
+    def _fresh(self) -> Mapping[str, int] | None:
+        names = self._names
+        if names is not None and time.monotonic() - self._built_at < self._max_age:
+            return names
+        return None
+
+    def names(self, db: Session) -> Mapping[str, int]:
+        """Read-only snapshot; queries the database only after invalidation.
+
+        The lock is never held across the queries. On the async path this
+        runs on the event loop thread (AsyncSession.run_sync), and blocking
+        there on a lock whose owner awaits the database stalls the loop for
+        good. Concurrent misses may therefore both rebuild; a snapshot is
+        published only if no invalidation happened while it was built.
+        """
+        names = self._fresh()
+        if names is not None:
+            self.hits += 1
+            return names
+        with self._lock:
+            self.misses += 1
+            version = self.version
+        names = MappingProxyType(_load_names(db))
+        with self._lock:
+            self.rebuilds += 1
+            if self.version == version:
+                self._names = names
+                self._built_at = time.monotonic()
+        return names
+
+    def lookup(self, db: Session, *candidates: str) -> int | None:
+        return find_ingredient_id(self.names(db), *candidates)
+
+    def invalidate(self) -> None:
+        # Bumping the version under the lock means a rebuild that started
+        # before the write cannot publish its stale snapshot afterwards.
+        with self._lock:
+            self._names = None
+            self.version += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "size": len(self._names) if self._names is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "rebuilds": self.rebuilds,
+            "invalidations": self.invalidations,
+        }
+
+
+ingredient_name_index = IngredientNameIndex()
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_catalogue_change(session: Session, flush_context) -> None:
+    if any(isinstance(obj, _CATALOGUE_MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_SESSION_FLAG] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop(_SESSION_FLAG, False):
+        ingredient_name_index.invalidate()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_rolled_back_change(session: Session) -> None:
+    session.info.pop(_SESSION_FLAG, None)
@@ -1,8 +1,14 @@
 import re
+from functools import lru_cache
+from typing import Iterable
 
 from app.services.ingredient_parsing.models import ParsedIngredientLine
 
 NEEDS_REVIEW_THRESHOLD = 0.75
+# Distinct (stripped) lines kept parsed. Shopping lists and imported recipes
+# repeat the same staples, so a few thousand entries cover the working set;
+# one entry is a small pydantic model (well under 1 KB).
+PARSE_CACHE_SIZE = 4096
 
 _UNICODE_FRACTIONS = {
     "½": 0.5, "¼": 0.25, "¾": 0.75,
@@ -56,48 +62,52 @@ _NOTE_WORDS = {
 _TO_TASTE_RE = re.compile(r"\b(do smaku|to taste)\b", re.IGNORECASE)
 _FILLER_AFTER_UNIT = {"of", "z"}
 
-_MIXED_NUMBER_RE = re.compile(r"^(\d+)\s+(\d+)/(\d+)\s*")
-_SIMPLE_FRACTION_RE = re.compile(r"^(\d+)/(\d+)\s*")
-_UNICODE_FRACTION_RE = re.compile(r"^(\d+)?\s*([" + "".join(_UNICODE_FRACTIONS) + r"])\s*")
-_DECIMAL_RE = re.compile(r"^(\d+[.,]\d+)\s*")
-_INTEGER_RE = re.compile(r"^(\d+)\s*")
+# One anchored alternation instead of five separate regex attempts. The branch
+# order is the precedence order: "1 1/2" before "1/2" before "1½" before "1,5"
+# before "1" - the first alternative that matches at position 0 wins.
+_QUANTITY_RE = re.compile(
+    r"^(?:"
+    r"(?P<mixed_whole>\d+)\s+(?P<mixed_num>\d+)/(?P<mixed_den>\d+)"
+    r"|(?P<num>\d+)/(?P<den>\d+)"
+    r"|(?P<frac_whole>\d+)?\s*(?P<frac>[" + "".join(_UNICODE_FRACTIONS) + r"])"
+    r"|(?P<decimal>\d+[.,]\d+)"
+    r"|(?P<integer>\d+)"
+    r")\s*"
+)
+# A line can only start with a quantity if it starts with one of these.
+_QUANTITY_START = frozenset("0123456789" + "".join(_UNICODE_FRACTIONS))
+_LEADING_TOKEN_RE = re.compile(r"^([^\s]+)\s*")
+_FILLER_RE = re.compile(r"^(\w+)\s+")
 
 
 def _extract_quantity(text: str) -> tuple[float | None, str]:
     """Próbuje zdjąć ilość z początku linii. Zwraca (quantity, reszta_tekstu)."""
-    m = _MIXED_NUMBER_RE.match(text)
-    if m:
-        whole, num, den = m.groups()
-        return float(whole) + float(num) / float(den), text[m.end():]
-
-    m = _SIMPLE_FRACTION_RE.match(text)
-    if m:
-        num, den = m.groups()
-        return float(num) / float(den), text[m.end():]
-
-    m = _UNICODE_FRACTION_RE.match(text)
-    if m:
-        whole, frac_char = m.groups()
-        value = _UNICODE_FRACTIONS[frac_char]
-        if whole:
-            value += float(whole)
-        return value, text[m.end():]
-
-    m = _DECIMAL_RE.match(text)
-    if m:
-        return float(m.group(1).replace(",", ".")), text[m.end():]
-
-    m = _INTEGER_RE.match(text)
-    if m:
-        return float(m.group(1)), text[m.end():]
+    if not text or text[0] not in _QUANTITY_START:
+        return None, text
+    m = _QUANTITY_RE.match(text)
+    if m is None:
+        return None, text
 
-    return None, text
+    groups = m.groupdict()
+    if groups["mixed_whole"] is not None:
+        value = float(groups["mixed_whole"]) + float(groups["mixed_num"]) / float(groups["mixed_den"])
+    elif groups["num"] is not None:
+        value = float(groups["num"]) / float(groups["den"])
+    elif groups["frac"] is not None:
+        value = _UNICODE_FRACTIONS[groups["frac"]]
+        if groups["frac_whole"]:
+            value += float(groups["frac_whole"])
+    elif groups["decimal"] is not None:
+        value = float(groups["decimal"].replace(",", "."))
+    else:
+        value = float(groups["integer"])
+    return value, text[m.end():]
 
 
 def _extract_unit(text: str) -> tuple[str | None, str]:
     """Próbuje zdjąć jednostkę z początku (już bez ilości) tekstu, pomijając
     słowo-wypełniacz typu "of"/"z" po jednostce (np. "cloves of garlic")."""
-    match = re.match(r"^([^\s]+)\s*", text)
+    match = _LEADING_TOKEN_RE.match(text)
     if not match:
         return None, text
 
@@ -107,7 +117,7 @@ def _extract_unit(text: str) -> tuple[str | None, str]:
         return None, text
 
     rest = text[match.end():]
-    filler_match = re.match(r"^(\w+)\s+", rest)
+    filler_match = _FILLER_RE.match(rest)
     if filler_match and filler_match.group(1).lower() in _FILLER_AFTER_UNIT:
         rest = rest[filler_match.end():]
 
@@ -132,8 +142,39 @@ def parse_ingredient_line(original_text: str) -> ParsedIngredientLine:
     Nie oczekuje stuprocentowej skuteczności (patrz Etap 5) - zawsze zwraca
     original_text w całości i confidence, żeby UI mogło pokazać, które linie
     wymagają ręcznej poprawy (needs_review).
+
+    Wynik pochodzi z cache LRU kluczowanego linią po strip() - wszystko poza
+    original_text zależy tylko od niej. Każde wywołanie dostaje własną kopię,
+    więc modyfikacja wyniku nie psuje cache.
     """
-    text = original_text.strip()
+    return _parse_stripped(original_text.strip()).model_copy(update={"original_text": original_text})
+
+
+def parse_ingredient_lines_batch(lines: Iterable[str]) -> list[ParsedIngredientLine]:
+    """parse_ingredient_line dla wielu linii, w tej samej kolejności.
+
+    Powtórzenia w obrębie jednej partii są parsowane raz, nawet gdy cache LRU
+    jest zimny albo właśnie wyrzucił daną linię.
+    """
+    parsed: dict[str, ParsedIngredientLine] = {}
+    results = []
+    for line in lines:
+        key = line.strip()
+        template = parsed.get(key)
+        if template is None:
+            template = parsed[key] = _parse_stripped(key)
+        results.append(template.model_copy(update={"original_text": line}))
+    return results
+
+
+def parse_cache_stats() -> dict:
+    info = _parse_stripped.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_stripped(text: str) -> ParsedIngredientLine:
+    original_text = text
 
     to_taste_match = _TO_TASTE_RE.search(text)
     to_taste_note = None
@@ -156,7 +197,7 @@ def parse_ingredient_line(original_text: str) -> ParsedIngredientLine:
         unit, rest = _extract_unit(rest)
         rest = rest.strip()
 
-    name = rest.strip() or original_text.strip()
+    name = rest.strip() or original_text
 
     if quantity is not None and unit is not None:
         confidence = 0.9
@@ -183,4 +224,4 @@ def parse_ingredient_line(original_text: str) -> ParsedIngredientLine:
 def parse_ingredient_lines(text: str) -> list[ParsedIngredientLine]:
     """Parsuje wieloliniowy tekst składników (jeden składnik na linię)."""
     lines = [line.strip() for line in text.splitlines() if line.strip()]
-    return [parse_ingredient_line(line) for line in lines]
+    return parse_ingredient_lines_batch(lines)
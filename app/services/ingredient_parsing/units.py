@@ -0,0 +1,211 @@
+"""Conversion between the parser's canonical units, on whole batches.
+
+`parser.py` maps "gramów", "łyżki", "tablespoons"... to one canonical unit
+each but never relates them, so "500 g" and "1 kg" of flour could not be
+summed. `CONVERSION[i, j]` is the factor from `UNITS[i]` to `UNITS[j]`,
+precomputed once: mass units convert through grams, volume units through
+millilitres, the countable units only to themselves and their other-language
+twin (sztuka/piece, ząbek/clove...). A line without a unit counts as pieces.
+Across dimensions the entry is NaN; volume becomes mass only with the
+ingredient's density (`Ingredient.density_g_per_ml`).
+
+`aggregate_quantities` sums a batch of lines with numpy: one pass of fancy
+indexing into the matrix and `bincount` per column, not a Python loop per
+line. Scaling a recipe by servings is the same call with one group per line.
+Units the parser does not know (edited by hand) are kept, each in a dimension
+of its own.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Sequence
+
+import numpy as np
+
+MASS, VOLUME = 0, 1
+
+# unit -> (dimension, size in the dimension's first unit)
+_MEASURES = {
+    "g": (MASS, 1.0),
+    "kg": (MASS, 1000.0),
+    "ml": (VOLUME, 1.0),
+    "l": (VOLUME, 1000.0),
+    "szklanka": (VOLUME, 250.0),
+    "łyżka": (VOLUME, 15.0),
+    "łyżeczka": (VOLUME, 5.0),
+    "cup": (VOLUME, 240.0),
+    "tbsp": (VOLUME, 15.0),
+    "tsp": (VOLUME, 5.0),
+}
+# The same countable unit under its Polish and English name; the first one
+# is what mixed lines are summed in.
+_COUNTABLE = (
+    ("sztuka", "piece", None),
+    ("ząbek", "clove"),
+    ("plaster", "slice"),
+    ("szczypta", "pinch"),
+    ("opakowanie", "package"),
+    ("pęczek",),
+    ("can",),
+)
+# Sums of at least 1000 g / 1000 ml are shown in kg / l.
+_PROMOTE = {"g": "kg", "ml": "l"}
+
+
+def _build_tables():
+    units: list[str | None] = list(_MEASURES)
+    dimensions = [dimension for dimension, _ in _MEASURES.values()]
+    sizes = [size for _, size in _MEASURES.values()]
+    for dimension, names in enumerate(_COUNTABLE, start=VOLUME + 1):
+        units.extend(names)
+        dimensions.extend([dimension] * len(names))
+        sizes.extend([1.0] * len(names))
+    dimensions = np.array(dimensions, dtype=np.int64)
+    sizes = np.array(sizes, dtype=np.float64)
+    same_dimension = dimensions[:, None] == dimensions[None, :]
+    conversion = np.where(same_dimension, sizes[:, None] / sizes[None, :], np.nan)
+    return tuple(units), dimensions, conversion
+
+
+UNITS, DIMENSIONS, CONVERSION = _build_tables()
+UNIT_INDEX = {unit: index for index, unit in enumerate(UNITS)}
+_G, _ML = UNIT_INDEX["g"], UNIT_INDEX["ml"]
+# First unit of every dimension: what lines in different units are summed in.
+_BASE_UNIT = np.array([UNITS.index(u) for u in ("g", "ml", *(names[0] for names in _COUNTABLE))])
+_PROMOTED = np.arange(len(UNITS))
+for _small, _large in _PROMOTE.items():
+    _PROMOTED[UNIT_INDEX[_small]] = UNIT_INDEX[_large]
+
+
+@lru_cache(maxsize=8)
+def _extended_tables(extra: int):
+    """Tables with `extra` unknown units appended, each its own dimension."""
+    if not extra:
+        return DIMENSIONS, CONVERSION, _BASE_UNIT, _PROMOTED
+    size = len(UNITS) + extra
+    conversion = np.full((size, size), np.nan)
+    conversion[: len(UNITS), : len(UNITS)] = CONVERSION
+    new = np.arange(len(UNITS), size)
+    conversion[new, new] = 1.0
+    first_new_dimension = len(_BASE_UNIT)
+    dimensions = np.concatenate([DIMENSIONS, first_new_dimension + np.arange(extra)])
+    return dimensions, conversion, np.concatenate([_BASE_UNIT, new]), np.concatenate([_PROMOTED, new])
+
+
+def convert(quantity: float, from_unit: str | None, to_unit: str | None, density: float | None = None) -> float | None:
+    """`quantity` in `to_unit`, or None when the units cannot be related."""
+    source, target = UNIT_INDEX.get(from_unit), UNIT_INDEX.get(to_unit)
+    if source is None or target is None:
+        return float(quantity) if from_unit == to_unit else None
+    factor = CONVERSION[source, target]
+    if np.isnan(factor) and density:
+        if DIMENSIONS[source] == VOLUME and DIMENSIONS[target] == MASS:
+            factor = CONVERSION[source, _ML] * density * CONVERSION[_G, target]
+        elif DIMENSIONS[source] == MASS and DIMENSIONS[target] == VOLUME:
+            factor = CONVERSION[source, _G] / density * CONVERSION[_ML, target]
+    return None if np.isnan(factor) else float(quantity * factor)
+
+
+@dataclass(frozen=True)
+class AggregatedQuantities:
+    """One entry per (group, dimension) present in the batch, group-major.
+
+    `row_entry[i]` is the entry line `i` of the batch was summed into.
+    """
+
+    group: np.ndarray
+    unit: tuple[str | None, ...]
+    quantity: np.ndarray  # NaN: no line of the entry had a quantity
+    unquantified_count: np.ndarray
+    row_entry: np.ndarray
+
+
+def aggregate_quantities(
+    groups: np.ndarray,
+    units: Sequence[str | None],
+    quantities: np.ndarray,
+    scales: np.ndarray | None = None,
+    counts: np.ndarray | None = None,
+    densities: np.ndarray | None = None,
+) -> AggregatedQuantities:
+    """Sum `quantities * scales` per group, converting units where possible.
+
+    `groups` are small integers (one per ingredient), `quantities` NaN for a
+    line without a quantity, `counts` how many lines each row stands for
+    (reported in `unquantified_count`), `densities` g/ml per group (NaN
+    unknown). Volume lines of a group that also has mass lines are turned
+    into grams when the group has a density; otherwise mass and volume stay
+    separate entries.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    rows = len(groups)
+    scales = np.ones(rows) if scales is None else np.asarray(scales, dtype=np.float64)
+    counts = np.ones(rows, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+    if rows == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return AggregatedQuantities(empty, (), np.zeros(0), empty, empty)
+
+    unknown: dict[str, int] = {}
+    unit_index = np.fromiter(
+        (
+            UNIT_INDEX[unit] if unit in UNIT_INDEX else len(UNITS) + unknown.setdefault(unit, len(unknown))
+            for unit in units
+        ),
+        dtype=np.int64,
+        count=rows,
+    )
+    dimensions, conversion, base_unit, promoted = _extended_tables(len(unknown))
+    unit_names = UNITS + tuple(unknown)
+
+    quantified = ~np.isnan(quantities)
+    amounts = np.where(quantified, quantities * scales, 0.0)
+    dimension = dimensions[unit_index]
+
+    if densities is not None:
+        densities = np.asarray(densities, dtype=np.float64)
+        has_mass = np.bincount(groups, weights=quantified & (dimension == MASS), minlength=len(densities)) > 0
+        to_mass = quantified & (dimension == VOLUME) & has_mass[groups] & ~np.isnan(densities[groups])
+        amounts[to_mass] *= conversion[unit_index[to_mass], _ML] * densities[groups[to_mass]]
+        unit_index[to_mass] = _G
+        dimension[to_mass] = MASS
+
+    entry_keys, row_entry = np.unique(groups * len(base_unit) + dimension, return_inverse=True)
+    entries = len(entry_keys)
+    entry_dimension = entry_keys % len(base_unit)
+    # One unit across the entry stays that unit; mixed units go to the base one.
+    lowest = np.full(entries, len(unit_names))
+    highest = np.full(entries, -1)
+    np.minimum.at(lowest, row_entry, unit_index)
+    np.maximum.at(highest, row_entry, unit_index)
+    target = np.where(lowest == highest, lowest, base_unit[entry_dimension])
+
+    total = np.bincount(row_entry, weights=amounts * conversion[unit_index, target[row_entry]], minlength=entries)
+    has_quantity = np.bincount(row_entry, weights=quantified, minlength=entries) > 0
+    unquantified = np.bincount(row_entry, weights=np.where(quantified, 0, counts), minlength=entries)
+
+    larger = promoted[target]
+    in_larger = total * conversion[target, larger]
+    promote = (larger != target) & (in_larger >= 1)
+    total = np.where(promote, in_larger, total)
+    target = np.where(promote, larger, target)
+
+    return AggregatedQuantities(
+        group=entry_keys // len(base_unit),
+        unit=tuple(unit_names[index] for index in target),
+        quantity=np.where(has_quantity, np.round(total, 3), np.nan),
+        unquantified_count=unquantified.astype(np.int64),
+        row_entry=row_entry,
+    )
+
+
+def scale_quantities(
+    units: Sequence[str | None], quantities: np.ndarray, factor: float
+) -> list[tuple[float | None, str | None]]:
+    """(quantity, unit) of every line multiplied by `factor`, in line order."""
+    rows = len(units)
+    aggregated = aggregate_quantities(np.arange(rows), units, quantities, scales=np.full(rows, factor))
+    return [
+        (None if np.isnan(quantity) else float(quantity), unit)
+        for quantity, unit in zip(aggregated.quantity, aggregated.unit)
+    ]
@@ -0,0 +1,318 @@
+"""Weekly meal plans and the consolidated shopping list of a week.
+
+The shopping list of a plan is built in a constant number of queries,
+independent of how many recipes the week holds: one for the plan, one for
+its entries with the recipe text, one for the `RecipeIngredient` rows of all
+those recipes (`recipe_id IN (...)`) and one for the densities of their
+ingredients. The route plan and the ingredient name index come from their
+shared caches. Recipes without structured rows (created by hand, or imported
+without them) fall back to their `Recipe.ingredients` text, parsed through
+the cached batch parser.
+
+Quantities are summed per ingredient: the catalogue `ingredient_id` when the
+line has one or its parsed name resolves to one, otherwise the normalized
+parsed name. Units are converted and recipes scaled to the planned servings
+in one batch, see `ingredient_parsing/units.py`.
+"""
+
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Mapping
+
+import numpy as np
+
+from fastapi import HTTPException, status
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.db.models.ingredient import Ingredient
+from app.db.models.meal_plan import MealPlan
+from app.db.models.meal_plan_entry import MealPlanEntry
+from app.db.models.recipe import Recipe
+from app.db.models.recipe_ingredient import RecipeIngredient
+from app.schemas.meal_plan import MealPlanEntryRead, MealPlanRead, MealPlanUpdate, ShoppingListItem
+from app.services.ingredient_index import find_ingredient_id, normalize_name
+from app.services.ingredient_parsing.parser import parse_ingredient_lines
+from app.services.ingredient_parsing.units import aggregate_quantities
+from app.services.permissions_service import is_admin
+from app.services.store_route_plan import RoutePlan
+
+
+@dataclass
+class PlanLines:
+    """Ingredient lines of the planned recipes, one list per column.
+
+    `scale` is how many times the recipe's quantities are needed in the week
+    (entries x servings ratio), `count` how many entries the recipe has.
+    """
+
+    recipe_id: list[int] = field(default_factory=list)
+    ingredient_id: list[int | None] = field(default_factory=list)
+    name: list[str] = field(default_factory=list)
+    quantity: list[float] = field(default_factory=list)  # NaN: no quantity
+    unit: list[str | None] = field(default_factory=list)
+    scale: list[float] = field(default_factory=list)
+    count: list[int] = field(default_factory=list)
+
+    def append(self, recipe_id, ingredient_id, name, quantity, unit, scale, count) -> None:
+        self.recipe_id.append(recipe_id)
+        self.ingredient_id.append(ingredient_id)
+        self.name.append(name)
+        self.quantity.append(float(quantity) if quantity is not None else math.nan)
+        self.unit.append(unit)
+        self.scale.append(scale)
+        self.count.append(count)
+
+    def __len__(self) -> int:
+        return len(self.recipe_id)
+
+
+@dataclass
+class _Total:
+    ingredient_id: int | None
+    name: str
+    unit: str | None
+    quantity: float | None
+    unquantified_count: int
+    recipe_ids: list[int]
+
+
+def require_week_start(week_start: date) -> date:
+    if week_start.weekday() != 0:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="week_start must be a Monday",
+        )
+    return week_start
+
+
+def _visible_recipes(query, user):
+    if is_admin(user):
+        return query
+    return query.filter(or_(Recipe.user_id == user.id, Recipe.is_public == True))  # noqa: E712
+
+
+def get_plan(db: Session, user, week_start: date) -> MealPlan | None:
+    return (
+        db.query(MealPlan)
+        .filter(MealPlan.user_id == user.id, MealPlan.week_start == week_start)
+        .first()
+    )
+
+
+def to_plan_read(db: Session, week_start: date, plan: MealPlan | None) -> MealPlanRead:
+    if plan is None:
+        return MealPlanRead(week_start=week_start, entries=[])
+    rows = (
+        db.query(MealPlanEntry, Recipe.name)
+        .join(Recipe, Recipe.id == MealPlanEntry.recipe_id)
+        .filter(MealPlanEntry.meal_plan_id == plan.id)
+        .order_by(MealPlanEntry.day, MealPlanEntry.sort_order, MealPlanEntry.id)
+    )
+    return MealPlanRead(
+        week_start=week_start,
+        entries=[
+            MealPlanEntryRead(
+                id=entry.id,
+                recipe_id=entry.recipe_id,
+                recipe_name=recipe_name,
+                day=entry.day,
+                meal=entry.meal,
+                servings=entry.servings,
+                sort_order=entry.sort_order,
+            )
+            for entry, recipe_name in rows
+        ],
+    )
+
+
+def replace_plan(db: Session, user, week_start: date, data: MealPlanUpdate) -> MealPlan:
+    """Replace all entries of the user's plan for the week in one transaction."""
+    recipe_ids = {entry.recipe_id for entry in data.entries}
+    if recipe_ids:
+        found = db.query(Recipe.id, Recipe.user_id, Recipe.is_public).filter(Recipe.id.in_(recipe_ids)).all()
+        if len(found) != len(recipe_ids):
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        if not is_admin(user) and any(not is_public and owner_id != user.id for _, owner_id, is_public in found):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+    plan = get_plan(db, user, week_start)
+    if plan is None:
+        plan = MealPlan(user_id=user.id, week_start=week_start)
+        db.add(plan)
+    plan.entries = [
+        MealPlanEntry(
+            recipe_id=entry.recipe_id, day=entry.day, meal=entry.meal, servings=entry.servings, sort_order=index
+        )
+        for index, entry in enumerate(data.entries)
+    ]
+    db.commit()
+    return plan
+
+
+def delete_plan(db: Session, user, week_start: date) -> None:
+    plan = get_plan(db, user, week_start)
+    if plan is not None:
+        db.delete(plan)
+        db.commit()
+
+
+def servings_scale(wanted: int | None, recipe_servings: int | None) -> float:
+    """Factor for `wanted` portions of a recipe written for `recipe_servings`."""
+    if wanted is None or not recipe_servings:
+        return 1.0
+    return wanted / recipe_servings
+
+
+def load_plan_lines(db: Session, user, plan: MealPlan, names: Mapping[str, int]) -> PlanLines:
+    """Ingredient lines of every visible recipe of the plan, two queries in total."""
+    counts: Counter[int] = Counter()
+    scales: dict[int, float] = {}
+    texts: dict[int, str] = {}
+    entries = _visible_recipes(
+        db.query(MealPlanEntry.recipe_id, MealPlanEntry.servings, Recipe.servings, Recipe.ingredients)
+        .join(Recipe, Recipe.id == MealPlanEntry.recipe_id)
+        .filter(MealPlanEntry.meal_plan_id == plan.id),
+        user,
+    )
+    for recipe_id, wanted, recipe_servings, ingredients_text in entries:
+        counts[recipe_id] += 1
+        scales[recipe_id] = scales.get(recipe_id, 0.0) + servings_scale(wanted, recipe_servings)
+        texts[recipe_id] = ingredients_text or ""
+    lines = PlanLines()
+    if not counts:
+        return lines
+
+    structured = set()
+    rows = (
+        db.query(
+            RecipeIngredient.recipe_id,
+            RecipeIngredient.ingredient_id,
+            RecipeIngredient.parsed_name,
+            RecipeIngredient.original_text,
+            RecipeIngredient.quantity,
+            RecipeIngredient.unit,
+        )
+        .filter(RecipeIngredient.recipe_id.in_(counts.keys()))
+        .order_by(RecipeIngredient.recipe_id, RecipeIngredient.sort_order, RecipeIngredient.id)
+    )
+    for recipe_id, ingredient_id, parsed_name, original_text, quantity, unit in rows:
+        structured.add(recipe_id)
+        name = parsed_name or original_text
+        lines.append(
+            recipe_id,
+            ingredient_id or find_ingredient_id(names, name),
+            name,
+            quantity,
+            unit,
+            scales[recipe_id],
+            counts[recipe_id],
+        )
+
+    for recipe_id, text in texts.items():
+        if recipe_id in structured:
+            continue
+        for parsed in parse_ingredient_lines(text):
+            lines.append(
+                recipe_id,
+                find_ingredient_id(names, parsed.name, parsed.original_text),
+                parsed.name,
+                parsed.quantity,
+                parsed.unit,
+                scales[recipe_id],
+                counts[recipe_id],
+            )
+    return lines
+
+
+def load_densities(db: Session, lines: PlanLines) -> dict[int, float]:
+    ingredient_ids = {ingredient_id for ingredient_id in lines.ingredient_id if ingredient_id is not None}
+    if not ingredient_ids:
+        return {}
+    return dict(
+        db.query(Ingredient.id, Ingredient.density_g_per_ml).filter(
+            Ingredient.id.in_(ingredient_ids), Ingredient.density_g_per_ml.isnot(None)
+        )
+    )
+
+
+def aggregate_lines(lines: PlanLines, densities: Mapping[int, float] | None = None) -> list[_Total]:
+    """Sum quantities per ingredient_id or normalized name, converting units.
+
+    Mass and volume of one ingredient are summed together when its density is
+    known; otherwise every dimension (mass, volume, pieces...) is its own
+    total. See `ingredient_parsing.units.aggregate_quantities`.
+    """
+    keys = np.array(
+        [
+            f"#{ingredient_id}" if ingredient_id is not None else normalize_name(name)
+            for ingredient_id, name in zip(lines.ingredient_id, lines.name)
+        ],
+        dtype=object,
+    )
+    keep = np.flatnonzero(keys != "")
+    if not len(keep):
+        return []
+    # Every unit of one ingredient is shown under the first name seen for it.
+    group_keys, first_row, groups = np.unique(keys[keep].astype(str), return_index=True, return_inverse=True)
+    first_row = keep[first_row]
+    group_ingredient = [lines.ingredient_id[row] for row in first_row]
+    densities = densities or {}
+    group_density = np.array([densities.get(ingredient_id, math.nan) for ingredient_id in group_ingredient])
+
+    aggregated = aggregate_quantities(
+        groups,
+        [lines.unit[row] for row in keep],
+        np.asarray(lines.quantity)[keep],
+        scales=np.asarray(lines.scale)[keep],
+        counts=np.asarray(lines.count)[keep],
+        densities=group_density,
+    )
+    # Distinct (entry, recipe) pairs instead of one set per line.
+    recipe_ids: list[list[int]] = [[] for _ in aggregated.group]
+    pairs = np.unique(np.column_stack([aggregated.row_entry, np.asarray(lines.recipe_id)[keep]]), axis=0)
+    for entry, recipe_id in pairs.tolist():
+        recipe_ids[entry].append(recipe_id)
+
+    return [
+        _Total(
+            ingredient_id=group_ingredient[group],
+            name=lines.name[first_row[group]].strip(),
+            unit=unit,
+            quantity=None if math.isnan(quantity) else quantity,
+            unquantified_count=int(unquantified),
+            recipe_ids=recipe_ids[entry],
+        )
+        for entry, (group, unit, quantity, unquantified) in enumerate(
+            zip(aggregated.group.tolist(), aggregated.unit, aggregated.quantity.tolist(), aggregated.unquantified_count)
+        )
+    ]
+
+
+def sort_by_route(totals: list[_Total], route: RoutePlan) -> tuple[list[ShoppingListItem], int]:
+    """Shopping list items in the store's walking order; unplaced ones last, by name."""
+    ranked = []
+    unassigned = 0
+    for total in totals:
+        route_rank = route.rank(total.ingredient_id)
+        if route_rank is None:
+            rank = (1, 0, 0)
+            unassigned += 1
+        else:
+            rank = (0, *route_rank)
+        ranked.append((rank, normalize_name(total.name), total.unit or "", total))
+    ranked.sort(key=lambda entry: entry[:3])
+    items = [
+        ShoppingListItem(
+            ingredient_id=total.ingredient_id,
+            name=total.name,
+            quantity=total.quantity,
+            unit=total.unit,
+            unquantified_count=total.unquantified_count,
+            recipe_ids=total.recipe_ids,
+        )
+        for *_, total in ranked
+    ]
+    return items, unassigned
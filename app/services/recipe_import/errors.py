@@ -32,3 +32,40 @@ class UpstreamFetchError(RecipeImportError):
 
 class NoRecipeFoundError(RecipeImportError):
     pass
+
+
+class InvalidImageError(RecipeImportError):
+    pass
+
+
+class ParseTimeoutError(RecipeImportError):
+    pass
+
+
+class ParseQueueFullError(RecipeImportError):
+    pass
+
+
+# Ordered most-specific-first: RecipeImportError subclasses are checked with
+# isinstance, so a subclass listed after its parent would never be reached.
+ERROR_CODES: list[tuple[type[RecipeImportError], str]] = [
+    (InvalidUrlError, "invalid_url"),
+    (BlockedHostError, "blocked_host"),
+    (TooManyRedirectsError, "too_many_redirects"),
+    (FetchTimeoutError, "timeout"),
+    (ResponseTooLargeError, "too_large"),
+    (UnsupportedContentTypeError, "unsupported_content_type"),
+    (NoRecipeFoundError, "no_recipe_found"),
+    (InvalidImageError, "invalid_image"),
+    (ParseTimeoutError, "parse_timeout"),
+    (ParseQueueFullError, "parse_busy"),
+    (UpstreamFetchError, "upstream_error"),
+]
+
+
+def error_code_for(exc: RecipeImportError) -> str:
+    """Stabilny kod błędu dla klienta (API, status zadań w tle) - bez treści wyjątku."""
+    for exc_type, code in ERROR_CODES:
+        if isinstance(exc, exc_type):
+            return code
+    return "import_failed"
@@ -1,3 +1,4 @@
+import codecs
 import ipaddress
 import socket
 from dataclasses import dataclass
@@ -14,6 +15,8 @@ from app.services.recipe_import.errors import (
     UnsupportedContentTypeError,
     UpstreamFetchError,
 )
+from app.services.recipe_import.http_clients import DnsCache, HostClientPool
+from app.services.recipe_import.schema_org import RecipeBlockWatcher
 
 ALLOWED_SCHEMES = {"http", "https"}
 DEFAULT_PORT_FOR_SCHEME = {"http": 80, "https": 443}
@@ -36,12 +39,24 @@ ALLOWED_IMAGE_CONTENT_TYPES = {
 }
 USER_AGENT = "MealPlannerRecipeImporter/1.0 (+https://github.com/maciak-dev/meal-planner)"
 
+# Shared across fetches (see http_clients.py); closed by the app lifespan.
+dns_cache = DnsCache()
+host_clients = HostClientPool(timeout=TIMEOUT_SECONDS)
+
 
 @dataclass
 class FetchedPage:
     url: str
     html: str
     content_type: str
+    # Walidatory do warunkowego GET (cache podglądu) i odpowiedź 304 na nie.
+    etag: str | None = None
+    last_modified: str | None = None
+    not_modified: bool = False
+    no_store: bool = False
+    # Pobieranie przerwane po pełnym bloku JSON-LD z Recipe; html to tylko
+    # początek strony (patrz schema_org.RecipeBlockWatcher).
+    stopped_early: bool = False
 
 
 @dataclass
@@ -91,24 +106,29 @@ def _validate_url(url: str) -> tuple[str, str, int, str, str, str]:
     return parts.scheme, parts.hostname, port, (parts.path or "/"), parts.query, parts.fragment
 
 
-def _resolve_and_validate(hostname: str) -> str:
+async def _resolve_and_validate(hostname: str) -> str:
     """Rozwiązuje hostname i sprawdza KAŻDY zwrócony adres (obrona przed
     hostami z mieszanymi rekordami A: jeden publiczny + jeden prywatny musi
     nadal zostać zablokowany). Zwraca jeden zwalidowany adres IP, do którego
     zostanie PRZYPIĘTE faktyczne połączenie TCP - nie ufamy samemu hostname'owi
     ponownie przy connect().
+
+    Rezolucja idzie przez `dns_cache` (poza pętlą zdarzeń, TTL 60 s), ale
+    walidacja adresów jest wykonywana przy KAŻDYM wywołaniu, także z cache.
     """
     try:
-        addr_infos = socket.getaddrinfo(hostname, None)
-    except socket.gaierror as e:
-        raise BlockedHostError(f"Could not resolve host: {hostname}") from e
-
-    if not addr_infos:
+        addresses = [str(ipaddress.ip_address(hostname))]
+    except ValueError:
+        try:
+            addresses = await dns_cache.resolve(hostname)
+        except (socket.gaierror, UnicodeError) as e:
+            raise BlockedHostError(f"Could not resolve host: {hostname}") from e
+
+    if not addresses:
         raise BlockedHostError(f"Could not resolve host: {hostname}")
 
     validated_ips: list[str] = []
-    for _family, _type, _proto, _canon, sockaddr in addr_infos:
-        ip_str = sockaddr[0]
+    for ip_str in addresses:
         ip = ipaddress.ip_address(ip_str)
         if _is_blocked_ip(ip):
             raise BlockedHostError(f"Host resolves to a blocked address: {hostname} -> {ip_str}")
@@ -127,6 +147,14 @@ def _build_pinned_url(scheme: str, resolved_ip: str, port: int, path: str, query
     return urlunsplit((scheme, netloc, path, query, fragment))
 
 
+def _incremental_decoder(encoding: str | None) -> codecs.IncrementalDecoder:
+    try:
+        return codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        # Nieznany charset z nagłówka - jak przeglądarka, czytamy jako UTF-8.
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
 def _declared_length(headers) -> int | None:
     value = headers.get("content-length")
     if value is None:
@@ -140,7 +168,13 @@ def _declared_length(headers) -> int | None:
     return length
 
 
-async def fetch_html(url: str) -> FetchedPage:
+async def fetch_html(
+    url: str,
+    *,
+    etag: str | None = None,
+    last_modified: str | None = None,
+    stop_at_recipe: bool = True,
+) -> FetchedPage:
     """Bezpiecznie pobiera stronę HTML pod importowanym URL-em.
 
     Na każdą próbę (włącznie z każdym przekierowaniem): walidacja składniowa
@@ -153,83 +187,115 @@ async def fetch_html(url: str) -> FetchedPage:
     DNS na już-dosłownym adresie IP, więc adres nie może się zmienić między
     walidacją a faktycznym connect(). Nigdy nie wykonuje JS strony (httpx tylko
     pobiera bajty, nie renderuje).
+
+    `etag` / `last_modified` z wcześniejszej odpowiedzi robią z żądania
+    warunkowy GET; 304 zwraca pustą stronę z `not_modified=True`.
+
+    Treść jest dekodowana i sprawdzana kawałek po kawałku. Z `stop_at_recipe`
+    pobieranie kończy się zaraz po pierwszym kompletnym bloku JSON-LD
+    z Recipe (zwykle w <head>), a połączenie jest zamykane bez czytania
+    reszty strony. Bez takiego bloku strona jest pobierana do końca jak
+    dotąd - fallback HTML potrzebuje całości.
     """
     current_url = url
     redirects_followed = 0
 
-    async with httpx.AsyncClient(
-        follow_redirects=False,
-        timeout=TIMEOUT_SECONDS,
-        # Do not allow an environment proxy to bypass the validated target.
-        trust_env=False,
-    ) as client:
-        while True:
-            scheme, hostname, port, path, query, fragment = _validate_url(current_url)
-            resolved_ip = _resolve_and_validate(hostname)
-            pinned_url = _build_pinned_url(scheme, resolved_ip, port, path, query, fragment)
-
-            headers = {
-                "Host": hostname,
-                "User-Agent": USER_AGENT,
-                "Accept": "text/html,application/xhtml+xml",
-            }
-            extensions = {"sni_hostname": hostname} if scheme == "https" else {}
-
-            try:
-                async with client.stream("GET", pinned_url, headers=headers, extensions=extensions) as response:
-                    if response.status_code in (301, 302, 303, 307, 308):
-                        location = response.headers.get("location")
-                        if not location:
-                            raise UpstreamFetchError(f"Redirect without Location header from {current_url}")
-
-                        redirects_followed += 1
-                        if redirects_followed > MAX_REDIRECTS:
-                            raise TooManyRedirectsError(f"Too many redirects while fetching {url}")
-
-                        # Resolve the redirect against the ORIGINAL (hostname-based)
-                        # URL, not the IP-pinned one, so relative Location headers
-                        # and the next loop iteration's validation see a normal URL.
-                        origin_url = urlunsplit((scheme, f"{hostname}:{port}", path, query, fragment))
-                        current_url = str(httpx.URL(origin_url).join(location))
-                        continue
-
-                    if response.status_code != 200:
-                        raise UpstreamFetchError(f"Upstream returned HTTP {response.status_code} for {current_url}")
-
-                    content_type = response.headers.get("content-type", "").split(";", 1)[0].strip().lower()
-                    if content_type not in ALLOWED_HTML_CONTENT_TYPES:
-                        raise UnsupportedContentTypeError(f"Unsupported Content-Type: {content_type or '(none)'}")
-
-                    content_length = _declared_length(response.headers)
-                    if content_length is not None and content_length > MAX_RESPONSE_BYTES:
+    while True:
+        scheme, hostname, port, path, query, fragment = _validate_url(current_url)
+        resolved_ip = await _resolve_and_validate(hostname)
+        pinned_url = _build_pinned_url(scheme, resolved_ip, port, path, query, fragment)
+
+        headers = {
+            "Host": hostname,
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml",
+        }
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        extensions = {"sni_hostname": hostname} if scheme == "https" else {}
+        # Borrowed until the response is closed: pool eviction never closes a
+        # client in the middle of this stream.
+        client = await host_clients.acquire(scheme, hostname, port)
+
+        try:
+            async with client.stream("GET", pinned_url, headers=headers, extensions=extensions) as response:
+                if response.status_code in (301, 302, 303, 307, 308):
+                    location = response.headers.get("location")
+                    if not location:
+                        raise UpstreamFetchError(f"Redirect without Location header from {current_url}")
+
+                    redirects_followed += 1
+                    if redirects_followed > MAX_REDIRECTS:
+                        raise TooManyRedirectsError(f"Too many redirects while fetching {url}")
+
+                    # Resolve the redirect against the ORIGINAL (hostname-based)
+                    # URL, not the IP-pinned one, so relative Location headers
+                    # and the next loop iteration's validation see a normal URL.
+                    origin_url = urlunsplit((scheme, f"{hostname}:{port}", path, query, fragment))
+                    current_url = str(httpx.URL(origin_url).join(location))
+                    continue
+
+                if response.status_code == 304 and (etag or last_modified):
+                    return FetchedPage(url=current_url, html="", content_type="", not_modified=True)
+
+                if response.status_code != 200:
+                    raise UpstreamFetchError(f"Upstream returned HTTP {response.status_code} for {current_url}")
+
+                content_type = response.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+                if content_type not in ALLOWED_HTML_CONTENT_TYPES:
+                    raise UnsupportedContentTypeError(f"Unsupported Content-Type: {content_type or '(none)'}")
+
+                content_length = _declared_length(response.headers)
+                if content_length is not None and content_length > MAX_RESPONSE_BYTES:
+                    raise ResponseTooLargeError(
+                        f"Response too large ({content_length} bytes, limit {MAX_RESPONSE_BYTES})"
+                    )
+
+                # aiter_bytes() yields already-decompressed bytes (httpx
+                # decodes gzip/deflate/br transparently) - this cap is
+                # therefore enforced on the DECOMPRESSED size, which is
+                # what guards against a "gzip bomb" (small Content-Length,
+                # huge decoded payload): the loop aborts as soon as the
+                # decoded total crosses the limit, regardless of what the
+                # compressed Content-Length claimed.
+                decoder = _incremental_decoder(response.encoding)
+                watcher = RecipeBlockWatcher() if stop_at_recipe else None
+                parts: list[str] = []
+                total = 0
+                stopped_early = False
+                async for chunk in response.aiter_bytes():
+                    total += len(chunk)
+                    if total > MAX_RESPONSE_BYTES:
                         raise ResponseTooLargeError(
-                            f"Response too large ({content_length} bytes, limit {MAX_RESPONSE_BYTES})"
+                            f"Response exceeded {MAX_RESPONSE_BYTES} bytes while streaming"
                         )
-
-                    # aiter_bytes() yields already-decompressed bytes (httpx
-                    # decodes gzip/deflate/br transparently) - this cap is
-                    # therefore enforced on the DECOMPRESSED size, which is
-                    # what guards against a "gzip bomb" (small Content-Length,
-                    # huge decoded payload): the loop aborts as soon as the
-                    # decoded total crosses the limit, regardless of what the
-                    # compressed Content-Length claimed.
-                    chunks: list[bytes] = []
-                    total = 0
-                    async for chunk in response.aiter_bytes():
-                        total += len(chunk)
-                        if total > MAX_RESPONSE_BYTES:
-                            raise ResponseTooLargeError(
-                                f"Response exceeded {MAX_RESPONSE_BYTES} bytes while streaming"
-                            )
-                        chunks.append(chunk)
-
-                    html = b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
-                    return FetchedPage(url=current_url, html=html, content_type=content_type)
-
-            except httpx.TimeoutException as e:
-                raise FetchTimeoutError(f"Timed out fetching {current_url}") from e
-            except httpx.RequestError as e:
-                raise UpstreamFetchError(f"Failed to fetch {current_url}: {e}") from e
+                    text = decoder.decode(chunk)
+                    parts.append(text)
+                    if watcher is not None and watcher.feed(text):
+                        stopped_early = True
+                        break
+                if not stopped_early:
+                    parts.append(decoder.decode(b"", final=True))
+
+                html = "".join(parts)
+                return FetchedPage(
+                    url=current_url,
+                    html=html,
+                    content_type=content_type,
+                    etag=response.headers.get("etag"),
+                    last_modified=response.headers.get("last-modified"),
+                    no_store="no-store" in response.headers.get("cache-control", "").lower(),
+                    stopped_early=stopped_early,
+                )
+
+        except httpx.TimeoutException as e:
+            raise FetchTimeoutError(f"Timed out fetching {current_url}") from e
+        except httpx.RequestError as e:
+            raise UpstreamFetchError(f"Failed to fetch {current_url}: {e}") from e
+        finally:
+            await host_clients.release(client)
 
 
 def _sniff_image_type(data: bytes) -> str | None:
@@ -257,74 +323,73 @@ async def fetch_image(url: str) -> FetchedImage:
     current_url = url
     redirects_followed = 0
 
-    async with httpx.AsyncClient(
-        follow_redirects=False,
-        timeout=TIMEOUT_SECONDS,
-        # Keep image fetching on the same direct, pinned network path.
-        trust_env=False,
-    ) as client:
-        while True:
-            scheme, hostname, port, path, query, fragment = _validate_url(current_url)
-            resolved_ip = _resolve_and_validate(hostname)
-            pinned_url = _build_pinned_url(scheme, resolved_ip, port, path, query, fragment)
-
-            headers = {
-                "Host": hostname,
-                "User-Agent": USER_AGENT,
-                "Accept": "image/jpeg,image/png,image/webp",
-            }
-            extensions = {"sni_hostname": hostname} if scheme == "https" else {}
-
-            try:
-                async with client.stream("GET", pinned_url, headers=headers, extensions=extensions) as response:
-                    if response.status_code in (301, 302, 303, 307, 308):
-                        location = response.headers.get("location")
-                        if not location:
-                            raise UpstreamFetchError(f"Redirect without Location header from {current_url}")
-
-                        redirects_followed += 1
-                        if redirects_followed > MAX_REDIRECTS:
-                            raise TooManyRedirectsError(f"Too many redirects while fetching {url}")
-
-                        origin_url = urlunsplit((scheme, f"{hostname}:{port}", path, query, fragment))
-                        current_url = str(httpx.URL(origin_url).join(location))
-                        continue
-
-                    if response.status_code != 200:
-                        raise UpstreamFetchError(f"Upstream returned HTTP {response.status_code} for {current_url}")
-
-                    content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
-                    if content_type not in ALLOWED_IMAGE_CONTENT_TYPES:
-                        raise UnsupportedContentTypeError(f"Unsupported image Content-Type: {content_type or '(none)'}")
-
-                    content_length = _declared_length(response.headers)
-                    if content_length is not None and content_length > MAX_IMAGE_BYTES:
-                        raise ResponseTooLargeError(
-                            f"Image too large ({content_length} bytes, limit {MAX_IMAGE_BYTES})"
-                        )
-
-                    chunks: list[bytes] = []
-                    total = 0
-                    async for chunk in response.aiter_bytes():
-                        total += len(chunk)
-                        if total > MAX_IMAGE_BYTES:
-                            raise ResponseTooLargeError(f"Image exceeded {MAX_IMAGE_BYTES} bytes while streaming")
-                        chunks.append(chunk)
-
-                    data = b"".join(chunks)
-                    sniffed = _sniff_image_type(data)
-                    if sniffed is None or sniffed != content_type:
-                        raise UnsupportedContentTypeError(
-                            "Response body does not match the declared image Content-Type"
-                        )
+    while True:
+        scheme, hostname, port, path, query, fragment = _validate_url(current_url)
+        resolved_ip = await _resolve_and_validate(hostname)
+        pinned_url = _build_pinned_url(scheme, resolved_ip, port, path, query, fragment)
+
+        headers = {
+            "Host": hostname,
+            "User-Agent": USER_AGENT,
+            "Accept": "image/jpeg,image/png,image/webp",
+        }
+        extensions = {"sni_hostname": hostname} if scheme == "https" else {}
+        # Same per-host pool as fetch_html: the image of a just-previewed
+        # page reuses its warm connection.
+        client = await host_clients.acquire(scheme, hostname, port)
+
+        try:
+            async with client.stream("GET", pinned_url, headers=headers, extensions=extensions) as response:
+                if response.status_code in (301, 302, 303, 307, 308):
+                    location = response.headers.get("location")
+                    if not location:
+                        raise UpstreamFetchError(f"Redirect without Location header from {current_url}")
+
+                    redirects_followed += 1
+                    if redirects_followed > MAX_REDIRECTS:
+                        raise TooManyRedirectsError(f"Too many redirects while fetching {url}")
+
+                    origin_url = urlunsplit((scheme, f"{hostname}:{port}", path, query, fragment))
+                    current_url = str(httpx.URL(origin_url).join(location))
+                    continue
+
+                if response.status_code != 200:
+                    raise UpstreamFetchError(f"Upstream returned HTTP {response.status_code} for {current_url}")
+
+                content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+                if content_type not in ALLOWED_IMAGE_CONTENT_TYPES:
+                    raise UnsupportedContentTypeError(f"Unsupported image Content-Type: {content_type or '(none)'}")
+
+                content_length = _declared_length(response.headers)
+                if content_length is not None and content_length > MAX_IMAGE_BYTES:
+                    raise ResponseTooLargeError(
+                        f"Image too large ({content_length} bytes, limit {MAX_IMAGE_BYTES})"
+                    )
 
-                    return FetchedImage(
-                        content=data,
-                        content_type=content_type,
-                        extension=ALLOWED_IMAGE_CONTENT_TYPES[content_type],
+                chunks: list[bytes] = []
+                total = 0
+                async for chunk in response.aiter_bytes():
+                    total += len(chunk)
+                    if total > MAX_IMAGE_BYTES:
+                        raise ResponseTooLargeError(f"Image exceeded {MAX_IMAGE_BYTES} bytes while streaming")
+                    chunks.append(chunk)
+
+                data = b"".join(chunks)
+                sniffed = _sniff_image_type(data)
+                if sniffed is None or sniffed != content_type:
+                    raise UnsupportedContentTypeError(
+                        "Response body does not match the declared image Content-Type"
                     )
 
-            except httpx.TimeoutException as e:
-                raise FetchTimeoutError(f"Timed out fetching image {current_url}") from e
-            except httpx.RequestError as e:
-                raise UpstreamFetchError(f"Failed to fetch image {current_url}: {e}") from e
+                return FetchedImage(
+                    content=data,
+                    content_type=content_type,
+                    extension=ALLOWED_IMAGE_CONTENT_TYPES[content_type],
+                )
+
+        except httpx.TimeoutException as e:
+            raise FetchTimeoutError(f"Timed out fetching image {current_url}") from e
+        except httpx.RequestError as e:
+            raise UpstreamFetchError(f"Failed to fetch image {current_url}: {e}") from e
+        finally:
+            await host_clients.release(client)
@@ -0,0 +1,201 @@
+"""Long-lived HTTP clients and a DNS cache for the recipe import fetcher.
+
+Every fetch used to build its own `httpx.AsyncClient` and call blocking
+`socket.getaddrinfo` on the event loop. Preview and confirm usually hit the
+same host twice within a minute (page, then its image), so both now reuse:
+
+* `HostClientPool` - one client per (scheme, hostname, port). Requests are
+  IP-pinned (the URL carries the validated address, Host/SNI carry the name),
+  so httpcore keys its connections by IP. A client shared between hostnames
+  could hand a TLS connection verified for host A to a request for host B on
+  the same CDN address. A client per hostname rules that out: every pooled
+  connection was verified for exactly the name it serves.
+* `DnsCache` - raw `getaddrinfo` answers for `TTL_SECONDS`, resolved off the
+  event loop. Only the addresses are cached; the caller re-validates each of
+  them on every use (see `fetcher._resolve_and_validate`), so a cached answer
+  can never skip the SSRF guard. Failures are not cached.
+* `FetchLimiter` - caps concurrent page fetches of batch imports, in total and
+  per source host, so a bookmark migration cannot hammer one site or open
+  hundreds of sockets at once.
+
+All three are per process. The client pool and the limiter are also bound to
+the event loop that created them. The app lifespan closes the clients on
+shutdown.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+import httpx
+
+TTL_SECONDS = 60.0
+MAX_DNS_ENTRIES = 256
+MAX_HOST_CLIENTS = 32
+MAX_CONCURRENT_FETCHES = 8
+MAX_CONCURRENT_FETCHES_PER_HOST = 2
+# Long enough to carry a connection from preview to confirm.
+KEEPALIVE_EXPIRY_SECONDS = 30.0
+CONNECTION_LIMITS = httpx.Limits(
+    max_connections=8, max_keepalive_connections=4, keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS
+)
+
+
+class DnsCache:
+    def __init__(self, ttl_seconds: float = TTL_SECONDS, max_entries: int = MAX_DNS_ENTRIES) -> None:
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def resolve(self, hostname: str) -> list[str]:
+        """Addresses for `hostname`; raises `socket.gaierror` like getaddrinfo."""
+        entry = self._entries.get(hostname)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(hostname)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        addr_infos = await asyncio.get_running_loop().getaddrinfo(hostname, None)
+        addresses = [sockaddr[0] for _family, _type, _proto, _canon, sockaddr in addr_infos]
+        if addresses:
+            self._entries[hostname] = (time.monotonic() + self._ttl, addresses)
+            self._entries.move_to_end(hostname)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return addresses
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class HostClientPool:
+    """LRU of per-host clients. A fetch holds its client from `acquire` to
+    `release`; eviction closes a client only once no fetch holds it, so a
+    slow host is never cut off mid-stream by 32 others being fetched."""
+
+    def __init__(self, timeout: float, max_clients: int = MAX_HOST_CLIENTS) -> None:
+        self._timeout = timeout
+        self._max_clients = max_clients
+        self._clients: OrderedDict[tuple[str, str, int], httpx.AsyncClient] = OrderedDict()
+        # client -> fetches currently using it; evicted clients stay here until released.
+        self._users: dict[httpx.AsyncClient, int] = {}
+        self._evicted: set[httpx.AsyncClient] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.created = 0
+        self.reused = 0
+
+    async def acquire(self, scheme: str, hostname: str, port: int) -> httpx.AsyncClient:
+        """Client for the host, marked in use until `release`."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Connections cannot outlive their event loop (tests, TestClient
+            # portals); a new loop starts with a fresh pool. The old clients
+            # are closed now, or by their last fetch on the old loop.
+            old = list(self._clients.values())
+            self._clients.clear()
+            self._loop = loop
+            for client in old:
+                await self._retire(client)
+        key = (scheme, hostname.lower(), port)
+        client = self._clients.get(key)
+        if client is not None:
+            self._clients.move_to_end(key)
+            self.reused += 1
+        else:
+            client = self._clients[key] = httpx.AsyncClient(
+                follow_redirects=False,
+                timeout=self._timeout,
+                # Do not allow an environment proxy to bypass the validated target.
+                trust_env=False,
+                limits=CONNECTION_LIMITS,
+            )
+            self.created += 1
+        self._users[client] = self._users.get(client, 0) + 1
+        while len(self._clients) > self._max_clients:
+            _, evicted = self._clients.popitem(last=False)
+            await self._retire(evicted)
+        return client
+
+    async def release(self, client: httpx.AsyncClient) -> None:
+        users = self._users.pop(client, 0) - 1
+        if users > 0:
+            self._users[client] = users
+        elif client in self._evicted:
+            self._evicted.discard(client)
+            await client.aclose()
+
+    async def _retire(self, client: httpx.AsyncClient) -> None:
+        if self._users.get(client):
+            self._evicted.add(client)
+            return
+        try:
+            await client.aclose()
+        except RuntimeError:
+            # Its sockets belonged to an event loop that is already closed.
+            pass
+
+    async def aclose(self) -> None:
+        clients = [*self._clients.values(), *self._evicted]
+        self._clients.clear()
+        self._evicted.clear()
+        self._users.clear()
+        for client in clients:
+            await client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._clients),
+            "in_use": sum(1 for users in self._users.values() if users),
+            "created": self.created,
+            "reused": self.reused,
+        }
+
+
+class FetchLimiter:
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT_FETCHES,
+        max_per_host: int = MAX_CONCURRENT_FETCHES_PER_HOST,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_per_host = max_per_host
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._global: asyncio.Semaphore | None = None
+        # host -> (semaphore, tasks holding or waiting for it)
+        self._hosts: dict[str, tuple[asyncio.Semaphore, int]] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop or self._global is None:
+            self._loop = loop
+            self._global = asyncio.Semaphore(self.max_concurrent)
+            self._hosts.clear()
+        host = host.lower()
+        semaphore, users = self._hosts.get(host, (None, 0))
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_per_host)
+        self._hosts[host] = (semaphore, users + 1)
+        try:
+            # Host first: a task waiting for its host must not hold a global slot.
+            async with semaphore, self._global:
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                try:
+                    yield
+                finally:
+                    self.in_flight -= 1
+        finally:
+            semaphore, users = self._hosts[host]
+            if users > 1:
+                self._hosts[host] = (semaphore, users - 1)
+            else:
+                del self._hosts[host]
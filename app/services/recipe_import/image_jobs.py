@@ -0,0 +1,288 @@
+"""Pobieranie zdjęć zaimportowanych przepisów w tle.
+
+Confirm importu zapisywał przepis dopiero po `download_and_store_image`
+(do 10 s, 5 MB), trzymając przez cały ten czas blokadę wiersza użytkownika
+z `lock_user_for_import`. Teraz zapisuje przepis od razu, razem z wierszem
+`image_download_jobs`, a zdjęcie dociąga ten moduł:
+
+* `enqueue()` - dodaje zadanie w transakcji wywołującego (commit robi on);
+* `run_job()` - jedna próba: przejęcie zadania warunkowym UPDATE-em
+  (pending -> running), pobranie, podpięcie pliku pod przepis;
+* `ImageJobRunner` - pętla asyncio w procesie aplikacji (start/stop
+  w lifespanie), bez zewnętrznego brokera. Budzona przez confirm, poza tym
+  co `POLL_INTERVAL_SECONDS` sprawdza zadania, którym minął backoff.
+
+Nieudana próba wraca do pending z opóźnieniem z `RETRY_DELAYS_SECONDS`;
+po `MAX_ATTEMPTS` zadanie kończy się statusem failed i kodem błędu.
+Zadanie w running dłużej niż `LEASE_SECONDS` (ubity proces) wraca do
+pending; runner sprawdza to przy starcie i potem co `LEASE_SECONDS`.
+Świeżych zadań running nie rusza - przy kilku workerach albo restarcie
+"na zakładkę" pobiera je inny, żywy proces. Wszystkie zapytania do bazy idą
+przez `asyncio.to_thread`, nigdy na pętli zdarzeń aplikacji. Zdjęcie nigdy
+nie nadpisuje obrazu, który użytkownik ustawił w międzyczasie, a plik
+pobrany dla usuniętego przepisu jest zwalniany (image_store.release - inne
+przepisy mogą mieć to samo zdjęcie).
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.db.models.image_download_job import ImageDownloadJob
+from app.db.models.recipe import Recipe
+from app.services.recipe_import.errors import RecipeImportError, error_code_for
+from app.services.recipe_import.image_storage import download_and_store_image
+from app.utils import image_store
+from app.utils.image_pipeline import format_widths
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+MAX_ATTEMPTS = 4
+# Opóźnienie przed próbą 2, 3 i 4.
+RETRY_DELAYS_SECONDS = (30, 5 * 60, 30 * 60)
+POLL_INTERVAL_SECONDS = 5.0
+JOBS_PER_TICK = 4
+# Próba trwa najwyżej kilka timeoutów fetchera (przekierowania) - po tym
+# czasie running oznacza proces, który zginął w trakcie.
+LEASE_SECONDS = 5 * 60
+
+
+def enqueue(db: Session, recipe_id: int, url: str) -> ImageDownloadJob:
+    job = ImageDownloadJob(recipe_id=recipe_id, url=url, next_attempt_at=datetime.utcnow())
+    db.add(job)
+    return job
+
+
+def latest_job(db: Session, recipe_id: int) -> ImageDownloadJob | None:
+    return (
+        db.query(ImageDownloadJob)
+        .filter(ImageDownloadJob.recipe_id == recipe_id)
+        .order_by(ImageDownloadJob.id.desc())
+        .first()
+    )
+
+
+def status_counts(db: Session) -> dict[str, int]:
+    counts = dict.fromkeys((STATUS_PENDING, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED), 0)
+    rows = db.query(ImageDownloadJob.status, func.count(ImageDownloadJob.id)).group_by(ImageDownloadJob.status)
+    counts.update({status: count for status, count in rows})
+    return counts
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=RETRY_DELAYS_SECONDS[min(attempts, len(RETRY_DELAYS_SECONDS)) - 1])
+
+
+def _claim(db: Session, job_id: int) -> ImageDownloadJob | None:
+    """pending -> running; None, jeśli zadanie wziął już ktoś inny albo zniknęło."""
+    claimed = db.execute(
+        update(ImageDownloadJob)
+        .where(ImageDownloadJob.id == job_id, ImageDownloadJob.status == STATUS_PENDING)
+        .values(
+            status=STATUS_RUNNING,
+            attempts=ImageDownloadJob.attempts + 1,
+            updated_at=datetime.utcnow(),
+        )
+    ).rowcount
+    db.commit()
+    return db.get(ImageDownloadJob, job_id) if claimed else None
+
+
+def _record_failure(db: Session, job: ImageDownloadJob, error_code: str) -> None:
+    job.error_code = error_code
+    if job.attempts >= MAX_ATTEMPTS:
+        job.status = STATUS_FAILED
+    else:
+        job.status = STATUS_PENDING
+        job.next_attempt_at = datetime.utcnow() + retry_delay(job.attempts)
+    db.commit()
+
+
+def _attach(db: Session, job: ImageDownloadJob, image_path: str) -> None:
+    recipe = db.get(Recipe, job.recipe_id)
+    if recipe is not None and not recipe.image:
+        recipe.image = image_path
+        recipe.image_variant_widths = format_widths(image_store.stored_variant_widths(image_path))
+        attached = True
+    else:
+        # Przepis usunięty albo ma już obraz ustawiony ręcznie - nie nadpisujemy.
+        attached = False
+    job.status = STATUS_DONE
+    job.error_code = None
+    db.commit()
+    if not attached:
+        image_store.release(db, image_path)
+
+
+def _claim_url(job_id: int) -> tuple[str, int] | None:
+    """Przejęcie we własnej sesji: (url, numer próby) albo None."""
+    with SessionLocal() as db:
+        job = _claim(db, job_id)
+        return (job.url, job.attempts) if job is not None else None
+
+
+def _finish(job_id: int, attempt: int, image_path: str | None, error_code: str | None) -> str | None:
+    """Zapis wyniku próby we własnej sesji. Zadanie, które w międzyczasie
+    wróciło do pending po wygaśnięciu dzierżawy, nie jest już nasze."""
+    with SessionLocal() as db:
+        job = db.get(ImageDownloadJob, job_id)
+        if job is None or job.status != STATUS_RUNNING or job.attempts != attempt:
+            # Przepis (a z nim zadanie) usunięto w trakcie pobierania albo
+            # próbę przejął już inny proces.
+            if image_path is not None:
+                image_store.release(db, image_path)
+            return None
+        if image_path is None:
+            _record_failure(db, job, error_code)
+        else:
+            _attach(db, job, image_path)
+        return job.status
+
+
+async def run_job(job_id: int) -> str | None:
+    """Jedna próba pobrania. Zwraca status po próbie (None = nie przejęto)."""
+    claimed = await asyncio.to_thread(_claim_url, job_id)
+    if claimed is None:
+        return None
+    url, attempt = claimed
+    # Pobieranie nie trzyma otwartej transakcji ani połączenia z bazą.
+    try:
+        image_path = await download_and_store_image(url)
+    except Exception as exc:
+        if isinstance(exc, RecipeImportError):
+            error_code = error_code_for(exc)
+        elif isinstance(exc, OSError):
+            error_code = "storage_error"
+        else:
+            logger.exception("image download job %s failed", job_id)
+            error_code = "import_failed"
+        return await asyncio.to_thread(_finish, job_id, attempt, None, error_code)
+    return await asyncio.to_thread(_finish, job_id, attempt, image_path, None)
+
+
+def _due_job_ids(db: Session, limit: int) -> list[int]:
+    rows = (
+        db.query(ImageDownloadJob.id)
+        .filter(
+            ImageDownloadJob.status == STATUS_PENDING,
+            ImageDownloadJob.next_attempt_at <= datetime.utcnow(),
+        )
+        .order_by(ImageDownloadJob.next_attempt_at, ImageDownloadJob.id)
+        .limit(limit)
+    )
+    return [job_id for (job_id,) in rows]
+
+
+def _requeue_interrupted(db: Session, lease_seconds: float = LEASE_SECONDS) -> int:
+    """running dłużej niż dzierżawa = próba przerwana w połowie; liczy się jako zużyta."""
+    now = datetime.utcnow()
+    count = db.execute(
+        update(ImageDownloadJob)
+        .where(
+            ImageDownloadJob.status == STATUS_RUNNING,
+            ImageDownloadJob.updated_at < now - timedelta(seconds=lease_seconds),
+        )
+        .values(status=STATUS_PENDING, next_attempt_at=now, updated_at=now)
+    ).rowcount
+    db.commit()
+    return count
+
+
+def _with_session(fn, *args):
+    with SessionLocal() as db:
+        return fn(db, *args)
+
+
+class ImageJobRunner:
+    def __init__(self, poll_interval: float = POLL_INTERVAL_SECONDS, jobs_per_tick: int = JOBS_PER_TICK) -> None:
+        self._poll_interval = poll_interval
+        self._jobs_per_tick = jobs_per_tick
+        self._task: asyncio.Task | None = None
+        self._wake_up: asyncio.Event | None = None
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Wywoływane z lifespanu, w pętli zdarzeń aplikacji."""
+        if self.running:
+            return
+        self._wake_up = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="image-download-jobs")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def wake(self) -> None:
+        if self._wake_up is not None:
+            self._wake_up.set()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+    async def run_due(self) -> int:
+        """Jedna tura: do `jobs_per_tick` zaległych zadań naraz."""
+        job_ids = await asyncio.to_thread(_with_session, _due_job_ids, self._jobs_per_tick)
+        for status in await asyncio.gather(*(run_job(job_id) for job_id in job_ids)):
+            if status == STATUS_DONE:
+                self.succeeded += 1
+            elif status == STATUS_PENDING:
+                self.retried += 1
+            elif status == STATUS_FAILED:
+                self.failed += 1
+        return len(job_ids)
+
+    async def requeue_expired(self) -> None:
+        requeued = await asyncio.to_thread(_with_session, _requeue_interrupted)
+        if requeued:
+            logger.info("requeued %d interrupted image download jobs", requeued)
+
+    async def _run(self) -> None:
+        next_requeue = 0.0
+        while True:
+            # Przed turą, nie po niej: wake() w trakcie tury nie może przepaść.
+            self._wake_up.clear()
+            try:
+                if time.monotonic() >= next_requeue:
+                    await self.requeue_expired()
+                    next_requeue = time.monotonic() + LEASE_SECONDS
+                processed = await self.run_due()
+            except Exception:
+                # Błąd bazy nie może zabić runnera - następna tura spróbuje znowu.
+                logger.exception("image download job tick failed")
+                processed = 0
+            if processed == self._jobs_per_tick:
+                continue  # kolejka jeszcze niepusta
+            try:
+                await asyncio.wait_for(self._wake_up.wait(), timeout=self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+image_job_runner = ImageJobRunner()
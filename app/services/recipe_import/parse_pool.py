@@ -0,0 +1,157 @@
+"""Import page parsing in a bounded process pool.
+
+`parse_page` and `parse_ingredient_lines_batch` over a page of up to 3 MB are
+pure CPU. Called from the async preview endpoints they ran on the event loop
+and froze every other request of the worker for the whole parse. They now run
+in `PARSE_WORKERS` separate processes, with three limits:
+
+* `PARSE_CPU_SECONDS` - CPU time of one page inside the worker (SIGPROF
+  timer). A page that needs more raises `ParseTimeoutError` there, so the
+  worker process stays usable for the next page.
+* `PARSE_WALL_SECONDS` - what the request waits in total, queue included.
+  Backstop for a worker that does not get CPU at all; the page is abandoned
+  (its CPU timer still ends it).
+* `PARSE_QUEUE_LIMIT` - pages submitted and not finished yet. Beyond that a
+  preview fails at once with `ParseQueueFullError` instead of queueing
+  minutes of work behind a bookmark migration.
+
+Worker processes are started with "spawn" (not fork: the app process has
+threads and open database connections) on first use and only import the
+parser modules. The ingredient parser's LRU cache therefore lives in the
+workers, not in the app process. The app lifespan shuts the pool down.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.services.ingredient_parsing.models import ParsedIngredientLine
+from app.services.ingredient_parsing.parser import parse_ingredient_lines_batch
+from app.services.recipe_import.errors import ParseQueueFullError, ParseTimeoutError, RecipeImportError
+from app.services.recipe_import.models import RecipeImportDraft
+from app.services.recipe_import.parser import parse_page
+
+logger = logging.getLogger(__name__)
+
+# The VPS has ~2 GB RAM; one worker process costs ~40 MB.
+PARSE_WORKERS = 2
+PARSE_QUEUE_LIMIT = 16
+# A 3 MB page with 20k ingredient lines takes ~0.4 s of CPU.
+PARSE_CPU_SECONDS = 2.0
+PARSE_WALL_SECONDS = 5.0
+
+ParsedPage = tuple[RecipeImportDraft, tuple[ParsedIngredientLine, ...]]
+
+
+def _cpu_budget_exceeded(signum, frame) -> None:
+    raise ParseTimeoutError("page parse exceeded its CPU budget")
+
+
+def _init_worker() -> None:
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGPROF, _cpu_budget_exceeded)
+
+
+def parse_import_page(html: str, source_url: str, cpu_seconds: float | None = None) -> ParsedPage:
+    """Draft and parsed ingredient lines of one page. Runs in a worker process."""
+    budget = cpu_seconds is not None and hasattr(signal, "setitimer")
+    if budget:
+        signal.setitimer(signal.ITIMER_PROF, cpu_seconds)
+    try:
+        draft = parse_page(html, source_url)
+        return draft, tuple(parse_ingredient_lines_batch(draft.ingredients))
+    finally:
+        if budget:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+
+
+class ParsePool:
+    def __init__(
+        self,
+        workers: int = PARSE_WORKERS,
+        queue_limit: int = PARSE_QUEUE_LIMIT,
+    ) -> None:
+        self._workers = workers
+        self._queue_limit = queue_limit
+        self._executor: ProcessPoolExecutor | None = None
+        # Futures finish on the executor's manager thread.
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.parsed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.crashes = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return self._executor
+
+    def _finished(self, future) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    async def parse(self, html: str, source_url: str) -> ParsedPage:
+        with self._lock:
+            if self.in_flight >= self._queue_limit:
+                self.rejected += 1
+                raise ParseQueueFullError("parse queue is full")
+            self.in_flight += 1
+        try:
+            future = self._get_executor().submit(parse_import_page, html, source_url, PARSE_CPU_SECONDS)
+        except BaseException:
+            self._finished(None)
+            raise
+        future.add_done_callback(self._finished)
+
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), PARSE_WALL_SECONDS)
+        except (asyncio.TimeoutError, ParseTimeoutError) as exc:
+            with self._lock:
+                self.timeouts += 1
+            if isinstance(exc, ParseTimeoutError):
+                raise
+            raise ParseTimeoutError("page parse did not finish in time") from exc
+        except BrokenProcessPool as exc:
+            # A worker died (e.g. killed by the OOM killer); the executor is
+            # unusable from now on, the next page gets a fresh one.
+            logger.error("recipe import parse worker crashed")
+            with self._lock:
+                self.crashes += 1
+            self._reset()
+            raise RecipeImportError("parse worker crashed") from exc
+        with self._lock:
+            self.parsed += 1
+        return result
+
+    def _reset(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self._workers,
+                "in_flight": self.in_flight,
+                "parsed": self.parsed,
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+                "crashes": self.crashes,
+            }
+
+
+parse_pool = ParsePool()
@@ -0,0 +1,143 @@
+"""Process-wide cache of parsed import previews, keyed by canonical source URL.
+
+`POST /recipe-import/preview` fetched and parsed the page on every call, also
+when several users import the same popular recipe or one user presses
+"analyze" twice. A cached entry holds everything derived from the public page:
+the normalized `RecipeImportDraft` and its parsed ingredient lines. Nothing
+user-specific is cached; preview tokens are still issued per request.
+
+Lifecycle of an entry:
+
+* younger than `FRESH_SECONDS` - served without touching the network (hit);
+* older, but with an upstream `ETag`/`Last-Modified` and younger than
+  `MAX_STALE_SECONDS` - revalidated with a conditional GET; a 304 keeps the
+  entry (revalidated), a 200 replaces it (miss);
+* anything else is fetched again (miss).
+
+Errors are never cached, and neither are `Cache-Control: no-store` pages.
+The cache holds at most `MAX_ENTRIES` URLs (LRU) and lives per process.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.services.ingredient_parsing.models import ParsedIngredientLine
+from app.services.recipe_import.models import RecipeImportDraft
+from app.services.recipe_import.preview_tokens import PreviewTokenError, canonical_source_url
+
+FRESH_SECONDS = 5 * 60.0
+MAX_STALE_SECONDS = 60 * 60.0
+MAX_ENTRIES = 256
+
+
+@dataclass(frozen=True)
+class CachedPreview:
+    draft: RecipeImportDraft
+    ingredients: tuple[ParsedIngredientLine, ...]
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def revalidatable(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+@dataclass
+class _Slot:
+    preview: CachedPreview
+    fresh_until: float
+    stale_until: float
+
+
+class PreviewCache:
+    def __init__(
+        self,
+        fresh_seconds: float = FRESH_SECONDS,
+        max_stale_seconds: float = MAX_STALE_SECONDS,
+        max_entries: int = MAX_ENTRIES,
+    ) -> None:
+        self.fresh_seconds = fresh_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.max_entries = max_entries
+        self._slots: OrderedDict[str, _Slot] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(url: str) -> str | None:
+        """None for URLs that cannot be bound (the fetcher rejects them anyway)."""
+        try:
+            return canonical_source_url(url)
+        except PreviewTokenError:
+            return None
+
+    def lookup(self, url: str) -> tuple[CachedPreview | None, bool]:
+        """(entry, fresh). A stale entry is returned only if it can be revalidated."""
+        key = self.key_for(url)
+        if key is None:
+            return None, False
+        now = time.monotonic()
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                return None, False
+            if slot.fresh_until > now:
+                self._slots.move_to_end(key)
+                self.hits += 1
+                return slot.preview, True
+            if slot.preview.revalidatable and slot.stale_until > now:
+                return slot.preview, False
+            del self._slots[key]
+            return None, False
+
+    def store(self, url: str, preview: CachedPreview) -> None:
+        """Records a fresh fetch (a miss) and keeps its result."""
+        with self._lock:
+            self.misses += 1
+        self._put(url, preview)
+
+    def mark_revalidated(self, url: str, preview: CachedPreview) -> None:
+        """Upstream answered 304: the entry is fresh again."""
+        with self._lock:
+            self.revalidated += 1
+        self._put(url, preview)
+
+    def record_miss(self) -> None:
+        """A fetch whose result must not be cached (`Cache-Control: no-store`)."""
+        with self._lock:
+            self.misses += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slots.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            served = self.hits + self.revalidated
+            total = served + self.misses
+            return {
+                "size": len(self._slots),
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "hit_ratio": round(served / total, 3) if total else None,
+            }
+
+    def _put(self, url: str, preview: CachedPreview) -> None:
+        key = self.key_for(url)
+        if key is None:
+            return
+        now = time.monotonic()
+        slot = _Slot(preview, now + self.fresh_seconds, now + self.max_stale_seconds)
+        with self._lock:
+            self._slots[key] = slot
+            self._slots.move_to_end(key)
+            while len(self._slots) > self.max_entries:
+                self._slots.popitem(last=False)
+
+
+preview_cache = PreviewCache()
@@ -1,6 +1,9 @@
 import json
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
 
-from bs4 import BeautifulSoup
+LD_JSON_TYPE = "application/ld+json"
 
 
 def _type_matches_recipe(node: dict) -> bool:
@@ -34,27 +37,217 @@ def _walk_for_recipe(data) -> dict | None:
     return None
 
 
-def extract_schema_org_recipe(html: str) -> dict | None:
-    """Szuka application/ld+json blokow ze schema.org/Recipe.
+def _recipe_from_ld_json(raw: str) -> dict | None:
+    if not raw or not raw.strip():
+        return None
+    try:
+        data = json.loads(raw)
+    except (json.JSONDecodeError, ValueError):
+        return None
+    return _walk_for_recipe(data)
+
+
+@dataclass
+class PageScan:
+    """Wszystko, czego import potrzebuje ze strony, zebrane w jednym przejściu."""
+
+    recipe: dict | None = None
+    h1: str | None = None
+    title: str | None = None
+    # Pierwszy <meta> z danym property=/name= (content może być None).
+    meta_properties: dict[str, str | None] = field(default_factory=dict)
+    meta_names: dict[str, str | None] = field(default_factory=dict)
+
+    def meta_content(self, key: str) -> str | None:
+        if key in self.meta_properties:
+            content = self.meta_properties[key]
+        else:
+            content = self.meta_names.get(key)
+        return content.strip() if content else None
+
+
+class _RecipeFound(Exception):
+    pass
+
+
+class _PageScanner(HTMLParser):
+    """Strumieniowy skaner bez budowania drzewa DOM.
+
+    Zbiera bloki application/ld+json, tekst pierwszego <h1> i <title> oraz
+    <meta property/name>. Po pierwszym bloku JSON-LD z Recipe przerywa
+    parsowanie - pola fallbacku nie są wtedy potrzebne.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.scan = PageScan()
+        self._ld_json: list[str] | None = None
+        self._h1_parts: list[str] | None = None
+        self._h1_depth = 0
+        self._title_parts: list[str] | None = None
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "script":
+            script_type = dict(attrs).get("type") or ""
+            if script_type.strip().lower() == LD_JSON_TYPE:
+                self._ld_json = []
+        elif tag == "h1":
+            if self.scan.h1 is None and self._h1_parts is None:
+                self._h1_parts = []
+            if self._h1_parts is not None:
+                self._h1_depth += 1
+        elif tag == "title":
+            if self.scan.title is None and self._title_parts is None:
+                self._title_parts = []
+        elif tag == "meta":
+            self._record_meta(dict(attrs))
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "script" and self._ld_json is not None:
+            raw, self._ld_json = "".join(self._ld_json), None
+            recipe = _recipe_from_ld_json(raw)
+            if recipe is not None:
+                self.scan.recipe = recipe
+                raise _RecipeFound
+        elif tag == "h1" and self._h1_parts is not None:
+            self._h1_depth -= 1
+            if self._h1_depth == 0:
+                self.scan.h1, self._h1_parts = "".join(self._h1_parts), None
+        elif tag == "title" and self._title_parts is not None:
+            self.scan.title, self._title_parts = "".join(self._title_parts), None
+
+    def handle_data(self, data: str) -> None:
+        if self._ld_json is not None:
+            self._ld_json.append(data)
+            return
+        # Jak BeautifulSoup get_text(strip=True): każdy fragment tekstu
+        # przycięty osobno, sklejone bez separatora.
+        text = data.strip()
+        if not text:
+            return
+        if self._h1_parts is not None:
+            self._h1_parts.append(text)
+        if self._title_parts is not None:
+            self._title_parts.append(text)
+
+    def _record_meta(self, attrs: dict[str, str | None]) -> None:
+        content = attrs.get("content")
+        if attrs.get("property"):
+            self.scan.meta_properties.setdefault(attrs["property"], content)
+        if attrs.get("name"):
+            self.scan.meta_names.setdefault(attrs["name"], content)
+
+    def finish(self) -> PageScan:
+        # Niedomknięte <h1>/<title> na końcu dokumentu - bierzemy to, co jest.
+        if self._h1_parts is not None:
+            self.scan.h1 = "".join(self._h1_parts)
+        if self._title_parts is not None:
+            self.scan.title = "".join(self._title_parts)
+        return self.scan
+
+
+def scan_page(html: str) -> PageScan:
+    """Jedno przejście po HTML: schema.org/Recipe z JSON-LD i pola fallbacku.
 
     Strona może mieć kilka bloków JSON-LD (dla różnych typów: Organization,
     BreadcrumbList, Recipe...) - sprawdzamy każdy, tolerancyjnie na błędny JSON
     w pojedynczym bloku (jeden zepsuty blok nie blokuje odczytu innych).
+    Skanowanie kończy się na pierwszym Recipe, więc zwykle nie dochodzi do
+    treści strony (JSON-LD siedzi najczęściej w <head>).
     """
-    soup = BeautifulSoup(html, "html.parser")
+    scanner = _PageScanner()
+    try:
+        scanner.feed(html)
+        scanner.close()
+    except _RecipeFound:
+        return scanner.scan
+    return scanner.finish()
 
-    for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
-        raw = script.string or script.get_text()
-        if not raw or not raw.strip():
-            continue
 
-        try:
-            data = json.loads(raw)
-        except (json.JSONDecodeError, ValueError):
-            continue
+def extract_schema_org_recipe(html: str) -> dict | None:
+    """Szuka application/ld+json blokow ze schema.org/Recipe."""
+    return scan_page(html).recipe
 
-        recipe = _walk_for_recipe(data)
-        if recipe is not None:
-            return recipe
 
-    return None
+# Start of a comment or a complete <script ...> start tag.
+_MARKUP_RE = re.compile(r"<!--|<script\b[^>]*>", re.IGNORECASE)
+# A complete end tag: HTMLParser does not close the element before its ">".
+_SCRIPT_END_RE = re.compile(r"</script\b[^>]*>", re.IGNORECASE)
+_SCRIPT_END_START_RE = re.compile(r"</script\b", re.IGNORECASE)
+# Same rule as _PageScanner: the whole type value is application/ld+json.
+_LD_JSON_TYPE_RE = re.compile(r"""\btype\s*=\s*(["']?)\s*application/ld\+json\s*\1(?=[\s/>])""", re.IGNORECASE)
+
+
+class RecipeBlockWatcher:
+    """Tells the fetcher when the HTML received so far holds a Recipe.
+
+    `feed()` takes decoded text chunk by chunk and returns True once a
+    complete JSON-LD block with a Recipe has arrived. `scan_page` on the text
+    received up to then finds the same Recipe as on the whole page (it also
+    stops at the first one), so the rest of the page need not be downloaded.
+
+    Only comments and <script> elements are tokenized; plain markup is
+    skipped with a regex search, so this is cheap enough for the event loop.
+    The body of an unfinished JSON-LD script is set aside in `_script_parts`
+    and never searched again: each chunk is scanned once, plus the few
+    characters that may start its end tag, so a multi-MB block costs linear
+    time. The unconsumed tail it keeps is at most one tag.
+    """
+
+    def __init__(self) -> None:
+        self._pending = ""
+        self._script_parts: list[str] = []
+        self._in_comment = False
+        self._in_script = False
+        self._script_is_ld_json = False
+        self.found = False
+
+    def feed(self, text: str) -> bool:
+        if self.found:
+            return True
+        pending = self._pending + text
+        pos = 0
+        while True:
+            if self._in_comment:
+                end = pending.find("-->", pos)
+                if end < 0:
+                    pos = max(pos, len(pending) - 2)
+                    break
+                self._in_comment = False
+                pos = end + 3
+            elif self._in_script:
+                end = _SCRIPT_END_RE.search(pending, pos)
+                if end is None:
+                    if self._script_is_ld_json:
+                        # Keep only what may still turn into the end tag.
+                        start = _SCRIPT_END_START_RE.search(pending, pos)
+                        cut = start.start() if start else max(pos, len(pending) - len("</script"))
+                        self._script_parts.append(pending[pos:cut])
+                        pos = cut
+                    else:
+                        start = pending.rfind("<", pos)
+                        pos = start if start >= 0 else len(pending)
+                    break
+                self._in_script = False
+                self._script_parts.append(pending[pos : end.start()])
+                block, pos = "".join(self._script_parts), end.end()
+                self._script_parts = []
+                if self._script_is_ld_json and _recipe_from_ld_json(block) is not None:
+                    self.found = True
+                    self._pending = ""
+                    return True
+            else:
+                match = _MARKUP_RE.search(pending, pos)
+                if match is None:
+                    # Keep a tag that may be cut in half by the chunk boundary.
+                    start = pending.rfind("<", pos)
+                    pos = start if start >= 0 else len(pending)
+                    break
+                pos = match.end()
+                if match.group() == "<!--":
+                    self._in_comment = True
+                else:
+                    self._in_script = True
+                    self._script_is_ld_json = _LD_JSON_TYPE_RE.search(match.group()) is not None
+        self._pending = pending[pos:]
+        return False
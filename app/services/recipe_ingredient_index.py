@@ -0,0 +1,361 @@
+"""In-memory ingredient -> recipe index for ranking recipes by a pantry.
+
+`POST /recipes/pantry-match` answers "what can I cook from what I have"
+without scanning recipes. Every recipe gets a slot; per slot the index keeps
+the owner, the public flag and the number of essential ingredients, and per
+essential ingredient a numpy array of the slots that use it. A pantry query
+adds the posting arrays of the pantry's ingredients into one counter array
+and ranks the visible slots by covered / required.
+
+A recipe's ingredients are its `RecipeIngredient` rows: `ingredient_id`, or
+the parsed name resolved through `ingredient_name_index`. Recipes without
+structured rows are not in the index. Ingredients with
+`is_essential = False` are left out entirely, so a missing one never lowers
+the coverage and having one never raises it.
+
+Updates are incremental. A committed write to a `Recipe` or its
+`RecipeIngredient` rows queues the recipe id; the next query reloads only
+those recipes and patches their postings. A catalogue write (`Ingredient`,
+`IngredientAlias`: is_essential, names, aliases) marks the index stale.
+Invalidation is in-process only; `MAX_AGE_SECONDS` bounds what another
+worker process's writes can miss.
+
+A full build (~1 s at 100k recipes) never runs in a request. One background
+thread builds with its own session while queries keep using the previous
+snapshot; a second stale query does not start a second build. Only a cold
+index (no snapshot yet) makes a query wait, and `ensure_built` lets an async
+route do that waiting off the event loop. As with the name index, the lock
+is never held across a query.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.db.models.ingredient import Ingredient
+from app.db.models.ingredient_alias import IngredientAlias
+from app.db.models.recipe import Recipe
+from app.db.models.recipe_ingredient import RecipeIngredient
+from app.services.ingredient_index import find_ingredient_id, ingredient_name_index
+from app.services.permissions_service import is_admin
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_SECONDS = 300.0
+_CATALOGUE_MODELS = (Ingredient, IngredientAlias)
+_SESSION_RECIPES = "recipe_ingredient_index_recipes"
+_SESSION_CATALOGUE = "recipe_ingredient_index_catalogue_changed"
+_EMPTY_SLOTS = np.zeros(0, dtype=np.int32)
+
+
+@dataclass(frozen=True)
+class PantryMatch:
+    recipe_id: int
+    covered: int
+    required: int
+    missing_ingredient_ids: tuple[int, ...]
+
+    @property
+    def coverage(self) -> float:
+        return self.covered / self.required
+
+
+@dataclass
+class _RecipeData:
+    """Rows loaded for a full build or for the recipes of an update."""
+
+    recipes: list[tuple[int, int, bool]]  # (id, user_id, is_public)
+    ingredients: dict[int, set[int]]  # recipe id -> essential ingredient ids
+    optional: frozenset[int]
+
+
+def _load_optional(db: Session) -> frozenset[int]:
+    return frozenset(row.id for row in db.query(Ingredient.id).filter(Ingredient.is_essential == False))  # noqa: E712
+
+
+def _load(db: Session, optional: frozenset[int] | None = None, recipe_ids: set[int] | None = None) -> _RecipeData:
+    if optional is None:
+        optional = _load_optional(db)
+    names = ingredient_name_index.names(db)
+    recipes = db.query(Recipe.id, Recipe.user_id, Recipe.is_public)
+    rows = db.query(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, RecipeIngredient.parsed_name)
+    if recipe_ids is not None:
+        recipes = recipes.filter(Recipe.id.in_(recipe_ids))
+        rows = rows.filter(RecipeIngredient.recipe_id.in_(recipe_ids))
+    ingredients: dict[int, set[int]] = {}
+    for recipe_id, ingredient_id, parsed_name in rows:
+        if ingredient_id is None and parsed_name:
+            ingredient_id = find_ingredient_id(names, parsed_name)
+        if ingredient_id is not None and ingredient_id not in optional:
+            ingredients.setdefault(recipe_id, set()).add(ingredient_id)
+    return _RecipeData([tuple(row) for row in recipes], ingredients, optional)
+
+
+class RecipeIngredientIndex:
+    def __init__(self, max_age_seconds: float = MAX_AGE_SECONDS) -> None:
+        self._lock = threading.Lock()
+        # Signalled when a background build ends, successfully or not.
+        self._build_done = threading.Condition(self._lock)
+        self._building = False
+        self.version = 0
+        self._built_version: int | None = None
+        self._built_at = 0.0
+        self._max_age = max_age_seconds
+        self._pending: set[int] = set()
+        self._optional: frozenset[int] = frozenset()
+        self._reset()
+        self.queries = 0
+        self.rebuilds = 0
+        self.updates = 0
+        self.invalidations = 0
+
+    def _reset(self) -> None:
+        self._slots: dict[int, int] = {}
+        self._size = 0
+        self._recipe_ids = np.zeros(0, dtype=np.int64)
+        self._owners = np.zeros(0, dtype=np.int64)
+        self._public = np.zeros(0, dtype=bool)
+        self._required = np.zeros(0, dtype=np.int32)
+        self._postings: dict[int, np.ndarray] = {}
+        self._ingredients: dict[int, tuple[int, ...]] = {}
+
+    # -- building and updating (callers hold the lock) --
+
+    def _install(self, data: _RecipeData) -> None:
+        self._reset()
+        self._optional = data.optional
+        count = len(data.recipes)
+        self._grow(count)
+        if count:
+            columns = np.array(data.recipes, dtype=np.int64).reshape(count, 3)
+            self._recipe_ids[:count] = columns[:, 0]
+            self._owners[:count] = columns[:, 1]
+            self._public[:count] = columns[:, 2].astype(bool)
+        self._size = count
+        self._slots = {recipe_id: slot for slot, recipe_id in enumerate(self._recipe_ids[:count].tolist())}
+
+        pairs = [
+            (ingredient_id, self._slots[recipe_id])
+            for recipe_id, ingredient_ids in data.ingredients.items()
+            if recipe_id in self._slots
+            for ingredient_id in ingredient_ids
+        ]
+        if not pairs:
+            return
+        pairs = np.array(pairs, dtype=np.int64)
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        ingredient_ids, starts = np.unique(pairs[:, 0], return_index=True)
+        slots = pairs[:, 1].astype(np.int32)
+        for ingredient_id, posting in zip(ingredient_ids.tolist(), np.split(slots, starts[1:])):
+            self._postings[ingredient_id] = posting
+        np.add.at(self._required, slots, 1)
+        for recipe_id, ingredient_ids in data.ingredients.items():
+            if recipe_id in self._slots:
+                self._ingredients[recipe_id] = tuple(sorted(ingredient_ids))
+
+    def _grow(self, needed: int) -> None:
+        if needed <= len(self._recipe_ids):
+            return
+        capacity = max(needed, 2 * len(self._recipe_ids), 64)
+        for name in ("_recipe_ids", "_owners", "_public", "_required"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def _apply(self, recipe_ids: set[int], data: _RecipeData) -> None:
+        loaded = {recipe_id: (owner, public) for recipe_id, owner, public in data.recipes}
+        for recipe_id in recipe_ids:
+            slot = self._slots.get(recipe_id)
+            old = set(self._ingredients.pop(recipe_id, ()))
+            if recipe_id not in loaded:
+                new: set[int] = set()
+                if slot is not None:
+                    # Deleted: the slot stays empty until the next full build.
+                    del self._slots[recipe_id]
+            else:
+                new = data.ingredients.get(recipe_id, set())
+                if slot is None:
+                    self._grow(self._size + 1)
+                    slot = self._slots[recipe_id] = self._size
+                    self._recipe_ids[slot] = recipe_id
+                    self._size += 1
+                self._owners[slot], self._public[slot] = loaded[recipe_id]
+                if new:
+                    self._ingredients[recipe_id] = tuple(sorted(new))
+            if slot is None:
+                continue
+            for ingredient_id in old - new:
+                posting = self._postings[ingredient_id]
+                posting = posting[posting != slot]
+                if len(posting):
+                    self._postings[ingredient_id] = posting
+                else:
+                    del self._postings[ingredient_id]
+            for ingredient_id in new - old:
+                posting = self._postings.get(ingredient_id, _EMPTY_SLOTS)
+                self._postings[ingredient_id] = np.append(posting, np.int32(slot))
+            self._required[slot] = len(new)
+
+    def _stale(self) -> bool:
+        return self._built_version != self.version or time.monotonic() - self._built_at >= self._max_age
+
+    def _start_build(self) -> None:
+        """Start the background build unless one is running (caller holds the lock)."""
+        if self._building:
+            return
+        self._building = True
+        # The build reads these recipes anyway; changes from now on queue anew.
+        covered, self._pending = self._pending, set()
+        threading.Thread(
+            target=self._build, args=(self.version, covered), name="recipe-ingredient-index", daemon=True
+        ).start()
+
+    def _build(self, version: int, covered: set[int]) -> None:
+        data = None
+        try:
+            with SessionLocal() as db:
+                data = _load(db)
+        except Exception:
+            logger.exception("recipe ingredient index build failed")
+        with self._lock:
+            if data is not None:
+                self._install(data)
+                self._built_version = version
+                self._built_at = time.monotonic()
+                self.rebuilds += 1
+            else:
+                self._pending.update(covered)
+            self._building = False
+            self._build_done.notify_all()
+
+    def ensure_built(self, timeout: float | None = None) -> bool:
+        """Start a build if the index is stale; wait only while there is no snapshot at all."""
+        with self._lock:
+            if self._stale():
+                self._start_build()
+            if self._built_version is None:
+                self._build_done.wait_for(lambda: not self._building, timeout)
+            return self._built_version is not None
+
+    def _sync(self, db: Session) -> None:
+        """Serve the current snapshot; apply queued recipe changes without holding the lock during queries."""
+        if not self.ensure_built():
+            raise RuntimeError("recipe ingredient index could not be built")
+        with self._lock:
+            version = self.version
+            if self._built_version != version:
+                # A catalogue change is being rebuilt; the queue waits for it.
+                return
+            pending, self._pending = self._pending, set()
+            optional = self._optional
+        if not pending:
+            return
+        data = _load(db, optional, pending)
+        with self._lock:
+            if self._built_version == version == self.version:
+                self._apply(pending, data)
+                self.updates += len(pending)
+            else:
+                self._pending.update(pending)
+
+    # -- public API --
+
+    def rank(self, db: Session, pantry: Iterable[int], user, limit: int = 20) -> list[PantryMatch]:
+        """Visible recipes ordered by the share of their essential ingredients in `pantry`."""
+        self._sync(db)
+        pantry = set(pantry)
+        with self._lock:
+            self.queries += 1
+            postings = [self._postings[ingredient_id] for ingredient_id in pantry if ingredient_id in self._postings]
+            if not postings:
+                return []
+            covered = np.zeros(self._size, dtype=np.int32)
+            for posting in postings:
+                covered[posting] += 1
+            candidates = np.flatnonzero(covered)
+            if not is_admin(user):
+                candidates = candidates[self._public[candidates] | (self._owners[candidates] == user.id)]
+            if not len(candidates):
+                return []
+            hits = covered[candidates]
+            required = self._required[candidates]
+            ratio = hits / required
+            if len(candidates) > limit:
+                # Only slots at or above the limit-th best ratio can make the cut.
+                threshold = np.partition(ratio, len(ratio) - limit)[len(ratio) - limit]
+                keep = ratio >= threshold
+                candidates, hits, required, ratio = candidates[keep], hits[keep], required[keep], ratio[keep]
+            recipe_ids = self._recipe_ids[candidates]
+            # Best coverage first, then fewest missing, most covered, newest recipe.
+            order = np.lexsort((-recipe_ids, -hits, required - hits, -ratio))[:limit]
+            return [
+                PantryMatch(
+                    recipe_id=recipe_id,
+                    covered=int(hits[position]),
+                    required=int(required[position]),
+                    missing_ingredient_ids=tuple(
+                        ingredient_id for ingredient_id in self._ingredients[recipe_id] if ingredient_id not in pantry
+                    ),
+                )
+                for position, recipe_id in zip(order.tolist(), recipe_ids[order].tolist())
+            ]
+
+    def recipes_changed(self, recipe_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._pending.update(recipe_ids)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self.version,
+                "recipes": len(self._slots),
+                "ingredients": len(self._postings),
+                "pending": len(self._pending),
+                "building": self._building,
+                "queries": self.queries,
+                "rebuilds": self.rebuilds,
+                "updates": self.updates,
+                "invalidations": self.invalidations,
+            }
+
+
+recipe_ingredient_index = RecipeIngredientIndex()
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Recipe):
+            session.info.setdefault(_SESSION_RECIPES, set()).add(obj.id)
+        elif isinstance(obj, RecipeIngredient):
+            session.info.setdefault(_SESSION_RECIPES, set()).add(obj.recipe_id)
+        elif isinstance(obj, _CATALOGUE_MODELS):
+            session.info[_SESSION_CATALOGUE] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    recipe_ids = session.info.pop(_SESSION_RECIPES, None)
+    if session.info.pop(_SESSION_CATALOGUE, False):
+        recipe_ingredient_index.invalidate()
+    elif recipe_ids:
+        recipe_ingredient_index.recipes_changed(recipe_ids)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_rolled_back_changes(session: Session) -> None:
+    session.info.pop(_SESSION_RECIPES, None)
+    session.info.pop(_SESSION_CATALOGUE, None)
@@ -0,0 +1,137 @@
+"""Ranked recipe search backed by a real index instead of triple ILIKE scans.
+
+PostgreSQL (production) uses the GIN indexes from migration 9c3d4e5f6a72: a
+``tsvector`` expression index for word matches/ranking and ``pg_trgm`` indexes
+that keep the historic substring semantics of ``?search=`` index-backed.
+
+SQLite (dev, tests) uses an external-content FTS5 table with the ``trigram``
+tokenizer, kept in sync by triggers. Trigram MATCH is a case-insensitive
+substring match, so "ryż" still finds "Ryż z kurczakiem" exactly like ILIKE
+did. Terms shorter than three characters cannot be expressed as trigrams and
+fall back to the plain ILIKE filter.
+"""
+
+from sqlalchemy import Float, Integer, func, inspect, literal_column, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query
+
+from app.db.models.recipe import Recipe
+from app.db.search_index import SEARCH_INDEX_TABLE
+
+MIN_INDEXED_TERM_LENGTH = 3
+# bm25() weights per FTS column - a hit in the name outranks one in the text.
+_FTS_WEIGHTS = (10.0, 2.0, 1.0)
+
+# Must stay the same expression as the one indexed by migration 9c3d4e5f6a72,
+# otherwise PostgreSQL silently stops using the GIN index.
+PG_DOCUMENT_SQL = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(recipes.name, '') || ' ' || "
+    "coalesce(recipes.description, '') || ' ' || "
+    "coalesce(recipes.ingredients, ''))"
+)
+
+_SQLITE_SEARCH_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_INDEX_TABLE} USING fts5("
+    "name, description, ingredients, "
+    "content='recipes', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_INDEX_TABLE}_ai AFTER INSERT ON recipes BEGIN "
+    f"INSERT INTO {SEARCH_INDEX_TABLE}(rowid, name, description, ingredients) "
+    "VALUES (new.id, new.name, new.description, new.ingredients); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_INDEX_TABLE}_ad AFTER DELETE ON recipes BEGIN "
+    f"INSERT INTO {SEARCH_INDEX_TABLE}({SEARCH_INDEX_TABLE}, rowid, name, description, ingredients) "
+    "VALUES ('delete', old.id, old.name, old.description, old.ingredients); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_INDEX_TABLE}_au AFTER UPDATE ON recipes BEGIN "
+    f"INSERT INTO {SEARCH_INDEX_TABLE}({SEARCH_INDEX_TABLE}, rowid, name, description, ingredients) "
+    "VALUES ('delete', old.id, old.name, old.description, old.ingredients); "
+    f"INSERT INTO {SEARCH_INDEX_TABLE}(rowid, name, description, ingredients) "
+    "VALUES (new.id, new.name, new.description, new.ingredients); END",
+)
+
+# Keyed by engine URL: whether the SQLite FTS table exists. A dev database
+# created before the index was introduced keeps working through ILIKE.
+_fts_available: dict[str, bool] = {}
+
+
+def ensure_sqlite_search_index(engine: Engine) -> None:
+    """Create the dev FTS5 index next to ``create_all()`` (no-op elsewhere).
+
+    Idempotent: existing objects are kept, and the index is rebuilt from
+    ``recipes`` only when the virtual table is created by this call.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        if not inspector.has_table("recipes"):
+            return
+        existed = inspector.has_table(SEARCH_INDEX_TABLE)
+        for statement in _SQLITE_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+        if not existed:
+            connection.exec_driver_sql(
+                f"INSERT INTO {SEARCH_INDEX_TABLE}({SEARCH_INDEX_TABLE}) VALUES ('rebuild')"
+            )
+    _fts_available[str(engine.url)] = True
+
+
+def _sqlite_fts_available(query: Query) -> bool:
+    engine = query.session.get_bind().engine
+    key = str(engine.url)
+    if key not in _fts_available:
+        _fts_available[key] = inspect(engine).has_table(SEARCH_INDEX_TABLE)
+    return _fts_available[key]
+
+
+def _ilike_filter(term: str):
+    pattern = f"%{term}%"
+    return or_(
+        Recipe.name.ilike(pattern),
+        Recipe.description.ilike(pattern),
+        Recipe.ingredients.ilike(pattern),
+    )
+
+
+def _fts_phrase(term: str) -> str:
+    """Quote the term as one FTS5 phrase so user input is never FTS syntax."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def apply_search(query: Query, search: str | None, *, ranked: bool = True) -> Query:
+    """Filter ``query`` (over ``Recipe``) by ``search`` and order by relevance.
+
+    Only the relevance ordering is added here; callers append their own
+    deterministic tie-breakers (``created_at DESC, id DESC``). ``ranked=False``
+    filters only, for callers that need a purely chronological order.
+    """
+    term = (search or "").strip()
+    if not term:
+        return query
+
+    dialect = query.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        document = literal_column(PG_DOCUMENT_SQL)
+        ts_query = func.plainto_tsquery(literal_column("'simple'::regconfig"), term)
+        query = query.filter(or_(document.op("@@")(ts_query), _ilike_filter(term)))
+        return query.order_by(func.ts_rank(document, ts_query).desc()) if ranked else query
+
+    if (
+        dialect == "sqlite"
+        and len(term) >= MIN_INDEXED_TERM_LENGTH
+        and _sqlite_fts_available(query)
+    ):
+        weights = ", ".join(str(weight) for weight in _FTS_WEIGHTS)
+        hits = (
+            text(
+                f"SELECT rowid AS recipe_id, bm25({SEARCH_INDEX_TABLE}, {weights}) AS rank "
+                f"FROM {SEARCH_INDEX_TABLE} WHERE {SEARCH_INDEX_TABLE} MATCH :phrase"
+            )
+            .bindparams(phrase=_fts_phrase(term))
+            .columns(recipe_id=Integer, rank=Float)
+            .subquery("search_hits")
+        )
+        query = query.join(hits, hits.c.recipe_id == Recipe.id)
+        # bm25() is "lower is better".
+        return query.order_by(hits.c.rank.asc()) if ranked else query
+
+    return query.filter(_ilike_filter(term))
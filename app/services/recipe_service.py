@@ -1,20 +1,37 @@
+import base64
+import binascii
+import json
 import logging
 from datetime import datetime, timedelta
 
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
+import numpy as np
+from sqlalchemy import and_, func, or_, select, tuple_, union_all
+from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException, status
 
+from app.db.models.ingredient import Ingredient
 from app.db.models.recipe import Recipe
 from app.db.models.recipe_ingredient import RecipeIngredient
 from app.db.models.user import User
 from app.schemas.recipe import RecipeCreate, RecipeVisibilityUpdate
-from app.schemas.recipe import RecipeRead
-from app.services.ingredient_parsing.parser import NEEDS_REVIEW_THRESHOLD
+from app.schemas.recipe import (
+    PantryMatchRead,
+    PantryMatchRequest,
+    RecipeRead,
+    ScaledIngredientRead,
+    ScaledIngredientsRead,
+)
+from app.services.ingredient_index import find_ingredient_id, ingredient_name_index
+from app.services.ingredient_parsing.parser import NEEDS_REVIEW_THRESHOLD, parse_ingredient_lines
+from app.services.ingredient_parsing.units import scale_quantities
 from app.services.permissions_service import require_owner_or_admin
-from app.utils.file_utils import delete_image
+from app.services.recipe_import import image_jobs
+from app.services.recipe_ingredient_index import recipe_ingredient_index
+from app.services.recipe_search import apply_search
+from app.utils import image_store
 
 DUPLICATE_IMPORT_WINDOW_SECONDS = 120
+RECIPES_PAGE_SIZE = 24
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +40,17 @@ def to_recipe_read(db: Session, recipe: Recipe, language: str, **extra) -> Recip
     return RecipeRead(**{**recipe.__dict__, **extra})
 
 
+def to_recipe_list_item(db: Session, recipe: Recipe, user) -> RecipeRead:
+    """One entry of the visible recipe list as seen by ``user``."""
+    return to_recipe_read(
+        db,
+        recipe,
+        "pl",
+        is_owner=(recipe.user_id == user.id),
+        author_username=recipe.author.username if recipe.author else None,
+    )
+
+
 # =========================
 # CREATE
 # =========================
@@ -35,6 +63,7 @@ def create_recipe(db: Session, data: RecipeCreate, user_id: int) -> Recipe:
         ingredients=data.ingredients,
         instructions=data.instructions,
         is_public=data.is_public,
+        servings=data.servings,
         user_id=user_id
     )
 
@@ -76,8 +105,18 @@ def lock_user_for_import(db: Session, user_id: int) -> None:
     db.query(User.id).filter(User.id == user_id).with_for_update().one()
 
 
-def create_recipe_from_import(db: Session, payload, user_id: int, image_path: str | None = None) -> Recipe:
-    """Persist only the edited confirm payload; preview never writes data."""
+def create_recipe_from_import(
+    db: Session,
+    payload,
+    user_id: int,
+    image_path: str | None = None,
+    image_url: str | None = None,
+) -> Recipe:
+    """Persist only the edited confirm payload; preview never writes data.
+
+    `image_url` queues a background image download in the same transaction,
+    so the recipe and its pending job are committed together.
+    """
     ingredients_text = "\n".join(item.original_text for item in payload.ingredients)
     recipe = Recipe(
         name=payload.name,
@@ -112,6 +151,9 @@ def create_recipe_from_import(db: Session, payload, user_id: int, image_path: st
                 )
             )
 
+    if image_url:
+        image_jobs.enqueue(db, recipe.id, image_url)
+
     try:
         db.commit()
     except Exception:
@@ -140,17 +182,57 @@ def get_user_recipes(db: Session, user_id: int):
     )
 
 
+def encode_recipe_cursor(recipe: Recipe) -> str:
+    """Opaque keyset position after ``recipe`` in ``created_at DESC, id DESC``."""
+    raw = json.dumps({"c": recipe.created_at.isoformat(), "i": recipe.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def decode_recipe_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of encode_recipe_cursor; ValueError for anything malformed.
+
+    The cursor is not signed on purpose: it only moves the starting point
+    inside the caller's own visible set, the visibility filter still applies.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw.decode("utf-8"))
+        created_at = datetime.fromisoformat(data["c"])
+        recipe_id = data["i"]
+    except (binascii.Error, UnicodeError, TypeError, KeyError, ValueError) as exc:
+        raise ValueError("Invalid recipe cursor") from exc
+    if not isinstance(recipe_id, int) or isinstance(recipe_id, bool):
+        raise ValueError("Invalid recipe cursor")
+    return created_at, recipe_id
+
+
 def get_visible_recipes(
     db: Session,
     user,
     *,
     page: int = 1,
-    page_size: int = 24,
+    page_size: int = RECIPES_PAGE_SIZE,
     search: str | None = None,
+    after: tuple[datetime, int] | None = None,
+    keyset: bool = False,
 ):
-    """Return one deterministic page without loading the full recipe table."""
+    """Return one deterministic page without loading the full recipe table.
+
+    Offset mode (default): with ``search`` the page is ordered by relevance
+    first (see ``recipe_search.apply_search``), then by recency.
+
+    Keyset mode (``keyset=True``): strictly ``created_at DESC, id DESC``
+    starting after the ``after`` position (None = first page), so the cost of
+    a page does not grow with scroll depth. ``page`` is ignored and ``search``
+    only filters - relevance cannot be expressed as a stable keyset.
+    """
+    if keyset:
+        return _visible_recipes_keyset(db, user, page_size, search, after)
     query = (
         db.query(Recipe)
+        # author_username is part of every list item; load it with the page
+        # instead of one lazy SELECT per card.
+        .options(joinedload(Recipe.author))
         .filter(
             or_(
                 Recipe.user_id == user.id,
@@ -158,15 +240,7 @@ def get_visible_recipes(
             )
         )
     )
-    if search and search.strip():
-        term = f"%{search.strip()}%"
-        query = query.filter(
-            or_(
-                Recipe.name.ilike(term),
-                Recipe.description.ilike(term),
-                Recipe.ingredients.ilike(term),
-            )
-        )
+    query = apply_search(query, search)
     return (
         query.order_by(Recipe.created_at.desc(), Recipe.id.desc())
         .offset((page - 1) * page_size)
@@ -175,6 +249,148 @@ def get_visible_recipes(
     )
 
 
+def _visible_recipes_keyset(
+    db: Session,
+    user,
+    page_size: int,
+    search: str | None,
+    after: tuple[datetime, int] | None,
+) -> list[Recipe]:
+    """Keyset page of the visible list as a UNION ALL of two ordered branches.
+
+    ``user_id = :me OR is_public`` can only be planned as an unordered
+    BitmapOr followed by a sort of every visible row. Each branch here is its
+    own ``ORDER BY created_at DESC, id DESC LIMIT n+1`` scan of
+    ``ix_recipes_owner_recency`` / ``ix_recipes_public_recency``, so at most
+    2(n+1) rows reach the outer ORDER BY/LIMIT. The owner branch skips the
+    user's public recipes, which the public branch already returns.
+    """
+    branches = []
+    for visible in (
+        and_(Recipe.user_id == user.id, Recipe.is_public == False),
+        Recipe.is_public == True,
+    ):
+        branch = apply_search(
+            db.query(Recipe.id.label("id"), Recipe.created_at.label("created_at")).filter(visible),
+            search,
+            ranked=False,
+        )
+        if after is not None:
+            # Row-value comparison matches the DESC/DESC ordering of the index.
+            branch = branch.filter(tuple_(Recipe.created_at, Recipe.id) < after)
+        branch = branch.order_by(Recipe.created_at.desc(), Recipe.id.desc()).limit(page_size + 1)
+        # Wrapped in a subquery: SQLite rejects ORDER BY/LIMIT directly
+        # inside a compound SELECT.
+        branches.append(select(branch.subquery()))
+    page = union_all(*branches).subquery("visible_page")
+    return (
+        db.query(Recipe)
+        .options(joinedload(Recipe.author))
+        .join(page, page.c.id == Recipe.id)
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
+        .limit(page_size + 1)
+        .all()
+    )
+
+
+def get_recipes_bootstrap(db: Session, user, *, page_size: int = RECIPES_PAGE_SIZE) -> dict:
+    """First keyset page of the visible list, embedded into /recipes-ui.
+
+    The page ships only what the first screen renders; recipes.js continues
+    from ``next_cursor`` through the paginated API. ``ingredients_map`` is
+    limited to the ingredient lines on this page - the full catalogue map is
+    fetched by the client together with the next page.
+    """
+    recipes = get_visible_recipes(db, user, page_size=page_size, keyset=True)
+    has_next = len(recipes) > page_size
+    recipes = recipes[:page_size]
+
+    lines = {
+        line.strip()
+        for recipe in recipes
+        for line in (recipe.ingredients or "").split("\n")
+        if line.strip()
+    }
+    keys = {line.lower() for line in lines}
+    ingredients_map = {}
+    if keys:
+        matches = db.query(Ingredient.name, Ingredient.is_essential).filter(
+            or_(func.lower(Ingredient.name).in_(keys), Ingredient.name.in_(lines))
+        )
+        ingredients_map = {
+            name.lower(): is_essential for name, is_essential in matches if name.lower() in keys
+        }
+
+    return {
+        "recipes": [to_recipe_list_item(db, recipe, user).model_dump(mode="json") for recipe in recipes],
+        "page_size": page_size,
+        "has_next": has_next,
+        "next_cursor": encode_recipe_cursor(recipes[-1]) if has_next else None,
+        "ingredients_map": ingredients_map,
+    }
+
+
+def scaled_ingredients(recipe: Recipe, servings: int) -> ScaledIngredientsRead:
+    """Ingredient lines of the recipe for `servings` portions.
+
+    Uses the structured rows when the recipe has them, otherwise parses its
+    text; nothing is saved. Quantities go through the same batch conversion
+    as the meal plan shopping list, so 600 g doubled reads 1.2 kg.
+    """
+    if not recipe.servings:
+        raise HTTPException(status_code=422, detail="Recipe servings are not set")
+    rows = sorted(recipe.structured_ingredients, key=lambda row: (row.sort_order, row.id))
+    if rows:
+        lines = [
+            (row.original_text, row.parsed_name or row.original_text, row.quantity, row.unit, row.note)
+            for row in rows
+        ]
+    else:
+        lines = [
+            (parsed.original_text, parsed.name, parsed.quantity, parsed.unit, parsed.note)
+            for parsed in parse_ingredient_lines(recipe.ingredients or "")
+        ]
+    quantities = np.array([float(quantity) if quantity is not None else np.nan for *_, quantity, _, _ in lines])
+    scaled = scale_quantities([unit for *_, unit, _ in lines], quantities, servings / recipe.servings)
+    return ScaledIngredientsRead(
+        recipe_id=recipe.id,
+        servings=servings,
+        ingredients=[
+            ScaledIngredientRead(original_text=original_text, name=name, quantity=quantity, unit=unit, note=note)
+            for (original_text, name, _, _, note), (quantity, unit) in zip(lines, scaled)
+        ],
+    )
+
+
+def match_pantry(db: Session, data: PantryMatchRequest, user) -> list[PantryMatchRead]:
+    """Visible recipes ranked by how much of their essential ingredients the pantry covers."""
+    pantry = set(data.ingredient_ids)
+    if data.names:
+        names = ingredient_name_index.names(db)
+        pantry.update(
+            ingredient_id
+            for ingredient_id in (find_ingredient_id(names, name) for name in data.names)
+            if ingredient_id is not None
+        )
+    matches = recipe_ingredient_index.rank(db, pantry, user, limit=data.limit)
+    if not matches:
+        return []
+    recipe_names = dict(db.query(Recipe.id, Recipe.name).filter(Recipe.id.in_([m.recipe_id for m in matches])))
+    return [
+        PantryMatchRead(
+            recipe_id=match.recipe_id,
+            name=recipe_names[match.recipe_id],
+            coverage=round(match.coverage, 4),
+            covered=match.covered,
+            required=match.required,
+            missing_ingredient_ids=list(match.missing_ingredient_ids),
+        )
+        for match in matches
+        # Deleted after the index was last updated.
+        if match.recipe_id in recipe_names
+    ]
+
+
 # =========================
 # UPDATE
 # =========================
@@ -188,6 +404,9 @@ def update_recipe(db: Session, recipe: Recipe, data: RecipeCreate, user):
     recipe.ingredients = data.ingredients
     recipe.instructions = data.instructions
     recipe.is_public = data.is_public
+    # The recipe form does not send servings yet; do not clear them.
+    if "servings" in data.model_fields_set:
+        recipe.servings = data.servings
 
     db.commit()
     db.refresh(recipe)
@@ -218,10 +437,11 @@ def delete_recipe(db: Session, recipe: Recipe, user):
 
     # The database row is already gone. Image cleanup is best effort so a
     # filesystem issue does not turn a successful delete into a misleading
-    # 500. Log only the recipe id; never expose the stored path.
+    # 500. Log only the recipe id; never expose the stored path. A file
+    # shared with other recipes (content-addressed store) is kept.
     if image:
         try:
-            delete_image(image)
+            image_store.release(db, image)
         except OSError:
             logger.warning(
                 "Could not remove image after recipe deletion",
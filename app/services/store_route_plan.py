@@ -0,0 +1,105 @@
+"""Compiled, versioned route plans for `POST /stores/{id}/sort-items`.
+
+A route plan is the part of a store layout the sorter needs: ingredient_id ->
+(section sort_order, position inside the section). Shoppers re-sort the same
+list many times per trip, so the plan is compiled once per layout version and
+reused. `Store.layout_version` lives in the database and is bumped by every
+section/placement/name change in `app/api/v1/shop.py`, so a cached plan is
+validated against the row the request loads anyway - also across worker
+processes. The same version is the layout endpoint's ETag.
+"""
+
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy.orm import Session
+
+from app.db.models.ingredient_store_placement import IngredientStorePlacement
+from app.db.models.store import Store
+from app.db.models.store_section import StoreSection
+
+# Placements without an explicit position go last inside their section.
+UNPOSITIONED = 10**9
+
+
+@dataclass(frozen=True)
+class RoutePlan:
+    store_id: int
+    version: int
+    ranks: Mapping[int, tuple[int, int]]
+
+    def rank(self, ingredient_id: int | None) -> tuple[int, int] | None:
+        if ingredient_id is None:
+            return None
+        return self.ranks.get(ingredient_id)
+
+
+def compile_route_plan(db: Session, store: Store) -> RoutePlan:
+    section_order = dict(
+        db.query(StoreSection.id, StoreSection.sort_order).filter(StoreSection.store_id == store.id)
+    )
+    ranks = {}
+    placements = db.query(
+        IngredientStorePlacement.ingredient_id,
+        IngredientStorePlacement.store_section_id,
+        IngredientStorePlacement.position,
+    ).filter(IngredientStorePlacement.store_id == store.id)
+    for ingredient_id, section_id, position in placements:
+        if section_id in section_order:
+            ranks[ingredient_id] = (
+                section_order[section_id],
+                position if position is not None else UNPOSITIONED,
+            )
+    return RoutePlan(store_id=store.id, version=store.layout_version, ranks=MappingProxyType(ranks))
+
+
+class RoutePlanCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._plans: dict[int, RoutePlan] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, db: Session, store: Store) -> RoutePlan:
+        plan = self._plans.get(store.id)
+        if plan is not None and plan.version == store.layout_version:
+            self.hits += 1
+            return plan
+        self.misses += 1
+        plan = compile_route_plan(db, store)
+        with self._lock:
+            current = self._plans.get(store.id)
+            # Never replace a newer plan with one compiled from an older row.
+            if current is None or current.version <= plan.version:
+                self._plans[store.id] = plan
+        return plan
+
+    def invalidate(self, store_id: int) -> None:
+        with self._lock:
+            if self._plans.pop(store_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        return {
+            "stores": len(self._plans),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+route_plan_cache = RoutePlanCache()
+
+
+def bump_layout_version(db: Session, store_id: int) -> None:
+    """Mark the store layout as changed; call before the write's commit."""
+    db.query(Store).filter(Store.id == store_id).update(
+        {Store.layout_version: Store.layout_version + 1}, synchronize_session=False
+    )
+
+
+def layout_etag(store: Store) -> str:
+    return f'"store-{store.id}-v{store.layout_version}"'
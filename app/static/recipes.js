@@ -217,6 +217,7 @@ const Recipes = {
         cache: [],
         ingredientsMap: {},
         page: 0,
+        cursor: "",
         pageSize: 24,
         hasNext: true,
         loading: false,
@@ -232,6 +233,7 @@ const Recipes = {
             this.state.controller = new AbortController();
             this.state.requestId += 1;
             this.state.page = 0;
+            this.state.cursor = "";
             this.state.hasNext = true;
             this.state.query = query.trim();
             this.state.cache = [];
@@ -247,12 +249,20 @@ const Recipes = {
         try {
             if (!this.state.ingredientsLoaded) {
                 const mapRes = await Api.get("/ingredients/map", { signal: this.state.controller.signal });
-                this.state.ingredientsMap = await mapRes.json();
+                this.state.ingredientsMap = { ...this.state.ingredientsMap, ...(await mapRes.json()) };
                 this.state.ingredientsLoaded = true;
             }
 
-            const params = new URLSearchParams({ page: String(page), page_size: String(this.state.pageSize) });
-            if (this.state.query) params.set("search", this.state.query);
+            const params = new URLSearchParams({ page_size: String(this.state.pageSize) });
+            // Wyszukiwanie zostaje na stronach offsetowych (kolejność wg
+            // trafności); zwykłe przewijanie idzie kursorem, więc głębokie
+            // strony nie zwalniają wraz z offsetem.
+            if (this.state.query) {
+                params.set("page", String(page));
+                params.set("search", this.state.query);
+            } else {
+                params.set("cursor", this.state.cursor);
+            }
             const res = await Api.get(`/api/v1/recipes/?${params.toString()}`, { signal: this.state.controller.signal });
             const data = await res.json();
 
@@ -261,6 +271,7 @@ const Recipes = {
             const fresh = data.filter(recipe => !known.has(recipe.id));
             this.state.cache.push(...fresh);
             this.state.page = page;
+            this.state.cursor = res.headers.get("X-Recipes-Next-Cursor") || "";
             this.state.hasNext = res.headers.get("X-Recipes-Has-Next") === "true";
             this.render(fresh, { append: page > 1 });
             this.renderStatus(this.state.cache.length === 0 ? "empty" : this.state.hasNext ? "ready" : "end");
@@ -278,6 +289,25 @@ const Recipes = {
         return this.load({ reset: false });
     },
 
+    /**
+     * Startuje listę z pierwszej strony osadzonej w HTML (window.RECIPES_BOOTSTRAP)
+     * zamiast pytać API. Mapa składników z bootstrapu obejmuje tylko tę stronę -
+     * pełna mapa dojeżdża razem z następną stroną (ingredientsLoaded zostaje false).
+     */
+    hydrate(bootstrap) {
+        this.state.controller = new AbortController();
+        this.state.requestId += 1;
+        this.state.query = "";
+        this.state.cache = [...bootstrap.recipes];
+        this.state.ingredientsMap = { ...bootstrap.ingredients_map };
+        this.state.page = 1;
+        this.state.pageSize = bootstrap.page_size;
+        this.state.cursor = bootstrap.next_cursor || "";
+        this.state.hasNext = bootstrap.has_next;
+        this.render(this.state.cache);
+        this.renderStatus(this.state.cache.length === 0 ? "empty" : this.state.hasNext ? "ready" : "end");
+    },
+
     renderRecipeBadge(recipe) {
         if (recipe.is_owner) {
             const visibility = recipe.is_public
@@ -368,6 +398,15 @@ const Recipes = {
             // .src jako właściwość: ścieżka nigdy nie jest parsowana jako HTML,
             // więc nie da się nią wyjść z atrybutu.
             image.src = r.image;
+            // Warianty WebP (320/640/1280 px) - karta ma 190 px, na telefonie
+            // pełną szerokość; przeglądarka dobiera wariant do gęstości ekranu.
+            const variants = Object.entries(r.image_variants || {});
+            if (variants.length) {
+                image.srcset = variants.map(([width, url]) => `${url} ${width}w`).join(", ");
+                image.sizes = "(max-width: 700px) 100vw, 190px";
+            }
+            image.loading = "lazy";
+            image.decoding = "async";
             imageWrap.appendChild(image);
             body.appendChild(imageWrap);
         }
@@ -952,7 +991,8 @@ const ShopCatalog = StoreLayouts;
 const App = {
     init() {
         UI.theme.load();
-        Recipes.load({ reset: true });
+        if (window.RECIPES_BOOTSTRAP) Recipes.hydrate(window.RECIPES_BOOTSTRAP);
+        else Recipes.load({ reset: true });
         const sentinel = document.getElementById("recipes-sentinel");
         if (sentinel && "IntersectionObserver" in window) {
             new IntersectionObserver(entries => {
@@ -1665,6 +1705,8 @@ const IMPORT_ERROR_CODE_KEYS = {
     too_large: "import.error.too_large",
     unsupported_content_type: "import.error.unsupported_content_type",
     no_recipe_found: "import.error.no_recipe_found",
+    parse_timeout: "import.error.parse_timeout",
+    parse_busy: "import.error.parse_busy",
     upstream_error: "import.error.upstream_error",
     invalid_preview_token: "import.error.invalid_preview_token",
     preview_token_owner_mismatch: "import.error.preview_token_owner_mismatch",
@@ -1829,6 +1871,7 @@ const IMPORT_WARNING_KEYS = {
     no_image_found: "import.warning.no_image",
     some_ingredients_need_review: "import.warning.needs_review",
     image_download_failed: "import.warning.image_download_failed",
+    image_download_queued: "import.warning.image_download_queued",
     duplicate_import_returned_existing: "import.warning.duplicate"
 };
 
@@ -1961,6 +2004,32 @@ function validateImportIngredients() {
     return true;
 }
 
+const IMAGE_JOB_POLL_MS = 2000;
+const IMAGE_JOB_MAX_POLLS = 30;
+
+// Zdjęcie importu pobiera zadanie w tle; lista odświeża się, gdy się skończy.
+// Po ~minucie przestajemy pytać - kolejne ponowienia zadanie robi samo.
+async function watchImageDownloadJob(jobId) {
+    for (let poll = 0; poll < IMAGE_JOB_MAX_POLLS; poll++) {
+        await new Promise(resolve => setTimeout(resolve, IMAGE_JOB_POLL_MS));
+        let job;
+        try {
+            const res = await Api.get(`/api/v1/recipe-import/image-jobs/${jobId}`);
+            job = await res.json();
+        } catch {
+            return;
+        }
+        if (job.status === "done") {
+            await Recipes.load({ reset: true });
+            return;
+        }
+        if (job.status === "failed") {
+            UI.toast(t("import.warning.image_download_failed"), "warn");
+            return;
+        }
+    }
+}
+
 async function confirmImportSave() {
     if (ImportState.submitting) return;
 
@@ -1997,6 +2066,9 @@ async function confirmImportSave() {
 
         if (data.warnings && data.warnings.includes("image_download_failed")) {
             UI.toast(t("import.warning.image_download_failed"), "warn");
+        } else if (data.warnings && data.warnings.includes("image_download_queued") && data.image_job) {
+            UI.toast(t("import.warning.image_download_queued"), "success");
+            watchImageDownloadJob(data.image_job.id);
         } else {
             UI.toast(t("import.success"), "success");
         }
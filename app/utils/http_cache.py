@@ -0,0 +1,11 @@
+"""Conditional-request helpers shared by API endpoints and `/static`."""
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison as required for If-None-Match (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in {
+        candidate.removeprefix("W/") for candidate in candidates
+    }
@@ -0,0 +1,108 @@
+"""Obróbka zdjęć przepisów po zapisaniu na dysk (upload i import z URL).
+
+Oryginał jest przekodowywany w miejscu: orientacja z EXIF zostaje nałożona
+na piksele, metadane (EXIF z GPS, XMP, komentarze) znikają, a dłuższy bok
+jest przycinany do `MAX_DIMENSION`. Obok powstają warianty WebP o stałych
+szerokościach z `VARIANT_WIDTHS` (tylko węższe od oryginału):
+
+    /static/uploads/<nazwa>.jpg
+    /static/uploads/<nazwa>.w320.webp
+    /static/uploads/<nazwa>.w640.webp
+
+Szerokości, które faktycznie powstały, trafiają do Recipe.image_variant_widths
+("320,640"), a RecipeRead.image_variants składa z nich mapę szerokość -> URL
+do atrybutu `srcset`. Przepis bez wariantów (zapisany przed obróbką)
+wyświetla po prostu oryginał. Pliku, którego Pillow nie umie zdekodować,
+nie zapisujemy wcale. Warianty usuwa razem z oryginałem
+file_utils.delete_image.
+"""
+
+import os
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+MAX_DIMENSION = 2048
+VARIANT_WIDTHS = (320, 640, 1280)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+# Powyżej tego nie dekodujemy wcale - 5 MB skompresowanego PNG potrafi się
+# rozwinąć do gigabajtów w pamięci.
+MAX_PIXELS = 50_000_000
+
+_SAVE_OPTIONS = {
+    "JPEG": {"quality": JPEG_QUALITY, "optimize": True, "progressive": True},
+    "PNG": {"optimize": True},
+    "WEBP": {"quality": WEBP_QUALITY, "method": 4},
+}
+
+
+def variant_url(image_url: str, width: int) -> str:
+    stem, _, _ext = image_url.rpartition(".")
+    return f"{stem}.w{width}.webp"
+
+
+def variant_urls(image_url: str | None, widths: str | None) -> dict[int, str]:
+    """Mapa szerokość -> URL wariantu z wartości Recipe.image_variant_widths."""
+    if not image_url or not widths:
+        return {}
+    return {int(width): variant_url(image_url, int(width)) for width in widths.split(",")}
+
+
+def format_widths(widths: tuple[int, ...]) -> str | None:
+    return ",".join(str(width) for width in widths) or None
+
+
+def _save_atomic(image: Image.Image, path: Path, image_format: str) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    try:
+        image.save(tmp, format=image_format, **_SAVE_OPTIONS[image_format])
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def process_image(path: Path, name: str | None = None) -> tuple[int, ...]:
+    """Przekodowuje oryginał i zapisuje warianty. Zwraca szerokości wariantów.
+
+    Warianty nazywają się `<name>.w<szerokość>.webp` (domyślnie nazwa pliku
+    bez rozszerzenia) - image_store obrabia plik tymczasowy, zanim dostanie
+    docelową nazwę. ValueError, gdy pliku nie da się zdekodować albo jest za
+    duży - wywołujący go wtedy nie publikuje, bo nieprzekodowany oryginał
+    niósłby EXIF z GPS. Rodzaj pliku sprawdziło już wcześniej wykrywanie po
+    magic bytes.
+    """
+    try:
+        with Image.open(path) as source:
+            image_format = source.format
+            if image_format not in _SAVE_OPTIONS:
+                raise ValueError(f"Unsupported image format: {image_format}")
+            if source.width * source.height > MAX_PIXELS:
+                raise ValueError(f"Image too large to process: {source.width}x{source.height}")
+            # Animowane WebP/PNG - zostaje pierwsza klatka.
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as exc:
+        raise ValueError(f"Could not decode image {path.name}") from exc
+
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+        image = image.convert("RGBA")
+    # thumbnail() zmniejsza w miejscu z zachowaniem proporcji i nigdy nie powiększa.
+    image.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS)
+    # Bez image.info zapis nie przeniesie EXIF/XMP/ICC/komentarzy z oryginału.
+    image.info = {}
+    _save_atomic(image, path, image_format)
+
+    widths = []
+    for width in VARIANT_WIDTHS:
+        if width >= image.width:
+            break
+        height = max(1, round(image.height * width / image.width))
+        variant = image.resize((width, height), Image.Resampling.LANCZOS)
+        _save_atomic(variant, path.with_name(f"{name or path.stem}.w{width}.webp"), "WEBP")
+        widths.append(width)
+    return tuple(widths)
+
+
@@ -0,0 +1,242 @@
+"""Content-addressed magazyn zdjęć przepisów.
+
+Każdy upload i import dostawał własną nazwę uuid4(), więc to samo zdjęcie
+zaimportowane przez dziesięć osób leżało na dysku dziesięć razy, a
+delete_image nie wiedział, czy plik jest współdzielony. Teraz nazwą pliku
+jest SHA-256 przesłanych bajtów, w katalogach dzielonych po dwóch pierwszych
+bajtach skrótu:
+
+    /static/uploads/3f/a2/3fa2...e9.jpg
+    /static/uploads/3f/a2/3fa2...e9.w320.webp    (warianty z image_pipeline)
+
+Te same bajty dają ten sam plik: drugi zapis tylko odświeża mtime i zwraca
+istniejące warianty, bez ponownej obróbki. Skrót liczony jest z bajtów
+wejściowych, nie z przekodowanego wyniku, bo to wejście się powtarza.
+
+Licznikiem referencji są same wiersze `recipes.image` - nie ma osobnej
+tabeli, która mogłaby się rozjechać z przepisami. `release()` po commicie
+usuwa plik, gdy nie wskazuje go już żaden przepis. Plik użyty w ciągu
+ostatnich `REUSE_GRACE_SECONDS` zostaje: mógł go przed chwilą dostać nowy
+przepis, który nie jest jeszcze zacommitowany. Takie pliki, a także stare
+pliki uuid4 bez przepisu i resztki przerwanych zapisów, zbiera
+`collect_garbage()` (scripts/gc_recipe_images.py).
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+from app.db.models.recipe import Recipe
+from app.services.recipe_import.fetcher import ALLOWED_IMAGE_CONTENT_TYPES, _sniff_image_type
+from app.utils import file_utils
+from app.utils.image_pipeline import process_image
+
+REUSE_GRACE_SECONDS = 10 * 60
+MAX_UPLOAD_BYTES = 15 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 64 * 1024
+# Najdłuższa sygnatura w _sniff_image_type (RIFF....WEBP).
+_SNIFF_BYTES = 12
+_EXTENSIONS = {"jpg": "jpg", "jpeg": "jpg", "png": "png", "webp": "webp"}
+_VARIANT_NAME = re.compile(r"^(?P<stem>.+)\.w(?P<width>\d+)\.webp$")
+
+
+class ImageTooLargeError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class StoredImage:
+    url: str
+    variant_widths: tuple[int, ...]
+    # False = te same bajty były już w magazynie.
+    created: bool
+
+
+@dataclass
+class GarbageReport:
+    scanned: int = 0
+    deleted: list[str] = field(default_factory=list)
+    bytes_freed: int = 0
+
+
+def _path_for(url: str) -> Path:
+    return file_utils.STATIC_ROOT / url.replace("/static/", "", 1)
+
+
+def _variant_widths(path: Path) -> tuple[int, ...]:
+    widths = []
+    for variant in path.parent.glob(f"{path.stem}.w*.webp"):
+        match = _VARIANT_NAME.match(variant.name)
+        if match and match["stem"] == path.stem:
+            widths.append(int(match["width"]))
+    return tuple(sorted(widths))
+
+
+def stored_variant_widths(url: str) -> tuple[int, ...]:
+    """Szerokości wariantów, które leżą obok zapisanego obrazu."""
+    return _variant_widths(_path_for(url))
+
+
+def _publish(tmp: Path, digest: str, ext: str) -> StoredImage:
+    """Przenosi zapisany plik tymczasowy pod nazwę ze skrótu albo go
+    porzuca, jeśli te bajty już są w magazynie. Wywołujący sprząta `tmp`."""
+    relative = f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+    url = f"/static/uploads/{relative}"
+    path = file_utils.UPLOAD_DIR / relative
+    if path.is_file():
+        # Świeże mtime chroni plik przed release()/GC, zanim przepis się zapisze.
+        os.utime(path)
+        return StoredImage(url, _variant_widths(path), created=False)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staged = path.with_name(f".{digest}.{uuid.uuid4().hex}.tmp")
+    os.replace(tmp, staged)
+    try:
+        # Obróbka na pliku tymczasowym obok docelowego: pod docelową nazwą
+        # nigdy nie widać nieprzekodowanego oryginału. Równoległy zapis tych
+        # samych bajtów podmieni plik na identyczny. ValueError z obróbki
+        # wychodzi dalej, a plik tymczasowy sprząta finally.
+        widths = process_image(staged, name=digest)
+        os.replace(staged, path)
+    finally:
+        staged.unlink(missing_ok=True)
+    return StoredImage(url, widths, created=True)
+
+
+def _temp_file() -> tuple[int, Path]:
+    fd, name = tempfile.mkstemp(dir=file_utils.UPLOAD_DIR, prefix=".incoming.", suffix=".tmp")
+    return fd, Path(name)
+
+
+def store(data: bytes, extension: str) -> StoredImage:
+    """Zapisuje (albo odnajduje) obraz o tych bajtach. ValueError dla złego
+    typu albo obrazu, którego nie da się przetworzyć."""
+    ext = _EXTENSIONS.get(extension.lower())
+    if ext is None:
+        raise ValueError("Invalid image type")
+
+    fd, tmp = _temp_file()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return _publish(tmp, hashlib.sha256(data).hexdigest(), ext)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def save_upload(file, max_bytes: int | None = None) -> StoredImage:
+    """store() dla UploadFile, strumieniowo: plik idzie na dysk kawałkami po
+    UPLOAD_CHUNK_BYTES, a skrót liczy się po drodze, więc pamięć nie rośnie
+    z rozmiarem pliku. Typ rozpoznaje treść (te same magic bytes co przy
+    imporcie), nie nazwa pliku. ImageTooLargeError powyżej `max_bytes`,
+    ValueError dla treści, która nie jest JPEG/PNG/WebP albo nie daje się
+    zdekodować.
+    """
+    max_bytes = max_bytes or MAX_UPLOAD_BYTES
+    fd, tmp = _temp_file()
+    digest = hashlib.sha256()
+    head = b""
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := file.file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageTooLargeError(f"Image exceeds {max_bytes} bytes")
+                if len(head) < _SNIFF_BYTES:
+                    head += chunk[: _SNIFF_BYTES - len(head)]
+                    # Nie-obraz odrzucamy po pierwszym kawałku, nie po całym pliku.
+                    if len(head) == _SNIFF_BYTES and _sniff_image_type(head) is None:
+                        raise ValueError("Invalid image type")
+                digest.update(chunk)
+                out.write(chunk)
+        content_type = _sniff_image_type(head)
+        if content_type is None:
+            raise ValueError("Invalid image type")
+        return _publish(tmp, digest.hexdigest(), ALLOWED_IMAGE_CONTENT_TYPES[content_type])
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def is_referenced(db: Session, url: str) -> bool:
+    """Czy jakiś przepis wskazuje `url` (EXISTS po indeksie ix_recipes_image)."""
+    return db.query(exists().where(Recipe.image == url)).scalar()
+
+
+def release(db: Session, url: str | None) -> bool:
+    """Wołane po commicie, gdy przepis przestał wskazywać `url`.
+
+    Usuwa plik z wariantami, jeśli nie wskazuje go żaden inny przepis i nie
+    był używany przez ostatnie REUSE_GRACE_SECONDS. Zwraca True, gdy usunął.
+    """
+    if not url:
+        return False
+    if is_referenced(db, url):
+        return False
+    try:
+        if time.time() - _path_for(url).stat().st_mtime < REUSE_GRACE_SECONDS:
+            return False
+    except FileNotFoundError:
+        pass
+    file_utils.delete_image(url)
+    return True
+
+
+def collect_garbage(db: Session, apply: bool = False, min_age_seconds: float = REUSE_GRACE_SECONDS) -> GarbageReport:
+    """Usuwa pliki w uploads/, których nie wskazuje żaden przepis.
+
+    Dotyczy obrazów starszych niż `min_age_seconds` (content-addressed i stare
+    uuid4), wariantów bez oryginału i resztek przerwanych zapisów (*.tmp).
+    Bez `apply` tylko raportuje.
+    """
+    referenced = {url for (url,) in db.query(Recipe.image).filter(Recipe.image != "")}
+    upload_dir = file_utils.UPLOAD_DIR
+    cutoff = time.time() - min_age_seconds
+    report = GarbageReport()
+
+    def url_of(path: Path) -> str:
+        return "/static/uploads/" + path.relative_to(upload_dir).as_posix()
+
+    originals, variants, leftovers = [], [], []
+    for path in sorted(upload_dir.rglob("*")):
+        if not path.is_file() or path.name == ".gitkeep":
+            continue
+        report.scanned += 1
+        if path.name.endswith(".tmp"):
+            leftovers.append(path)
+        elif _VARIANT_NAME.match(path.name):
+            variants.append(path)
+        else:
+            originals.append(path)
+
+    dead = [path for path in originals if url_of(path) not in referenced and path.stat().st_mtime <= cutoff]
+    dead_stems = {(path.parent, path.stem) for path in dead}
+    live_stems = {(path.parent, path.stem) for path in originals} - dead_stems
+    for path in variants:
+        key = (path.parent, _VARIANT_NAME.match(path.name)["stem"])
+        if key in dead_stems:
+            dead.append(path)
+        # Wariant bez oryginału: zapis mógł jeszcze nie podmienić pliku tymczasowego.
+        elif key not in live_stems and path.stat().st_mtime <= cutoff:
+            dead.append(path)
+    dead.extend(path for path in leftovers if path.stat().st_mtime <= cutoff)
+
+    for path in dead:
+        report.deleted.append(url_of(path))
+        report.bytes_freed += path.stat().st_size
+        if apply:
+            path.unlink(missing_ok=True)
+
+    if apply:
+        for directory in sorted((p for p in upload_dir.rglob("*") if p.is_dir()), reverse=True):
+            if not any(directory.iterdir()):
+                directory.rmdir()
+    return report
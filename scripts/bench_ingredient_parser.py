@@ -0,0 +1,89 @@
+"""Mikro-benchmark parsera linii składników (linie/s).
+
+Mierzy trzy ścieżki na typowej liście zakupów (kilkaset linii z kilkudziesięciu
+powtarzających się produktów):
+
+    uncached  - samo parsowanie, bez cache (koszt pierwszego zobaczenia linii)
+    single    - parse_ingredient_line() linia po linii, cache rozgrzany
+    batch     - parse_ingredient_lines_batch() na całej liście, cache rozgrzany
+
+Porównanie "przed/po" z dowolną wcześniejszą wersją parsera:
+    git show <rev>:app/services/ingredient_parsing/parser.py > /tmp/parser_before.py
+    python scripts/bench_ingredient_parser.py --baseline /tmp/parser_before.py
+
+Użycie (z katalogu repozytorium):
+    python scripts/bench_ingredient_parser.py [--lines 300] [--repeat 20]
+"""
+import argparse
+import importlib.util
+import random
+import sys
+import time
+from pathlib import Path
+
+# Pozwala uruchomić skrypt bez ustawiania PYTHONPATH.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.ingredient_parsing import parser  # noqa: E402
+
+STAPLES = (
+    "2 jajka", "1 l mleka", "500 g mąki", "200 ml śmietany", "3 duże pomidory",
+    "1 ogórek", "2 ząbki czosnku", "1 pęczek koperku", "sól do smaku",
+    "pieprz do smaku", "1 łyżka oliwy", "2 łyżeczki cukru", "1/2 szklanki wody",
+    "1 1/2 szklanki mleka", "½ kostki masła", "1,5 kg ziemniaków", "chleb",
+    "bułki", "3 cebule", "1 opakowanie makaronu", "250 g twarogu", "masło",
+    "2 cups flour", "1 tbsp olive oil", "3 cloves of garlic", "1 can tomatoes",
+    "fresh basil", "salt to taste", "4 plastry szynki", "1 szczypta gałki",
+)
+
+
+def shopping_list(size: int) -> list[str]:
+    rng = random.Random(6)
+    return [rng.choice(STAPLES) for _ in range(size)]
+
+
+def lines_per_second(run, lines: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run(lines)
+    return len(lines) * repeat / (time.perf_counter() - start)
+
+
+def load_baseline(path: str):
+    spec = importlib.util.spec_from_file_location("parser_baseline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--lines", type=int, default=300)
+    args.add_argument("--repeat", type=int, default=20)
+    args.add_argument("--baseline", help="plik parser.py z wersji, z którą porównujemy")
+    options = args.parse_args()
+
+    lines = shopping_list(options.lines)
+    uncached = parser._parse_stripped.__wrapped__
+    results = {}
+    if options.baseline:
+        baseline = load_baseline(options.baseline)
+        results["baseline"] = lines_per_second(
+            lambda batch: [baseline.parse_ingredient_line(line) for line in batch], lines, options.repeat
+        )
+    results["uncached"] = lines_per_second(
+        lambda batch: [uncached(line.strip()) for line in batch], lines, options.repeat
+    )
+    parser.parse_ingredient_lines_batch(lines)
+    results["single"] = lines_per_second(
+        lambda batch: [parser.parse_ingredient_line(line) for line in batch], lines, options.repeat
+    )
+    results["batch"] = lines_per_second(parser.parse_ingredient_lines_batch, lines, options.repeat)
+
+    reference = results.get("baseline", results["uncached"])
+    for name, rate in results.items():
+        print(f"{name:>9}: {rate:>12,.0f} lines/s  ({rate / reference:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
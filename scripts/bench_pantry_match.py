@@ -0,0 +1,88 @@
+"""Mikro-benchmark indeksu składnik -> przepisy (POST /recipes/pantry-match).
+
+Buduje indeks z danych syntetycznych (bez bazy): --recipes przepisów po
+8-15 składników z katalogu --ingredients pozycji o rozkładzie Zipfa (mąka, jajka
+i sól są w co drugim przepisie, reszta rzadko). Mierzy:
+
+    build   - pełna budowa indeksu (pierwsze zapytanie po starcie / zmianie katalogu)
+    rank    - ranking spiżarni --pantry składników, p50/p95 w ms
+    update  - przyrostowa aktualizacja jednego przepisu po zapisie
+
+Użycie (z katalogu repozytorium):
+    python scripts/bench_pantry_match.py [--recipes 100000] [--pantry 15] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Pozwala uruchomić skrypt bez ustawiania PYTHONPATH i bez .env.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("MEAL_PLANNER_LOAD_ENV_FILE", "0")
+
+from app.services import recipe_ingredient_index as module  # noqa: E402
+
+
+def synthetic_data(recipes: int, ingredients: int, rng: random.Random):
+    weights = [1 / rank for rank in range(1, ingredients + 1)]
+    catalogue = list(range(1, ingredients + 1))
+    rows = [(recipe_id, 1 + recipe_id % 50, recipe_id % 3 == 0) for recipe_id in range(1, recipes + 1)]
+    links = {
+        recipe_id: set(rng.choices(catalogue, weights, k=rng.randint(8, 15))) for recipe_id in range(1, recipes + 1)
+    }
+    # Co dziesiąty składnik jest nieobowiązkowy (przyprawy).
+    optional = frozenset(catalogue[9::10])
+    return module._RecipeData(rows, {r: ids - optional for r, ids in links.items()}, optional)
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--recipes", type=int, default=100_000)
+    args.add_argument("--ingredients", type=int, default=2_000)
+    args.add_argument("--pantry", type=int, default=15)
+    args.add_argument("--queries", type=int, default=200)
+    options = args.parse_args()
+    rng = random.Random(7)
+
+    data = synthetic_data(options.recipes, options.ingredients, rng)
+    index = module.RecipeIngredientIndex()
+    started = time.perf_counter()
+    with index._lock:
+        index._install(data)
+        index._built_version = index.version
+        index._built_at = time.monotonic()
+    build = time.perf_counter() - started
+
+    user = SimpleNamespace(id=1, role="user")
+    # Spiżarnia bez zapytań do bazy: _sync nie ma nic do zrobienia.
+    catalogue = range(1, min(options.ingredients, 200) + 1)
+    latencies = []
+    for _ in range(options.queries):
+        pantry = rng.sample(catalogue, options.pantry)
+        started = time.perf_counter()
+        index.rank(None, pantry, user, limit=20)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+
+    update = module._RecipeData([(5, 1, True)], {5: {1, 2, 3}}, data.optional)
+    started = time.perf_counter()
+    with index._lock:
+        index._apply({5}, update)
+    update_ms = (time.perf_counter() - started) * 1000
+
+    print(f"recipes {options.recipes}, postings {sum(len(p) for p in index._postings.values())}")
+    print(f"build   {build * 1000:8.1f} ms")
+    print(
+        f"rank    p50 {statistics.median(latencies) * 1000:6.2f} ms"
+        f"   p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:6.2f} ms"
+    )
+    print(f"update  {update_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
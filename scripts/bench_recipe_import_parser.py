@@ -0,0 +1,96 @@
+"""Mikro-benchmark ekstrakcji strony przepisu (parse_page, strony/s i MB/s).
+
+Korpus to zapisane strony z tests/fixtures/recipe_import w dwóch wariantach:
+
+    fixtures  - pliki bez zmian (kilkaset bajtów)
+    padded    - te same strony z ~1 MB treści dopisanej w <body> (komentarze,
+                reklamy), czyli typowy rozmiar prawdziwej strony z przepisem
+
+Porównanie "przed/po" z dowolną wcześniejszą wersją (np. dwa przejścia
+BeautifulSoup sprzed skanera jednoprzebiegowego):
+    mkdir -p /tmp/import_before
+    for f in parser schema_org; do
+        git show <rev>:app/services/recipe_import/$f.py > /tmp/import_before/$f.py
+    done
+    python scripts/bench_recipe_import_parser.py --baseline /tmp/import_before
+
+Użycie (z katalogu repozytorium):
+    python scripts/bench_recipe_import_parser.py [--padding-kb 1024] [--repeat 5]
+"""
+import argparse
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+# Pozwala uruchomić skrypt bez ustawiania PYTHONPATH.
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.services.recipe_import import parser  # noqa: E402
+
+FIXTURES_DIR = ROOT / "tests" / "fixtures" / "recipe_import"
+SOURCE_URL = "https://example.com/przepis"
+FILLER = '<div class="comment"><p>Świetny przepis, polecam! <a href="/u/1">Ania</a></p></div>\n'
+
+
+def load_pages(padding_kb: int) -> dict[str, list[str]]:
+    pages = [path.read_text(encoding="utf-8") for path in sorted(FIXTURES_DIR.glob("*.html"))]
+    filler = FILLER * (padding_kb * 1024 // len(FILLER.encode("utf-8")))
+    padded = [page.replace("</body>", filler + "</body>", 1) for page in pages]
+    return {"fixtures": pages, "padded": padded}
+
+
+def _load_module(name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_baseline(directory: str):
+    """Ładuje stare parser.py razem z jego schema_org.py (nie z obecnym)."""
+    schema_org_name = "app.services.recipe_import.schema_org"
+    current_schema_org = sys.modules[schema_org_name]
+    sys.modules[schema_org_name] = _load_module("baseline_schema_org", Path(directory) / "schema_org.py")
+    try:
+        return _load_module("baseline_parser", Path(directory) / "parser.py")
+    finally:
+        sys.modules[schema_org_name] = current_schema_org
+
+
+def measure(parse_page, pages: list[str], repeat: int) -> tuple[float, float]:
+    size = sum(len(page.encode("utf-8")) for page in pages) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            parse_page(page, SOURCE_URL)
+    elapsed = time.perf_counter() - start
+    return len(pages) * repeat / elapsed, size / elapsed / 1_000_000
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--padding-kb", type=int, default=1024)
+    args.add_argument("--repeat", type=int, default=5)
+    args.add_argument("--baseline", help="katalog ze starymi parser.py i schema_org.py")
+    options = args.parse_args()
+
+    implementations = {}
+    if options.baseline:
+        implementations["baseline"] = load_baseline(options.baseline).parse_page
+    implementations["current"] = parser.parse_page
+
+    for corpus, pages in load_pages(options.padding_kb).items():
+        reference = None
+        for name, parse_page in implementations.items():
+            pages_per_second, megabytes_per_second = measure(parse_page, pages, options.repeat)
+            reference = reference or pages_per_second
+            print(
+                f"{corpus:>8} {name:>8}: {pages_per_second:>10,.1f} pages/s"
+                f"  {megabytes_per_second:>7,.1f} MB/s  ({pages_per_second / reference:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
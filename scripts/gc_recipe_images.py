@@ -0,0 +1,47 @@
+"""Usuwa z app/static/uploads zdjęcia, których nie wskazuje żaden przepis.
+
+Dry-run domyślnie: wypisuje pliki do usunięcia i ile miejsca zwolnią. Kasuje
+dopiero z --apply. Zbiera pliki starsze niż --min-age-minutes (domyślnie tyle,
+ile okno REUSE_GRACE_SECONDS w app/utils/image_store.py): obrazy bez przepisu,
+także stare nazwy uuid4, ich warianty WebP i resztki przerwanych zapisów.
+Bezpieczny przy działającej aplikacji - świeżych plików nie rusza.
+
+Użycie (z katalogu repozytorium):
+    python scripts/gc_recipe_images.py            # dry-run
+    python scripts/gc_recipe_images.py --apply    # usuwa
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Pozwala uruchomić skrypt bez ustawiania PYTHONPATH.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import app.db.models  # noqa: E402,F401 - rejestruje modele na Base.metadata
+from app.core.database import SessionLocal  # noqa: E402
+from app.utils.image_store import REUSE_GRACE_SECONDS, collect_garbage  # noqa: E402
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--apply", action="store_true", help="usuń pliki zamiast tylko je wypisać")
+    args.add_argument("--min-age-minutes", type=float, default=REUSE_GRACE_SECONDS / 60)
+    options = args.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = collect_garbage(db, apply=options.apply, min_age_seconds=options.min_age_minutes * 60)
+    finally:
+        db.close()
+
+    for url in report.deleted:
+        print(url)
+    verb = "removed" if options.apply else "would remove"
+    print(
+        f"{verb} {len(report.deleted)} of {report.scanned} files, "
+        f"{report.bytes_freed / 1_000_000:.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -96,6 +96,46 @@ class AdminApiTests(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertNotIn("access-control-allow-origin", response.headers)
 
+    def test_cache_stats_are_exposed_to_super_admin_only(self) -> None:
+        self.assertEqual(self.client.get("/api/v1/admin/cache-stats").status_code, 401)
+
+        from app.core.dependencies import super_admin_required
+
+        self.main_module.app.dependency_overrides[super_admin_required] = lambda: object()
+        stats = self.client.get("/api/v1/admin/cache-stats").json()
+        self.assertEqual(
+            set(stats["ingredient_name_index"]),
+            {"version", "size", "hits", "misses", "rebuilds", "invalidations"},
+        )
+        self.assertEqual(set(stats["store_route_plans"]), {"stores", "hits", "misses", "invalidations"})
+        self.assertEqual(set(stats["ingredient_parser"]), {"hits", "misses", "size", "max_size"})
+        self.assertEqual(set(stats["user_principals"]), {"size", "hits", "misses", "invalidations"})
+        self.assertEqual(set(stats["recipe_import_dns"]), {"size", "hits", "misses"})
+        self.assertEqual(set(stats["recipe_import_clients"]), {"clients", "in_use", "created", "reused"})
+        self.assertEqual(
+            set(stats["recipe_import_previews"]), {"size", "hits", "revalidated", "misses", "hit_ratio"}
+        )
+        self.assertEqual(
+            set(stats["recipe_import_parse"]), {"workers", "in_flight", "parsed", "timeouts", "rejected", "crashes"}
+        )
+        self.assertEqual(
+            set(stats["recipe_ingredient_index"]),
+            {
+                "version", "recipes", "ingredients", "pending", "building",
+                "queries", "rebuilds", "updates", "invalidations",
+            },
+        )
+
+    def test_image_job_stats_count_jobs_by_status(self) -> None:
+        self.assertEqual(self.client.get("/api/v1/admin/image-job-stats").status_code, 401)
+
+        from app.core.dependencies import super_admin_required
+
+        self.main_module.app.dependency_overrides[super_admin_required] = lambda: object()
+        stats = self.client.get("/api/v1/admin/image-job-stats").json()
+        self.assertFalse(stats["running"])  # TestClient bez lifespanu
+        self.assertEqual(stats["jobs"], {"pending": 0, "running": 0, "done": 0, "failed": 0})
+
 
 if __name__ == "__main__":
     unittest.main()
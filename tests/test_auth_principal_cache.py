@@ -0,0 +1,109 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+def purge_app_modules() -> None:
+    for name in list(sys.modules):
+        if name == "app" or name.startswith("app."):
+            sys.modules.pop(name)
+
+
+class PrincipalCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.env = mock.patch.dict(os.environ, {
+            "ENV": "dev", "APP_INSTANCE": "dev", "SECRET_KEY": "dev-secret",
+            "DATABASE_URL": f"sqlite:///{Path(self.tmp.name) / 'auth.db'}",
+            "MEAL_PLANNER_LOAD_ENV_FILE": "0",
+        }, clear=True)
+        self.env.start()
+        from fastapi.testclient import TestClient
+        from app.core.security import create_access_token
+        from app.db.models.user import User
+        import app.main as main_module
+
+        self.main = main_module
+        self.db = main_module.SessionLocal()
+        self.user = User(username="cached", hashed_password="x", role="user")
+        self.db.add(self.user)
+        self.db.commit()
+        self.client = TestClient(self.main.app)
+        self.client.cookies.set("access_token", create_access_token({"sub": self.user.id}))
+
+    def tearDown(self) -> None:
+        self.db.close()
+        from app.core.database import engine
+        engine.dispose()
+        self.env.stop()
+        self.tmp.cleanup()
+        purge_app_modules()
+
+    def _user_queries(self):
+        from sqlalchemy import event
+        from app.core.database import engine
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if "FROM users" in statement:
+                statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        self.addCleanup(event.remove, engine, "before_cursor_execute", record)
+        return statements
+
+    def me(self):
+        response = self.client.get("/auth/me")
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()
+
+    def test_repeated_requests_skip_the_user_query(self) -> None:
+        self.me()
+        queries = self._user_queries()
+        self.assertEqual(self.me()["username"], "cached")
+        self.assertEqual(self.client.get("/api/v1/ingredients").status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_committed_role_change_is_visible_on_the_next_request(self) -> None:
+        self.assertEqual(self.me()["role"], "user")
+        self.assertEqual(self.client.get("/api/v1/admin/cache-stats").status_code, 403)
+        self.user.role = "super_admin"
+        self.db.commit()
+        self.assertEqual(self.me()["role"], "super_admin")
+        self.assertEqual(self.client.get("/api/v1/admin/cache-stats").status_code, 200)
+
+    def test_rolled_back_change_keeps_the_cached_principal(self) -> None:
+        from app.core.principal import principal_cache
+
+        self.me()
+        self.user.role = "super_admin"
+        self.db.flush()
+        self.db.rollback()
+        self.assertEqual(principal_cache.stats()["invalidations"], 0)
+        self.assertEqual(self.me()["role"], "user")
+
+    def test_deleted_user_is_rejected_immediately(self) -> None:
+        self.me()
+        self.db.delete(self.user)
+        self.db.commit()
+        self.assertEqual(self.client.get("/auth/me").status_code, 401)
+
+    def test_changes_outside_the_session_hooks_expire_with_the_ttl(self) -> None:
+        from app.core import principal
+        from app.db.models.user import User
+
+        self.me()
+        self.db.query(User).filter(User.id == self.user.id).update({User.role: "admin"})
+        self.db.commit()
+        self.assertEqual(self.me()["role"], "user")
+        later = principal.time.monotonic() + principal.TTL_SECONDS + 1
+        with mock.patch.object(principal.time, "monotonic", return_value=later):
+            self.assertEqual(self.me()["role"], "admin")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+def purge_app_modules() -> None:
+    for name in list(sys.modules):
+        if name == "app" or name.startswith("app."):
+            sys.modules.pop(name)
+
+
+class PoolTestCase(unittest.TestCase):
+    """Aplikacja na świeżej bazie SQLite z małą pulą; `EXTRA_ENV` dla podklas."""
+
+    EXTRA_ENV: dict[str, str] = {}
+
+    def setUp(self) -> None:
+        purge_app_modules()
+        self._tmpdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self._env_patch = mock.patch.dict(
+            os.environ,
+            {
+                "ENV": "dev",
+                "APP_INSTANCE": "dev",
+                "SECRET_KEY": "dev-secret",
+                "DATABASE_URL": f"sqlite:///{Path(self._tmpdir.name) / 'pool.db'}",
+                "MEAL_PLANNER_LOAD_ENV_FILE": "0",
+                "DB_POOL_SIZE": "2",
+                "DB_MAX_OVERFLOW": "1",
+                "DB_POOL_TIMEOUT": "0.2",
+                **self.EXTRA_ENV,
+            },
+            clear=True,
+        )
+        self._env_patch.start()
+
+        import app.main as main_module
+        from fastapi.testclient import TestClient
+
+        from app.core import db_pool
+        from app.core.database import SessionLocal, engine
+        from app.core.security import create_access_token
+        from app.db.models.user import User
+
+        self.main_module = main_module
+        self.engine = engine
+        self.stats = db_pool.pool_stats
+        db = SessionLocal()
+        user = User(username="pool-owner", hashed_password="x", role="super_admin")
+        db.add(user)
+        db.commit()
+        self.user_id = user.id
+        self.token = create_access_token({"sub": user.id})
+        db.close()
+        self.client = TestClient(main_module.app)
+
+    def tearDown(self) -> None:
+        self.main_module.app.dependency_overrides.clear()
+        self.engine.dispose()
+        self._env_patch.stop()
+        self._tmpdir.cleanup()
+        purge_app_modules()
+
+    def _count_checkouts(self) -> list:
+        from sqlalchemy import event
+
+        from app.core.principal import principal_cache
+        from app.core.request_log_writer import request_log_writer
+
+        principal_cache.invalidate(self.user_id)
+        checkouts = []
+        event.listen(self.engine, "checkout", lambda *args: checkouts.append(args[1]))
+        # Bez lifespanu writer zapisuje request_log od razu, własną sesją.
+        submit = mock.patch.object(request_log_writer, "submit")
+        submit.start()
+        self.addCleanup(submit.stop)
+        self.client.cookies.set("access_token", self.token)
+        return checkouts
+
+
+class DatabasePoolTests(PoolTestCase):
+    """Pula z Settings, jedna sesja na żądanie i liczniki puli w panelu admina."""
+
+    def test_engine_uses_pool_settings(self) -> None:
+        from app.core.db_pool import InstrumentedQueuePool
+
+        pool = self.engine.pool
+        self.assertIsInstance(pool, InstrumentedQueuePool)
+        self.assertEqual(pool.size(), 2)
+        self.assertEqual(pool._max_overflow, 1)
+        self.assertEqual(pool._timeout, 0.2)
+        self.assertTrue(pool._pre_ping)
+        self.assertEqual(pool._recycle, 1800)
+
+    def test_request_uses_one_session_for_auth_and_endpoint(self) -> None:
+        checkouts = self._count_checkouts()
+        response = self.client.get("/api/v1/recipes/")
+        self.assertEqual(response.status_code, 200)
+        # get_current_user (principal z bazy) i endpoint dzielą sesję i połączenie,
+        # także w trasie async (DB_ASYNC=0: ThreadedSession na sesji żądania).
+        self.assertEqual(len(checkouts), 1)
+        self.assertEqual(self.engine.pool.checkedout(), 0)
+
+        # Pliki statyczne nie otwierają sesji wcale.
+        self.assertEqual(self.client.get("/static/main.css").status_code, 200)
+        self.assertEqual(len(checkouts), 1)
+
+    def test_pool_stats_show_usage_and_timeouts(self) -> None:
+        from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+        self.stats.reset()
+        held = [self.engine.connect() for _ in range(3)]  # pool_size + max_overflow
+        try:
+            with self.assertRaises(PoolTimeoutError):
+                self.engine.connect()
+        finally:
+            for connection in held:
+                connection.close()
+
+        self.assertEqual(self.client.get("/api/v1/admin/db-pool-stats").status_code, 401)
+        self.client.cookies.set("access_token", self.token)
+        stats = self.client.get("/api/v1/admin/db-pool-stats").json()
+        self.assertEqual(stats["config"]["max_connections_per_worker"], 3)
+        self.assertEqual(stats["current"]["pool_class"], "InstrumentedQueuePool")
+        self.assertEqual(stats["current"]["checked_out"], 1)  # sesja tego żądania
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertGreaterEqual(stats["peak_checked_out"], 3)
+        self.assertGreaterEqual(stats["wait_seconds_max"], 0.2)
+
+
+
+class AsyncEngineConnectionTests(PoolTestCase):
+    """DB_ASYNC=1: trasy async biorą połączenie z osobnej puli asynchronicznej,
+    więc żądanie z uwierzytelnieniem z bazy trzyma dwa połączenia naraz."""
+
+    EXTRA_ENV = {"DB_ASYNC": "1"}
+
+    def test_async_route_takes_a_second_connection_from_the_async_pool(self) -> None:
+        from app.core import async_database
+        from app.core.db_pool import async_pool_stats
+
+        self.assertIsNotNone(async_database.async_engine)
+        checkouts = self._count_checkouts()
+        async_before = async_pool_stats.snapshot()["checkouts"]
+
+        response = self.client.get("/api/v1/recipes/")
+        self.assertEqual(response.status_code, 200)
+        # Principal z sesji żądania (pula synchroniczna) + AsyncSession endpointu.
+        self.assertEqual(len(checkouts), 1)
+        self.assertEqual(async_pool_stats.snapshot()["checkouts"] - async_before, 1)
+        self.assertEqual(self.engine.pool.checkedout(), 0)
+
+        # Endpoint synchroniczny nadal dzieli jedną sesję z uwierzytelnieniem.
+        self.assertEqual(self.client.get("/api/v1/admin/image-job-stats").status_code, 200)
+        self.assertEqual(len(checkouts), 2)
+        self.assertEqual(async_pool_stats.snapshot()["checkouts"] - async_before, 1)
+
+    def tearDown(self) -> None:
+        import asyncio
+
+        from app.core.async_database import dispose_async_engine
+
+        asyncio.run(dispose_async_engine())
+        super().tearDown()
+
+
+if __name__ == "__main__":
+    unittest.main()
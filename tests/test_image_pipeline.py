@@ -0,0 +1,193 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+
+def purge_app_modules() -> None:
+    for name in list(sys.modules):
+        if name == "app" or name.startswith("app."):
+            sys.modules.pop(name)
+
+
+def make_image(path: Path, size=(3000, 1500), image_format="JPEG", mode="RGB", orientation=None) -> None:
+    exif = Image.Exif()
+    exif[0x010F] = "Aparat z GPS"  # Make
+    if orientation:
+        exif[0x0112] = orientation
+    Image.new(mode, size, "orange").save(path, image_format, exif=exif.tobytes())
+
+
+class ImagePipelineTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.dir = Path(self._tmpdir.name)
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    def test_original_is_capped_rotated_and_stripped_of_metadata(self) -> None:
+        from app.utils import image_pipeline
+
+        path = self.dir / "photo.jpg"
+        make_image(path, orientation=6)  # obrót o 90° zapisany tylko w EXIF
+
+        image_pipeline.process_image(path)
+
+        with Image.open(path) as stored:
+            self.assertEqual(stored.format, "JPEG")
+            self.assertEqual(stored.size, (1024, 2048))
+            self.assertEqual(dict(stored.getexif()), {})
+
+    def test_webp_variants_are_written_only_below_the_original_width(self) -> None:
+        from app.utils import image_pipeline
+
+        path = self.dir / "photo.png"
+        make_image(path, size=(800, 600), image_format="PNG", mode="RGBA")
+
+        widths = image_pipeline.process_image(path)
+
+        self.assertEqual(widths, (320, 640))
+        for width in widths:
+            with Image.open(self.dir / f"photo.w{width}.webp") as variant:
+                self.assertEqual(variant.format, "WEBP")
+                self.assertEqual(variant.width, width)
+                self.assertEqual(variant.height, round(600 * width / 800))
+        self.assertFalse((self.dir / "photo.w1280.webp").exists())
+
+    def test_undecodable_or_oversized_file_is_rejected(self) -> None:
+        from app.utils import image_pipeline
+
+        path = self.dir / "broken.jpg"
+        path.write_bytes(b"\xff\xd8\xff" + b"not really a jpeg")
+        with self.assertRaises(ValueError):
+            image_pipeline.process_image(path)
+
+        big = self.dir / "big.jpg"
+        make_image(big, (800, 600))
+        with mock.patch.object(image_pipeline, "MAX_PIXELS", 1000), self.assertRaises(ValueError):
+            image_pipeline.process_image(big)
+        self.assertEqual(sorted(p.name for p in self.dir.glob("*.webp")), [])
+
+    def test_variant_map_follows_stored_widths(self) -> None:
+        from app.utils.image_pipeline import variant_urls
+
+        self.assertEqual(
+            variant_urls("/static/uploads/abc.jpg", "320,640"),
+            {320: "/static/uploads/abc.w320.webp", 640: "/static/uploads/abc.w640.webp"},
+        )
+        self.assertEqual(variant_urls("/static/uploads/abc.jpg", None), {})
+        self.assertEqual(variant_urls("", "320"), {})
+
+    def test_delete_image_removes_variants_too(self) -> None:
+        from app.utils import file_utils, image_pipeline
+
+        uploads = self.dir / "uploads"
+        uploads.mkdir()
+        path = uploads / "abc.jpg"
+        make_image(path)
+        other = uploads / "abcd.jpg"
+        make_image(other)
+        image_pipeline.process_image(path)
+        image_pipeline.process_image(other)
+
+        with mock.patch.object(file_utils, "STATIC_ROOT", self.dir):
+            file_utils.delete_image("/static/uploads/abc.jpg")
+
+        self.assertEqual(sorted(p.name for p in uploads.glob("abc.*")), [])
+        self.assertTrue((uploads / "abcd.w320.webp").exists())
+
+
+class RecipeImageUploadVariantTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.static_root = Path(self._tmpdir.name) / "static"
+        (self.static_root / "uploads").mkdir(parents=True)
+        self._env_patch = mock.patch.dict(
+            os.environ,
+            {
+                "ENV": "dev",
+                "APP_INSTANCE": "dev",
+                "SECRET_KEY": "dev-secret",
+                "DATABASE_URL": f"sqlite:///{Path(self._tmpdir.name) / 'variants.db'}",
+                "MEAL_PLANNER_LOAD_ENV_FILE": "0",
+            },
+            clear=True,
+        )
+        self._env_patch.start()
+
+        import app.main as main_module
+        from fastapi.testclient import TestClient
+
+        from app.core.database import SessionLocal
+        from app.core.security import get_current_user
+        from app.db.models.recipe import Recipe
+        from app.db.models.user import User
+        from app.utils import file_utils, image_store
+
+        self._paths = [
+            mock.patch.object(file_utils, "STATIC_ROOT", self.static_root),
+            mock.patch.object(file_utils, "UPLOAD_DIR", self.static_root / "uploads"),
+            # Świeżo wgrany plik release() zostawia dla GC; tu ma zniknąć od razu.
+            mock.patch.object(image_store, "REUSE_GRACE_SECONDS", 0),
+        ]
+        for patcher in self._paths:
+            patcher.start()
+
+        self.main_module = main_module
+        self.db = SessionLocal()
+        user = User(username="photographer", hashed_password="x", role="user")
+        self.db.add(user)
+        self.db.commit()
+        self.db.refresh(user)
+        self.recipe = Recipe(name="Szarlotka", user_id=user.id)
+        self.db.add(self.recipe)
+        self.db.commit()
+        self.db.refresh(self.recipe)
+        main_module.app.dependency_overrides[get_current_user] = lambda: user
+        self.client = TestClient(main_module.app)
+
+    def tearDown(self) -> None:
+        for patcher in self._paths:
+            patcher.stop()
+        self.main_module.app.dependency_overrides.clear()
+        self.db.close()
+        from app.core.database import engine
+
+        engine.dispose()
+        self._env_patch.stop()
+        self._tmpdir.cleanup()
+        purge_app_modules()
+
+    def test_uploaded_image_exposes_srcset_variants_and_delete_removes_them(self) -> None:
+        buffer = io.BytesIO()
+        Image.new("RGB", (1600, 1200), "green").save(buffer, "JPEG")
+        response = self.client.put(
+            f"/api/v1/recipes/{self.recipe.id}/image",
+            files={"file": ("szarlotka.jpg", buffer.getvalue(), "image/jpeg")},
+        )
+        self.assertEqual(response.status_code, 200)
+        image = response.json()["image"]
+
+        recipe = self.client.get(f"/api/v1/recipes/{self.recipe.id}").json()
+        self.assertEqual(recipe["image"], image)
+        self.assertEqual(set(recipe["image_variants"]), {"320", "640", "1280"})
+        self.assertNotIn("image_variant_widths", recipe)
+        for url in recipe["image_variants"].values():
+            self.assertTrue((self.static_root / url.replace("/static/", "")).is_file())
+
+        listed = self.client.get("/api/v1/recipes/").json()
+        self.assertEqual(listed[0]["image_variants"], recipe["image_variants"])
+
+        self.assertEqual(self.client.delete(f"/api/v1/recipes/{self.recipe.id}/image").status_code, 200)
+        self.assertEqual([p for p in (self.static_root / "uploads").rglob("*") if p.is_file()], [])
+        self.assertEqual(self.client.get(f"/api/v1/recipes/{self.recipe.id}").json()["image_variants"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,266 @@
+import io
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+
+def purge_app_modules() -> None:
+    for name in list(sys.modules):
+        if name == "app" or name.startswith("app."):
+            sys.modules.pop(name)
+
+
+def jpeg_bytes(color: str = "orange", size=(900, 600)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class ImageStoreTests(unittest.TestCase):
+    """Content-addressed magazyn zdjęć: deduplikacja, zwalnianie referencji
+    z recipes.image i GC osieroconych plików."""
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.static_root = Path(self._tmpdir.name) / "static"
+        self.uploads = self.static_root / "uploads"
+        self.uploads.mkdir(parents=True)
+        (self.uploads / ".gitkeep").touch()
+        self._env_patch = mock.patch.dict(
+            os.environ,
+            {
+                "ENV": "dev",
+                "APP_INSTANCE": "dev",
+                "SECRET_KEY": "dev-secret",
+                "DATABASE_URL": f"sqlite:///{Path(self._tmpdir.name) / 'store.db'}",
+                "MEAL_PLANNER_LOAD_ENV_FILE": "0",
+            },
+            clear=True,
+        )
+        self._env_patch.start()
+
+        import app.db.models  # noqa: F401 - rejestruje modele na Base.metadata
+        from app.core.bootstrap import initialize_database_schema
+        from app.core.database import SessionLocal
+        from app.db.models.user import User
+        from app.utils import file_utils, image_store
+
+        initialize_database_schema()
+        self._paths = [
+            mock.patch.object(file_utils, "STATIC_ROOT", self.static_root),
+            mock.patch.object(file_utils, "UPLOAD_DIR", self.uploads),
+        ]
+        for patcher in self._paths:
+            patcher.start()
+
+        self.store = image_store
+        self.db = SessionLocal()
+        self.user = User(username="dedup", hashed_password="x", role="user")
+        self.db.add(self.user)
+        self.db.commit()
+        self.db.refresh(self.user)
+
+    def tearDown(self) -> None:
+        for patcher in self._paths:
+            patcher.stop()
+        self.db.close()
+        from app.core.database import engine
+
+        engine.dispose()
+        self._env_patch.stop()
+        self._tmpdir.cleanup()
+        purge_app_modules()
+
+    def _files(self) -> list[str]:
+        return sorted(p.relative_to(self.uploads).as_posix() for p in self.uploads.rglob("*") if p.is_file())
+
+    def _recipe(self, image: str):
+        from app.db.models.recipe import Recipe
+
+        recipe = Recipe(name="Placki", image=image, user_id=self.user.id)
+        self.db.add(recipe)
+        self.db.commit()
+        return recipe
+
+    def _age(self, url: str, seconds: float = 3600) -> None:
+        old = time.time() - seconds
+        path = self.static_root / url.replace("/static/", "")
+        for file in [path, *path.parent.glob(f"{path.stem}.w*.webp")]:
+            os.utime(file, (old, old))
+
+    def test_same_bytes_are_stored_once_in_a_sharded_path(self) -> None:
+        data = jpeg_bytes()
+        first = self.store.store(data, "jpeg")
+        second = self.store.store(data, "jpg")
+
+        self.assertTrue(first.created)
+        self.assertFalse(second.created)
+        self.assertEqual(first.url, second.url)
+        self.assertEqual(second.variant_widths, first.variant_widths)
+        self.assertEqual(first.variant_widths, (320, 640))
+
+        digest = first.url.rsplit("/", 1)[-1].split(".")[0]
+        self.assertEqual(len(digest), 64)
+        self.assertEqual(first.url, f"/static/uploads/{digest[:2]}/{digest[2:4]}/{digest}.jpg")
+        self.assertEqual(len([name for name in self._files() if name.endswith(".jpg")]), 1)
+        self.assertFalse([name for name in self._files() if name.endswith(".tmp")])
+
+        with self.assertRaises(ValueError):
+            self.store.store(data, "gif")
+
+    def test_release_keeps_blob_while_another_recipe_uses_it(self) -> None:
+        stored = self.store.store(jpeg_bytes(), "jpg")
+        first = self._recipe(stored.url)
+        second = self._recipe(stored.url)
+        self._age(stored.url)
+
+        self.db.delete(first)
+        self.db.commit()
+        self.assertFalse(self.store.release(self.db, stored.url))
+        self.assertIn(stored.url.replace("/static/uploads/", ""), self._files())
+
+        self.db.delete(second)
+        self.db.commit()
+        self.assertTrue(self.store.release(self.db, stored.url))
+        self.assertEqual(self._files(), [".gitkeep"])
+
+    def test_recently_used_blob_is_left_for_the_collector(self) -> None:
+        stored = self.store.store(jpeg_bytes(), "jpg")
+        self.assertFalse(self.store.release(self.db, stored.url))
+        self.assertEqual(len(self._files()), 4)  # .gitkeep, oryginał, 2 warianty
+
+    def test_collector_removes_only_old_unreferenced_files(self) -> None:
+        kept = self.store.store(jpeg_bytes("green"), "jpg")
+        self._recipe(kept.url)
+        orphan = self.store.store(jpeg_bytes("red"), "jpg")
+        fresh_orphan = self.store.store(jpeg_bytes("blue"), "jpg")
+        legacy = self.uploads / "0b5e6c1e-legacy.jpg"
+        legacy.write_bytes(jpeg_bytes("black"))
+        leftover = self.uploads / "ab" / ".abcd.123.tmp"
+        leftover.parent.mkdir()
+        leftover.write_bytes(b"half")
+        for url in (kept.url, orphan.url, "/static/uploads/0b5e6c1e-legacy.jpg", "/static/uploads/ab/.abcd.123.tmp"):
+            self._age(url)
+
+        dry_run = self.store.collect_garbage(self.db)
+        self.assertEqual(len(dry_run.deleted), 5)  # orphan + 2 warianty, legacy, .tmp
+        self.assertEqual(len(self._files()), 12)
+
+        report = self.store.collect_garbage(self.db, apply=True)
+        self.assertEqual(sorted(report.deleted), sorted(dry_run.deleted))
+        self.assertGreater(report.bytes_freed, 0)
+        remaining = self._files()
+        self.assertEqual(len(remaining), 7)  # .gitkeep + kept i fresh_orphan z wariantami
+        for url in (kept.url, fresh_orphan.url):
+            self.assertIn(url.replace("/static/uploads/", ""), remaining)
+        self.assertFalse((self.uploads / "ab").exists())
+
+    def test_upload_is_streamed_in_fixed_chunks(self) -> None:
+        from types import SimpleNamespace
+
+        class RecordingFile(io.BytesIO):
+            def __init__(self, data: bytes) -> None:
+                super().__init__(data)
+                self.sizes = []
+
+            def read(self, size=-1):
+                self.sizes.append(size)
+                return super().read(size)
+
+        data = jpeg_bytes(size=(1200, 900)) + b"\x00" * (300 * 1024)  # ogon po EOI
+        upload = RecordingFile(data)
+        stored = self.store.save_upload(SimpleNamespace(file=upload, filename="photo.jpg"))
+
+        self.assertTrue(stored.created)
+        self.assertEqual(set(upload.sizes), {self.store.UPLOAD_CHUNK_BYTES})
+        self.assertGreater(len(upload.sizes), 4)
+        # Ta sama treść przez store() trafia w ten sam plik.
+        self.assertEqual(self.store.store(data, "jpg").url, stored.url)
+
+    def test_upload_limits_and_content_type_checks(self) -> None:
+        from types import SimpleNamespace
+
+        def upload(data: bytes, filename: str = "photo.jpg", **kwargs):
+            return self.store.save_upload(SimpleNamespace(file=io.BytesIO(data), filename=filename), **kwargs)
+
+        with self.assertRaises(self.store.ImageTooLargeError):
+            upload(jpeg_bytes() + b"\x00" * 200_000, max_bytes=100_000)
+        with self.assertRaises(ValueError):
+            upload(b"<html>not an image</html>" * 5000)
+        with self.assertRaises(ValueError):
+            upload(b"GIF89a")
+        self.assertEqual(self._files(), [".gitkeep"])  # żadnych plików tymczasowych
+
+        # Typ z treści, nie z nazwy pliku.
+        buffer = io.BytesIO()
+        Image.new("RGB", (400, 300), "teal").save(buffer, "PNG")
+        self.assertTrue(upload(buffer.getvalue(), filename="photo.jpg").url.endswith(".png"))
+
+    def test_upload_endpoint_maps_errors_to_status_codes(self) -> None:
+        import app.main as main_module
+        from fastapi.testclient import TestClient
+
+        from app.core.security import get_current_user
+
+        main_module.app.dependency_overrides[get_current_user] = lambda: self.user
+        self.addCleanup(main_module.app.dependency_overrides.clear)
+        client = TestClient(main_module.app)
+        recipe = self._recipe("")
+
+        with mock.patch.object(self.store, "MAX_UPLOAD_BYTES", 50_000):
+            too_big = client.put(
+                f"/api/v1/recipes/{recipe.id}/image",
+                files={"file": ("photo.jpg", jpeg_bytes() + b"\x00" * 60_000, "image/jpeg")},
+            )
+        self.assertEqual(too_big.status_code, 413)
+        not_image = client.put(
+            f"/api/v1/recipes/{recipe.id}/image",
+            files={"file": ("photo.jpg", b"%PDF-1.7 definitely not a photo", "image/jpeg")},
+        )
+        self.assertEqual(not_image.status_code, 400)
+        # Nagłówek JPEG, ale Pillow tego nie zdekoduje - oryginał nie trafia na dysk.
+        broken = client.put(
+            f"/api/v1/recipes/{recipe.id}/image",
+            files={"file": ("photo.jpg", b"\xff\xd8\xff" + b"not really a jpeg" * 100, "image/jpeg")},
+        )
+        self.assertEqual(broken.status_code, 400)
+        self.db.refresh(recipe)
+        self.assertEqual(recipe.image, "")
+        self.assertEqual(self._files(), [".gitkeep"])
+
+    def test_two_recipes_uploading_the_same_photo_share_one_file(self) -> None:
+        import app.main as main_module
+        from fastapi.testclient import TestClient
+
+        from app.core.security import get_current_user
+
+        main_module.app.dependency_overrides[get_current_user] = lambda: self.user
+        self.addCleanup(main_module.app.dependency_overrides.clear)
+        client = TestClient(main_module.app)
+        first, second = self._recipe(""), self._recipe("")
+
+        data = jpeg_bytes()
+        urls = [
+            client.put(
+                f"/api/v1/recipes/{recipe_id}/image", files={"file": ("photo.jpg", data, "image/jpeg")}
+            ).json()["image"]
+            for recipe_id in (first.id, second.id)
+        ]
+        self.assertEqual(urls[0], urls[1])
+        self.assertEqual(len([name for name in self._files() if name.endswith(".jpg")]), 1)
+
+        self._age(urls[0])
+        self.assertEqual(client.delete(f"/api/v1/recipes/{first.id}").status_code, 204)
+        self.assertIn(urls[0].replace("/static/uploads/", ""), self._files())
+        self.assertEqual(client.delete(f"/api/v1/recipes/{second.id}").status_code, 204)
+        self.assertEqual(self._files(), [".gitkeep"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from app.services.ingredient_parsing.parser import (
+    _parse_stripped,
+    parse_cache_stats,
+    parse_ingredient_line,
+    parse_ingredient_lines,
+    parse_ingredient_lines_batch,
+)
+
+
+class IngredientParserTests(unittest.TestCase):
+    def setUp(self) -> None:
+        _parse_stripped.cache_clear()
+
+    def test_quantity_forms_keep_their_precedence(self) -> None:
+        cases = {
+            "1 1/2 szklanki mleka": (1.5, "szklanka", "mleka"),
+            "1/2 szklanki wody": (0.5, "szklanka", "wody"),
+            "1½ cup flour": (1.5, "cup", "flour"),
+            "½ kostki masła": (0.5, None, "kostki masła"),
+            "1,5 kg ziemniaków": (1.5, "kg", "ziemniaków"),
+            "0.25 l wody": (0.25, "l", "wody"),
+            "3 cloves of garlic": (3.0, "clove", "garlic"),
+            "12 jajek": (12.0, None, "jajek"),
+            "chleb": (None, None, "chleb"),
+        }
+        for line, (quantity, unit, name) in cases.items():
+            with self.subTest(line=line):
+                parsed = parse_ingredient_line(line)
+                self.assertEqual((parsed.quantity, parsed.unit, parsed.name), (quantity, unit, name))
+
+    def test_note_and_to_taste_are_extracted(self) -> None:
+        parsed = parse_ingredient_line("2 duże ząbki czosnku")
+        self.assertEqual((parsed.quantity, parsed.unit, parsed.name, parsed.note), (2.0, "ząbek", "czosnku", "duże"))
+        parsed = parse_ingredient_line("sól do smaku")
+        self.assertEqual((parsed.name, parsed.note, parsed.confidence), ("sól", "do smaku", 0.8))
+
+    def test_cache_is_keyed_by_stripped_line_and_keeps_original_text(self) -> None:
+        first = parse_ingredient_line("2 pomidory")
+        second = parse_ingredient_line("  2 pomidory ")
+        self.assertEqual(parse_cache_stats()["hits"], 1)
+        self.assertEqual(first.original_text, "2 pomidory")
+        self.assertEqual(second.original_text, "  2 pomidory ")
+        self.assertEqual(second.name, "pomidory")
+
+    def test_results_are_independent_copies(self) -> None:
+        parse_ingredient_line("1 ogórek").name = "changed"
+        self.assertEqual(parse_ingredient_line("1 ogórek").name, "ogórek")
+
+    def test_batch_keeps_order_and_parses_repeats_once(self) -> None:
+        lines = ["2 jajka", "mleko", "2 jajka", " mleko", "2 jajka"]
+        parsed = parse_ingredient_lines_batch(lines)
+        self.assertEqual([item.original_text for item in parsed], lines)
+        self.assertEqual([item.name for item in parsed], ["jajka", "mleko", "jajka", "mleko", "jajka"])
+        self.assertEqual(parse_cache_stats()["misses"], 2)
+        self.assertEqual(parse_cache_stats()["hits"], 0)
+        self.assertEqual(parse_ingredient_lines("2 jajka\n\n mleko \n"), parsed[:2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import math
+import unittest
+
+import numpy as np
+
+from app.services.ingredient_parsing.parser import _UNITS
+from app.services.ingredient_parsing.units import (
+    CONVERSION,
+    UNITS,
+    aggregate_quantities,
+    convert,
+    scale_quantities,
+)
+
+
+class ConversionMatrixTests(unittest.TestCase):
+    def test_every_canonical_parser_unit_is_in_the_matrix(self) -> None:
+        self.assertLessEqual(set(_UNITS.values()), set(UNITS))
+        self.assertEqual(CONVERSION.shape, (len(UNITS), len(UNITS)))
+        self.assertTrue(np.allclose(np.diag(CONVERSION), 1.0))
+
+    def test_convert_within_and_across_dimensions(self) -> None:
+        self.assertEqual(convert(1.5, "kg", "g"), 1500.0)
+        self.assertEqual(convert(2, "szklanka", "ml"), 500.0)
+        self.assertEqual(convert(3, "łyżeczka", "tbsp"), 1.0)
+        self.assertEqual(convert(4, "ząbek", "clove"), 4.0)
+        self.assertEqual(convert(2, None, "sztuka"), 2.0)
+        self.assertIsNone(convert(1, "g", "ml"))
+        self.assertIsNone(convert(1, "g", "sztuka"))
+        self.assertEqual(convert(1, "szklanka", "g", density=0.53), 132.5)
+        self.assertAlmostEqual(convert(132.5, "g", "szklanka", density=0.53), 1.0)
+        self.assertEqual(convert(2, "garść", "garść"), 2.0)
+        self.assertIsNone(convert(2, "garść", "g"))
+
+
+class AggregateQuantitiesTests(unittest.TestCase):
+    def test_sums_per_group_and_dimension(self) -> None:
+        result = aggregate_quantities(
+            groups=np.array([0, 0, 0, 1, 1, 2, 2, 2]),
+            units=["g", "kg", "szklanka", "łyżka", "łyżka", None, "sztuka", "garść"],
+            quantities=np.array([500, 1, 1, 2, math.nan, 2, 1, 1]),
+            scales=np.array([1, 1, 1, 2, 2, 1, 1, 1]),
+            counts=np.array([1, 1, 1, 2, 2, 1, 1, 1]),
+            densities=np.array([0.53, math.nan, math.nan]),
+        )
+        self.assertEqual(result.group.tolist(), [0, 1, 2, 2])
+        self.assertEqual(result.unit, ("kg", "łyżka", "sztuka", "garść"))
+        self.assertEqual(result.quantity.tolist(), [1.632, 4.0, 3.0, 1.0])
+        self.assertEqual(result.unquantified_count.tolist(), [0, 2, 0, 0])
+        self.assertEqual(result.row_entry.tolist(), [0, 0, 0, 1, 1, 2, 2, 3])
+
+    def test_volume_stays_separate_without_density_or_mass(self) -> None:
+        result = aggregate_quantities(
+            groups=np.array([0, 0, 1, 1]),
+            units=["g", "ml", "szklanka", "ml"],
+            quantities=np.array([100, 200, 1, 50]),
+            densities=np.array([math.nan, 1.0]),
+        )
+        # Grupa 1 nie ma linii w gramach, więc gęstość nic nie zmienia.
+        self.assertEqual(list(zip(result.group.tolist(), result.unit, result.quantity.tolist())),
+                         [(0, "g", 100.0), (0, "ml", 200.0), (1, "ml", 300.0)])
+
+    def test_group_without_any_quantity(self) -> None:
+        result = aggregate_quantities(np.array([0, 0]), [None, None], np.array([math.nan, math.nan]))
+        self.assertTrue(math.isnan(result.quantity[0]))
+        self.assertEqual(result.unquantified_count.tolist(), [2])
+
+    def test_empty_batch(self) -> None:
+        result = aggregate_quantities(np.array([]), [], np.array([]))
+        self.assertEqual((len(result.group), result.unit), (0, ()))
+
+    def test_scaling_keeps_line_order_and_units(self) -> None:
+        self.assertEqual(
+            scale_quantities(["g", "łyżka", None, "kg"], np.array([600, 2, math.nan, 1]), 0.5),
+            [(300.0, "g"), (1.0, "łyżka"), (None, None), (0.5, "kg")],
+        )
+        self.assertEqual(scale_quantities(["g"], np.array([600]), 2), [(1.2, "kg")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+
+def purge_app_modules() -> None:
+    for name in list(sys.modules):
+        if name == "app" or name.startswith("app."):
+            sys.modules.pop(name)
+
+
+class SlidingWindowCounterTests(unittest.TestCase):
+    def setUp(self) -> None:
+        from app.core.ip_block import SlidingWindowCounter
+
+        self.counter = SlidingWindowCounter(limit=3, window_seconds=60, max_keys=2)
+
+    def tearDown(self) -> None:
+        purge_app_modules()
+
+    def test_limit_is_reached_only_inside_the_window(self) -> None:
+        for at in (0, 30, 59):
+            self.counter.record("1.1.1.1", at)
+        self.assertTrue(self.counter.reached("1.1.1.1", now=60))
+        self.assertFalse(self.counter.reached("1.1.1.1", now=61))
+        self.assertEqual(self.counter.count("1.1.1.1", now=61), 2)
+        self.assertFalse(self.counter.reached("2.2.2.2", now=60))
+
+    def test_tracked_keys_are_bounded(self) -> None:
+        self.counter.record("a", 0)
+        self.counter.record("b", 100)
+        self.counter.record("c", 101)
+        self.assertEqual(len(self.counter), 2)
+        self.assertEqual(self.counter.count("a", now=101), 0)
+        self.assertEqual(self.counter.count("c", now=101), 1)
+
+
+class IPBlockMiddlewareTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.env = mock.patch.dict(os.environ, {
+            "ENV": "dev", "APP_INSTANCE": "dev", "SECRET_KEY": "dev-secret",
+            "DATABASE_URL": f"sqlite:///{Path(self.tmp.name) / 'ip.db'}",
+            "MEAL_PLANNER_LOAD_ENV_FILE": "0",
+        }, clear=True)
+        self.env.start()
+        from fastapi.testclient import TestClient
+        import app.main as main_module
+
+        self.main = main_module
+        self.client = TestClient(main_module.app, follow_redirects=False)
+
+    def tearDown(self) -> None:
+        from app.core.database import engine
+        engine.dispose()
+        self.env.stop()
+        self.tmp.cleanup()
+        purge_app_modules()
+
+    def test_failed_logins_block_the_ip_without_counting_queries(self) -> None:
+        from sqlalchemy import event
+        from app.core.database import engine
+
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", record)
+        self.addCleanup(event.remove, engine, "before_cursor_execute", record)
+
+        self.assertEqual(self.client.get("/api/v1/stores").status_code, 401)
+        self.assertFalse([s for s in statements if "count(" in s.lower()])
+
+        with mock.patch("app.api.v1.auth.asyncio.sleep"):
+            for _ in range(5):
+                self.client.post("/api/v1/auth/login", data={"username": "nobody", "password": "x"})
+        self.assertEqual(self.client.get("/api/v1/stores").status_code, 404)
+        # Login stays reachable so a legitimate user is not locked out of the form.
+        self.assertEqual(self.client.get("/login").status_code, 200)
+        self.assertFalse([s for s in statements if "count(" in s.lower()])
+
+    def test_suspicious_requests_block_the_ip(self) -> None:
+        for _ in range(3):
+            self.assertEqual(self.client.get("/admin.php").status_code, 404)
+        self.assertEqual(self.client.get("/api/v1/stores").status_code, 404)
+
+    def test_startup_restores_recent_blocks_from_the_logs(self) -> None:
+        from fastapi.testclient import TestClient
+        from app.core.database import SessionLocal
+        from app.db.models.login_log import LoginLog, RequestLog
+
+        db = SessionLocal()
+        stale = datetime.utcnow() - timedelta(minutes=10)
+        db.add_all([
+            *(LoginLog(ip_address="testclient", success=False) for _ in range(4)),
+            LoginLog(ip_address="testclient", success=False, created_at=stale),
+            *(RequestLog(ip_address="other", is_suspicious=True) for _ in range(3)),
+        ])
+        db.commit()
+        db.close()
+
+        with TestClient(self.main.app) as client:
+            self.assertEqual(client.get("/api/v1/stores").status_code, 401)
+            self.assertTrue(self.main.ip_activity.is_blocked("other"))
+            self.main.ip_activity.record_login_failure("testclient")
+            self.assertEqual(client.get("/api/v1/stores").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
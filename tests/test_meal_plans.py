@@ -0,0 +1,225 @@
+import os
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+MONDAY = "2026-10-12"
+
+
+def purge_app_modules() -> None:
+    for name in list(sys.modules):
+        if name == "app" or name.startswith("app."):
+            sys.modules.pop(name)
+
+
+class MealPlanTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.env = mock.patch.dict(os.environ, {
+            "ENV": "dev", "APP_INSTANCE": "dev", "SECRET_KEY": "dev-secret",
+            "DATABASE_URL": f"sqlite:///{Path(self.tmp.name) / 'plans.db'}",
+            "MEAL_PLANNER_LOAD_ENV_FILE": "0",
+        }, clear=True)
+        self.env.start()
+        from fastapi.testclient import TestClient
+        from app.core.security import get_current_user
+        from app.db.models.ingredient import Ingredient
+        from app.db.models.ingredient_alias import IngredientAlias
+        from app.db.models.ingredient_store_placement import IngredientStorePlacement
+        from app.db.models.store import Store
+        from app.db.models.store_section import StoreSection
+        from app.db.models.user import User
+        import app.main as main_module
+
+        self.main = main_module
+        self.db = main_module.SessionLocal()
+        self.owner = User(username="plan-owner", hashed_password="x", role="user")
+        self.other = User(username="plan-other", hashed_password="x", role="user")
+        self.store = Store(name="Lidl")
+        self.db.add_all([self.owner, self.other, self.store])
+        self.db.flush()
+        bakery = StoreSection(store_id=self.store.id, name_pl="Pieczywo", name_en="Bakery", sort_order=0)
+        dairy = StoreSection(store_id=self.store.id, name_pl="Nabiał", name_en="Dairy", sort_order=1)
+        self.flour, self.milk = Ingredient(name="mąka", density_g_per_ml=0.53), Ingredient(name="mleko")
+        self.db.add_all([bakery, dairy, self.flour, self.milk])
+        self.db.flush()
+        self.db.add_all([
+            IngredientAlias(ingredient_id=self.flour.id, alias_text="mąki"),
+            IngredientAlias(ingredient_id=self.milk.id, alias_text="mleka"),
+            IngredientStorePlacement(ingredient_id=self.flour.id, store_id=self.store.id, store_section_id=bakery.id),
+            IngredientStorePlacement(ingredient_id=self.milk.id, store_id=self.store.id, store_section_id=dairy.id),
+        ])
+        self.db.commit()
+        self.main.app.dependency_overrides[get_current_user] = lambda: self.owner
+        self.client = TestClient(self.main.app)
+
+    def tearDown(self) -> None:
+        self.main.app.dependency_overrides.clear()
+        self.db.close()
+        from app.core.database import engine
+        engine.dispose()
+        self.env.stop()
+        self.tmp.cleanup()
+        purge_app_modules()
+
+    def _recipe(self, name, lines=(), text="", owner=None, is_public=False, servings=None):
+        from app.db.models.recipe import Recipe
+        from app.db.models.recipe_ingredient import RecipeIngredient
+
+        recipe = Recipe(
+            name=name, ingredients=text, user_id=(owner or self.owner).id, is_public=is_public, servings=servings
+        )
+        self.db.add(recipe)
+        self.db.flush()
+        for index, (parsed_name, quantity, unit) in enumerate(lines):
+            self.db.add(RecipeIngredient(
+                recipe_id=recipe.id,
+                original_text=f"{quantity or ''} {unit or ''} {parsed_name}".strip(),
+                parsed_name=parsed_name,
+                quantity=Decimal(str(quantity)) if quantity is not None else None,
+                unit=unit,
+                sort_order=index,
+            ))
+        self.db.commit()
+        return recipe.id
+
+    def _plan(self, *recipe_ids):
+        entries = [{"recipe_id": recipe_id, "day": index % 7} for index, recipe_id in enumerate(recipe_ids)]
+        return self.client.put(f"/api/v1/meal-plans/{MONDAY}", json={"entries": entries})
+
+    def _shopping_list(self):
+        return self.client.get(f"/api/v1/meal-plans/{MONDAY}/shopping-list", params={"store_id": self.store.id})
+
+    def test_plan_is_replaced_per_week_and_read_back(self) -> None:
+        soup = self._recipe("Zupa")
+        cake = self._recipe("Ciasto")
+        self.assertEqual(self.client.get(f"/api/v1/meal-plans/{MONDAY}").json(), {"week_start": MONDAY, "entries": []})
+
+        saved = self.client.put(f"/api/v1/meal-plans/{MONDAY}", json={"entries": [
+            {"recipe_id": cake, "day": 2, "meal": " kolacja "},
+            {"recipe_id": soup, "day": 0, "meal": "obiad"},
+        ]})
+        self.assertEqual(saved.status_code, 200)
+        self.assertEqual([(e["recipe_name"], e["day"], e["meal"]) for e in saved.json()["entries"]],
+                         [("Zupa", 0, "obiad"), ("Ciasto", 2, "kolacja")])
+
+        self.assertEqual(len(self._plan(soup).json()["entries"]), 1)
+        self.assertEqual(self.client.delete(f"/api/v1/meal-plans/{MONDAY}").status_code, 204)
+        self.assertEqual(self.client.get(f"/api/v1/meal-plans/{MONDAY}").json()["entries"], [])
+
+    def test_plan_validates_week_and_recipes(self) -> None:
+        private = self._recipe("Cudzy", owner=self.other)
+        public = self._recipe("Publiczny", owner=self.other, is_public=True)
+        self.assertEqual(self.client.get("/api/v1/meal-plans/2026-10-13").status_code, 422)
+        self.assertEqual(self._plan(999999).status_code, 404)
+        self.assertEqual(self._plan(private).status_code, 403)
+        self.assertEqual(self._plan(public).status_code, 200)
+        bad_day = self.client.put(f"/api/v1/meal-plans/{MONDAY}", json={"entries": [{"recipe_id": public, "day": 7}]})
+        self.assertEqual(bad_day.status_code, 422)
+
+    def test_shopping_list_aggregates_and_follows_store_route(self) -> None:
+        pancakes = self._recipe("Naleśniki", [("mąki", 200, "g"), ("mleka", 500, "ml"), ("sól", None, None)])
+        bread = self._recipe("Chleb", [("mąka", 500, "g"), ("mąka", 1, "kg"), ("Sól ", None, None)])
+        # Przepis bez wierszy RecipeIngredient: lista z tekstu przepisu.
+        omelette = self._recipe("Omlet", text="200 ml mleka\n\n2 jajka")
+        self.assertEqual(self._plan(pancakes, bread, omelette, pancakes).status_code, 200)
+
+        response = self._shopping_list()
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        items = [(i["ingredient_id"], i["quantity"], i["unit"], i["unquantified_count"]) for i in body["items"]]
+        self.assertEqual(items, [
+            (self.flour.id, 1.9, "kg", 0),  # 2 x 200 g + 500 g + 1 kg
+            (self.milk.id, 1.2, "l", 0),  # 2 x 500 ml + 200 ml z tekstu
+            (None, 2.0, None, 0),  # jajka - poza trasą, po nazwie
+            (None, None, None, 3),  # sól: 2 x naleśniki + chleb
+        ])
+        self.assertEqual(body["items"][1]["recipe_ids"], sorted([pancakes, omelette]))
+        self.assertEqual(body["unassigned_count"], 2)
+
+    def test_shopping_list_scales_servings_and_uses_density(self) -> None:
+        # Mąka ma gęstość 0.53 g/ml: szklanka (250 ml) to 132.5 g. Mleko nie ma
+        # gęstości, więc gramy i mililitry mleka zostają osobno.
+        cake = self._recipe(
+            "Ciasto", [("mąka", 300, "g"), ("mąki", 1, "szklanka"), ("mleko", 100, "g"), ("mleka", 1, "szklanka")],
+            servings=4,
+        )
+        plan = self.client.put(f"/api/v1/meal-plans/{MONDAY}", json={"entries": [
+            {"recipe_id": cake, "day": 0, "servings": 8},
+            {"recipe_id": cake, "day": 3},
+        ]})
+        self.assertEqual([entry["servings"] for entry in plan.json()["entries"]], [8, None])
+
+        items = [(i["ingredient_id"], i["quantity"], i["unit"]) for i in self._shopping_list().json()["items"]]
+        # 8 porcji + 4 porcje = 3 x przepis.
+        self.assertEqual(items, [
+            (self.flour.id, 1.298, "kg"),  # 3 x (300 g + 132.5 g), zaokrąglone do 3 miejsc
+            (self.milk.id, 300.0, "g"),
+            (self.milk.id, 3.0, "szklanka"),  # jedna jednostka zostaje, jak w przepisie
+        ])
+
+    def test_recipe_ingredients_scale_by_servings(self) -> None:
+        soup = self._recipe("Zupa", [("mąka", 600, "g"), ("mleka", 2, "łyżka"), ("sól", None, None)], servings=2)
+        text_only = self._recipe("Omlet", text="3 jajka\n100 ml mleka", servings=1)
+        unknown = self._recipe("Bez porcji", [("mąka", 100, "g")])
+
+        response = self.client.get(f"/api/v1/recipes/{soup}/ingredients/scaled", params={"servings": 4})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(i["name"], i["quantity"], i["unit"]) for i in response.json()["ingredients"]],
+            [("mąka", 1.2, "kg"), ("mleka", 4.0, "łyżka"), ("sól", None, None)],
+        )
+        scaled = self.client.get(f"/api/v1/recipes/{text_only}/ingredients/scaled", params={"servings": 3}).json()
+        self.assertEqual([(i["quantity"], i["unit"]) for i in scaled["ingredients"]], [(9.0, None), (300.0, "ml")])
+        self.assertEqual(
+            self.client.get(f"/api/v1/recipes/{unknown}/ingredients/scaled", params={"servings": 3}).status_code, 422
+        )
+        private = self._recipe("Cudzy", owner=self.other, servings=2)
+        self.assertEqual(
+            self.client.get(f"/api/v1/recipes/{private}/ingredients/scaled", params={"servings": 3}).status_code, 403
+        )
+
+    def test_shopping_list_of_missing_plan_or_store(self) -> None:
+        self.assertEqual(self._shopping_list().json()["items"], [])
+        missing = self.client.get(f"/api/v1/meal-plans/{MONDAY}/shopping-list", params={"store_id": 999999})
+        self.assertEqual(missing.status_code, 404)
+
+    def test_shopping_list_query_count_does_not_grow_with_the_plan(self) -> None:
+        from sqlalchemy import event
+
+        from app.core.database import engine
+        from app.core.request_log_writer import request_log_writer
+
+        submit = mock.patch.object(request_log_writer, "submit")
+        submit.start()
+        self.addCleanup(submit.stop)
+        recipes = [
+            self._recipe(f"Przepis {n}", [("mąka", 100 + n, "g"), ("mleka", 250, "ml"), (f"przyprawa {n}", 1, "szczypta")])
+            for n in range(28)
+        ]
+
+        def statements_for(plan):
+            self.assertEqual(self._plan(*plan).status_code, 200)
+            self._shopping_list()  # rozgrzewa cache trasy i indeks nazw
+            statements = []
+            record = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(engine, "before_cursor_execute", record)
+            try:
+                response = self._shopping_list()
+            finally:
+                event.remove(engine, "before_cursor_execute", record)
+            self.assertEqual(response.status_code, 200)
+            return len(statements), response.json()
+
+        small, _ = statements_for(recipes[:2])
+        large, body = statements_for(recipes)
+        self.assertEqual(large, small)
+        self.assertEqual(body["items"][0]["quantity"], sum(100 + n for n in range(28)) / 1000)
+        self.assertEqual(len(body["items"]), 2 + 28)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,12 +16,18 @@ import unittest
 from pathlib import Path
 from unittest import mock
 
+from app.db.search_index import include_name as include_search_index_name
+
 REPO_ROOT = Path(__file__).resolve().parents[1]
 BASELINE = "41e1afa8db94"
-HEAD = "8b2c3d4e5f61"
+HEAD = "a3b0e1f2c4d5"
 # Musi odpowiadać COMPARISON_OPTIONS w alembic/env.py - inaczej testy mierzyłyby
 # drift inną miarą niż `alembic check` uruchamiany przy wdrożeniu.
-COMPARISON_OPTIONS = {"compare_type": True, "compare_server_default": True}
+COMPARISON_OPTIONS = {
+    "compare_type": True,
+    "compare_server_default": True,
+    "include_name": include_search_index_name,
+}
 EXPECTED_CHAIN = [
     "41e1afa8db94",  # baseline - schemat produkcyjny
     "d17abcef39ac",  # users.language
@@ -32,6 +38,14 @@ EXPECTED_CHAIN = [
     "69eea78ac02c",  # recipe_ingredients.parsed_name
     "7a1c2d4e5f60",  # stores + ingredient.preferred_store_id
     "8b2c3d4e5f61",  # per-store sections + ingredient route placements
+    "9c3d4e5f6a72",  # recipe search index (FTS5 / GIN + pg_trgm)
+    "ad4e5f6a7b83",  # recipes keyset pagination indexes
+    "be5f6a7b8c94",  # stores.layout_version
+    "cf6a7b8c9da5",  # image_download_jobs
+    "d07b8c9daeb6",  # recipes.image_variant_widths
+    "e18c9d0ebfa7",  # meal_plans + meal_plan_entries
+    "f29dae1fc0b8",  # recipes/meal_plan_entries.servings + ingredients.density_g_per_ml
+    "a3b0e1f2c4d5",  # recipes.image index
 ]
 
 
@@ -159,6 +173,9 @@ class EmptyDatabaseLifecycleTests(MigrationTestCase):
                 "store_sections",
                 "stores",
                 "ingredient_store_placements",
+                "image_download_jobs",
+                "meal_plans",
+                "meal_plan_entries",
             },
             self.table_names(),
         )
@@ -169,7 +186,7 @@ class EmptyDatabaseLifecycleTests(MigrationTestCase):
 
         self.assertEqual(self.current_revision(), BASELINE)
         tables = self.table_names()
-        for new_table in ("recipe_translations", "recipe_ingredients", "ingredient_aliases", "store_sections", "stores", "ingredient_store_placements"):
+        for new_table in ("recipe_translations", "recipe_ingredients", "ingredient_aliases", "store_sections", "stores", "ingredient_store_placements", "recipes_fts", "image_download_jobs", "meal_plans", "meal_plan_entries"):
             self.assertNotIn(new_table, tables)
         # Tabele produkcyjne muszą przetrwać rollback.
         for kept in ("users", "recipes", "ingredients", "login_log", "request_log"):
@@ -177,6 +194,9 @@ class EmptyDatabaseLifecycleTests(MigrationTestCase):
 
         self.assertNotIn("language", self.column_names("users"))
         self.assertNotIn("source_url", self.column_names("recipes"))
+        self.assertNotIn("image_variant_widths", self.column_names("recipes"))
+        self.assertNotIn("servings", self.column_names("recipes"))
+        self.assertNotIn("density_g_per_ml", self.column_names("ingredients"))
 
     def test_upgrade_downgrade_upgrade_is_repeatable(self) -> None:
         """Rollback musi dać stan, z którego da się wjechać ponownie - inaczej
@@ -260,6 +280,7 @@ class DriftDetectionTests(MigrationTestCase):
 
         self.assertIn('"compare_server_default": True', source)
         self.assertIn('"compare_type": True', source)
+        self.assertIn('"include_name": include_search_index_name', source)
         # Oba wywołania context.configure() muszą rozpakować ten sam słownik.
         self.assertEqual(source.count("**COMPARISON_OPTIONS"), 2)
 
@@ -289,7 +310,7 @@ class DriftDetectionTests(MigrationTestCase):
         metadata = self._metadata_copy()
         metadata.tables["users"].c.language.server_default = None
 
-        diff = self._diff(metadata, {"compare_type": True, "compare_server_default": False})
+        diff = self._diff(metadata, {**COMPARISON_OPTIONS, "compare_server_default": False})
 
         self.assertEqual(diff, [], f"oczekiwano braku wykrycia bez opcji, dostano: {diff}")
 
@@ -420,6 +441,16 @@ class ProductionFixtureTests(MigrationTestCase):
             self.scalar("SELECT count(*) FROM recipes WHERE imported_at IS NOT NULL"), 0
         )
 
+    def test_existing_recipes_are_indexed_for_search(self) -> None:
+        """Indeks wyszukiwania budowany jest z istniejących wierszy, a tekst
+        przepisów zostaje nietknięty (patrz test_recipe_text_is_not_rewritten)."""
+        self.upgrade("head")
+
+        self.assertEqual(
+            self.scalar("SELECT count(*) FROM recipes_fts WHERE recipes_fts MATCH '\"oliwy\"'"),
+            self.RECIPE_COUNT,
+        )
+
     def test_translations_table_starts_empty(self) -> None:
         """Migracja tworzy schemat, nie dane. Backfill jest osobnym, ręcznym
         krokiem - inaczej wdrożenie schematu modyfikowałoby dane w tym samym,
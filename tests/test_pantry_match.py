@@ -0,0 +1,183 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+def purge_app_modules() -> None:
+    for name in list(sys.modules):
+        if name == "app" or name.startswith("app."):
+            sys.modules.pop(name)
+
+
+class PantryMatchTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.env = mock.patch.dict(os.environ, {
+            "ENV": "dev", "APP_INSTANCE": "dev", "SECRET_KEY": "dev-secret",
+            "DATABASE_URL": f"sqlite:///{Path(self.tmp.name) / 'pantry.db'}",
+            "MEAL_PLANNER_LOAD_ENV_FILE": "0",
+        }, clear=True)
+        self.env.start()
+        from fastapi.testclient import TestClient
+        from app.core.security import get_current_user
+        from app.db.models.ingredient import Ingredient
+        from app.db.models.ingredient_alias import IngredientAlias
+        from app.db.models.user import User
+        from app.services.recipe_ingredient_index import recipe_ingredient_index
+        import app.main as main_module
+
+        self.main = main_module
+        self.index = recipe_ingredient_index
+        self.db = main_module.SessionLocal()
+        self.owner = User(username="pantry-owner", hashed_password="x", role="user")
+        self.other = User(username="pantry-other", hashed_password="x", role="user")
+        self.flour, self.milk, self.eggs = Ingredient(name="mąka"), Ingredient(name="mleko"), Ingredient(name="jajka")
+        self.salt = Ingredient(name="sól", is_essential=False)
+        self.db.add_all([self.owner, self.other, self.flour, self.milk, self.eggs, self.salt])
+        self.db.flush()
+        self.db.add(IngredientAlias(ingredient_id=self.milk.id, alias_text="mleka"))
+        self.db.commit()
+        self.main.app.dependency_overrides[get_current_user] = lambda: self.owner
+        self.client = TestClient(self.main.app)
+
+    def tearDown(self) -> None:
+        self.main.app.dependency_overrides.clear()
+        self.db.close()
+        from app.core.database import engine
+        engine.dispose()
+        self.env.stop()
+        self.tmp.cleanup()
+        purge_app_modules()
+
+    def _recipe(self, name, ingredients, owner=None, is_public=False):
+        """`ingredients`: catalogue Ingredient objects or free-text parsed names."""
+        from app.db.models.recipe import Recipe
+        from app.db.models.recipe_ingredient import RecipeIngredient
+
+        recipe = Recipe(name=name, user_id=(owner or self.owner).id, is_public=is_public)
+        self.db.add(recipe)
+        self.db.flush()
+        for index, item in enumerate(ingredients):
+            linked = not isinstance(item, str)
+            self.db.add(RecipeIngredient(
+                recipe_id=recipe.id,
+                ingredient_id=item.id if linked else None,
+                original_text=item.name if linked else item,
+                parsed_name=None if linked else item,
+                sort_order=index,
+            ))
+        self.db.commit()
+        return recipe.id
+
+    def _match(self, ingredient_ids=(), names=(), limit=20):
+        response = self.client.post(
+            "/api/v1/recipes/pantry-match",
+            json={"ingredient_ids": list(ingredient_ids), "names": list(names), "limit": limit},
+        )
+        self.assertEqual(response.status_code, 200)
+        return [(item["name"], item["covered"], item["required"], item["missing_ingredient_ids"]) for item in response.json()]
+
+    def test_ranks_visible_recipes_by_coverage_of_essential_ingredients(self) -> None:
+        self._recipe("Naleśniki", [self.flour, "mleka", self.eggs, self.salt])
+        self._recipe("Omlet", [self.eggs, self.salt])
+        self._recipe("Chleb", [self.flour, "woda"])
+        self._recipe("Cudzy omlet", [self.eggs], owner=self.other)
+        self._recipe("Publiczne kluski", [self.flour, self.eggs], owner=self.other, is_public=True)
+
+        # Sól jest nieobowiązkowa: nie liczy się ani jako brak, ani jako trafienie.
+        self.assertEqual(self._match([self.eggs.id, self.milk.id, self.salt.id]), [
+            ("Omlet", 1, 1, []),
+            ("Naleśniki", 2, 3, [self.flour.id]),
+            ("Publiczne kluski", 1, 2, [self.flour.id]),
+        ])
+        # "woda" nie ma w katalogu, więc Chleb wymaga tylko mąki; przy równym
+        # pokryciu nowszy przepis idzie pierwszy.
+        self.assertEqual(self._match(names=[" Mąka ", "jajka"], limit=2), [
+            ("Publiczne kluski", 2, 2, []),
+            ("Chleb", 1, 1, []),
+        ])
+        self.assertEqual(self._match([self.salt.id]), [])
+        self.assertEqual(self._match(), [])
+
+    def test_recipe_writes_update_the_index_incrementally(self) -> None:
+        pancakes = self._recipe("Naleśniki", [self.flour, self.milk])
+        others_eggs = self._recipe("Cudze jajka", [self.eggs], owner=self.other)
+        self.assertEqual([m[0] for m in self._match([self.eggs.id, self.flour.id])], ["Naleśniki"])
+        self.assertEqual(self.index.stats()["rebuilds"], 1)
+
+        self._recipe("Omlet", [self.eggs])
+        self.assertEqual(self.client.delete(f"/api/v1/recipes/{pancakes}").status_code, 204)
+        from app.db.models.recipe import Recipe
+
+        self.db.get(Recipe, others_eggs).is_public = True
+        self.db.commit()
+
+        self.assertEqual([m[0] for m in self._match([self.eggs.id, self.flour.id])], ["Omlet", "Cudze jajka"])
+        stats = self.index.stats()
+        self.assertEqual(stats["rebuilds"], 1)
+        self.assertEqual(stats["updates"], 3)
+        self.assertEqual(stats["recipes"], 2)
+
+    def _wait_for_build(self) -> None:
+        with self.index._lock:
+            self.assertTrue(self.index._build_done.wait_for(lambda: not self.index._building, 5))
+
+    def test_catalogue_change_rebuilds_the_index_in_the_background(self) -> None:
+        self._recipe("Naleśniki", [self.flour, self.milk])
+        self.assertEqual(self._match([self.flour.id]), [("Naleśniki", 1, 2, [self.milk.id])])
+
+        self.milk.is_essential = False
+        self.db.commit()
+        # Pierwsze zapytanie po zmianie uruchamia przebudowę i dostaje stary stan.
+        self.assertEqual(self._match([self.flour.id]), [("Naleśniki", 1, 2, [self.milk.id])])
+        self._wait_for_build()
+        self.assertEqual(self._match([self.flour.id]), [("Naleśniki", 1, 1, [])])
+        self.assertEqual(self.index.stats()["rebuilds"], 2)
+
+    def test_stale_queries_share_one_build_and_keep_the_old_snapshot(self) -> None:
+        import threading
+
+        from app.services import recipe_ingredient_index as module
+
+        self._recipe("Naleśniki", [self.flour, self.milk])
+        self._match([self.flour.id])
+        release = threading.Event()
+        full_loads = []
+        real_load = module._load
+
+        def slow_load(db, optional=None, recipe_ids=None):
+            if recipe_ids is None:
+                full_loads.append(threading.get_ident())
+                release.wait(5)
+            return real_load(db, optional, recipe_ids)
+
+        with mock.patch.object(module, "_load", slow_load):
+            self.milk.is_essential = False
+            self.db.commit()
+            # Trwa przebudowa: zapytania nie czekają i widzą poprzedni stan.
+            for _ in range(3):
+                self.assertEqual(self._match([self.flour.id]), [("Naleśniki", 1, 2, [self.milk.id])])
+            self.assertTrue(self.index.stats()["building"])
+            release.set()
+            self._wait_for_build()
+
+        self.assertEqual(len(full_loads), 1)
+        self.assertNotEqual(full_loads[0], threading.get_ident())
+        self.assertEqual(self._match([self.flour.id]), [("Naleśniki", 1, 1, [])])
+        self.assertEqual(self.index.stats()["rebuilds"], 2)
+
+    def test_rolled_back_write_is_not_queued(self) -> None:
+        self._match([self.flour.id])
+        from app.db.models.recipe import Recipe
+
+        self.db.add(Recipe(name="Porzucony", user_id=self.owner.id))
+        self.db.flush()
+        self.db.rollback()
+        self.assertEqual(self.index.stats()["pending"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
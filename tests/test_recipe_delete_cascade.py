@@ -304,11 +304,11 @@ class RecipeDeleteCascadeTests(unittest.TestCase):
         self.db.commit()
         recipe_id = recipe.id
 
-        with mock.patch("app.services.recipe_service.delete_image") as delete_image:
+        with mock.patch("app.utils.image_store.release") as release:
             recipe_service.delete_recipe(self.db, recipe, self.user)
 
         self.assertIsNone(recipe_service.get_recipe_by_id(self.db, recipe_id))
-        delete_image.assert_called_once_with("/static/uploads/recipe-delete-test.webp")
+        release.assert_called_once_with(self.db, "/static/uploads/recipe-delete-test.webp")
 
 
 if __name__ == "__main__":
@@ -151,6 +151,35 @@ class RecipeImportEndpointTests(unittest.TestCase):
         self.assertIn("some_ingredients_need_review", data["warnings"])
         self.assertTrue(data["ingredients"][0]["requires_review"])
 
+    def test_preview_maps_parse_over_cpu_budget_to_parse_timeout(self) -> None:
+        lines = ", ".join(f'"{n} g mąki pszennej typ 650"' for n in range(20000))
+        html = f"""
+        <html><head><script type="application/ld+json">
+        {{"@context":"https://schema.org","@type":"Recipe","name":"Za duży","recipeIngredient":[{lines}]}}
+        </script></head></html>
+        """
+        fake = self._fake_fetch_html(html)
+        with mock.patch("app.api.v1.recipe_import.fetch_html", side_effect=fake), mock.patch(
+            "app.services.recipe_import.parse_pool.PARSE_CPU_SECONDS", 0.05
+        ):
+            response = self.client.post("/api/v1/recipe-import/preview", json={"url": "https://example.com/huge"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], {"error_code": "parse_timeout"})
+
+    def test_preview_maps_a_full_parse_queue_to_503_with_retry_after(self) -> None:
+        from app.services.recipe_import.errors import ParseQueueFullError
+
+        fake = self._fake_fetch_html("<html></html>")
+        with mock.patch("app.api.v1.recipe_import.fetch_html", side_effect=fake), mock.patch(
+            "app.api.v1.recipe_import.parse_pool.parse", side_effect=ParseQueueFullError("queue full")
+        ):
+            response = self.client.post("/api/v1/recipe-import/preview", json={"url": "https://example.com/busy"})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["detail"], {"error_code": "parse_busy"})
+        self.assertEqual(response.headers["retry-after"], "5")
+
     def test_preview_maps_blocked_host_to_400_with_error_code_and_no_leaked_detail(self) -> None:
         from app.services.recipe_import.errors import BlockedHostError
 
@@ -183,6 +212,165 @@ class RecipeImportEndpointTests(unittest.TestCase):
         self.assertTrue(response.json()["preview_token"])
         self.assertNotIn("secret", response.text.lower())
 
+    def test_repeated_preview_is_served_from_cache_with_a_token_per_user(self) -> None:
+        from app.core.security import get_current_user
+        from app.db.models.user import User
+        from app.services.recipe_import.preview_cache import preview_cache
+        from app.services.recipe_import.preview_tokens import verify_preview_token
+
+        other = User(username="second-importer", hashed_password="x", role="user")
+        self.db.add(other)
+        self.db.commit()
+        self.db.refresh(other)
+        self.db.refresh(self.user)
+
+        fake = mock.AsyncMock(side_effect=self._fake_fetch_html(load_fixture("schema_org_recipe.html")))
+        tokens = []
+        with mock.patch("app.api.v1.recipe_import.fetch_html", fake):
+            for user, url in (
+                (self.user, "https://blog.example.com/recipe"),
+                (other, "HTTPS://Blog.Example.com:443/recipe#ingredients"),
+            ):
+                self.main_module.app.dependency_overrides[get_current_user] = lambda user=user: user
+                response = self.client.post("/api/v1/recipe-import/preview", json={"url": url})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()["name"], "Naleśniki")
+                tokens.append(response.json()["preview_token"])
+
+        self.assertEqual(fake.await_count, 1)
+        verify_preview_token(tokens[0], self.user.id, "https://blog.example.com/recipe")
+        verify_preview_token(tokens[1], other.id, "https://blog.example.com/recipe")
+        self.assertEqual(preview_cache.stats(), {
+            "size": 1, "hits": 1, "revalidated": 0, "misses": 1, "hit_ratio": 0.5,
+        })
+
+    def test_stale_preview_is_revalidated_with_upstream_validators(self) -> None:
+        from app.services.recipe_import.fetcher import FetchedPage
+        from app.services.recipe_import.preview_cache import preview_cache
+
+        url = "https://blog.example.com/recipe"
+        first = FetchedPage(
+            url=url, html=load_fixture("schema_org_recipe.html"), content_type="text/html",
+            etag='"v1"', last_modified="Wed, 01 Oct 2025 10:00:00 GMT",
+        )
+        fake = mock.AsyncMock(side_effect=[first, FetchedPage(url=url, html="", content_type="", not_modified=True)])
+        with (
+            mock.patch("app.api.v1.recipe_import.fetch_html", fake),
+            mock.patch.object(preview_cache, "fresh_seconds", 0),
+        ):
+            for _ in range(2):
+                response = self.client.post("/api/v1/recipe-import/preview", json={"url": url})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()["name"], "Naleśniki")
+
+        self.assertEqual(
+            fake.await_args_list[1],
+            mock.call(url, etag='"v1"', last_modified="Wed, 01 Oct 2025 10:00:00 GMT"),
+        )
+        self.assertEqual(preview_cache.stats()["revalidated"], 1)
+
+    def test_no_store_pages_and_failed_fetches_are_not_cached(self) -> None:
+        from app.services.recipe_import.errors import UpstreamFetchError
+        from app.services.recipe_import.fetcher import FetchedPage
+        from app.services.recipe_import.preview_cache import preview_cache
+
+        url = "https://blog.example.com/recipe"
+        page = FetchedPage(url=url, html=load_fixture("schema_org_recipe.html"), content_type="text/html", no_store=True)
+        fake = mock.AsyncMock(side_effect=[UpstreamFetchError("down"), page, page])
+        with mock.patch("app.api.v1.recipe_import.fetch_html", fake):
+            statuses = [
+                self.client.post("/api/v1/recipe-import/preview", json={"url": url}).status_code
+                for _ in range(3)
+            ]
+
+        self.assertEqual(statuses, [400, 200, 200])
+        self.assertEqual(fake.await_count, 3)
+        self.assertEqual(preview_cache.stats()["size"], 0)
+
+    # ---- preview-batch ----
+
+    def _batch(self, urls):
+        import json
+
+        response = self.client.post("/api/v1/recipe-import/preview-batch", json={"urls": urls})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    def test_preview_batch_streams_one_line_per_url_with_error_codes(self) -> None:
+        from app.services.recipe_import.errors import BlockedHostError
+        from app.services.recipe_import.fetcher import FetchedPage
+        from app.services.recipe_import.preview_tokens import verify_preview_token
+
+        async def fake(url):
+            if "evil" in url:
+                raise BlockedHostError("Host resolves to a blocked address: evil.example -> 10.1.2.3")
+            return FetchedPage(url=url, html=load_fixture("schema_org_recipe.html"), content_type="text/html")
+
+        fetch = mock.AsyncMock(side_effect=fake)
+        urls = [
+            "https://blog.example.com/nalesniki",
+            "http://evil.example/x",
+            "https://BLOG.example.com/nalesniki#top",
+        ]
+        with mock.patch("app.api.v1.recipe_import.fetch_html", fetch):
+            lines = self._batch(urls)
+
+        self.assertEqual(fetch.await_count, 2)
+        by_index = {line["index"]: line for line in lines}
+        self.assertEqual(sorted(by_index), [0, 1, 2])
+        self.assertEqual(by_index[1], {"index": 1, "url": urls[1], "preview": None, "error_code": "blocked_host"})
+        for index in (0, 2):
+            self.assertEqual(by_index[index]["url"], urls[index])
+            self.assertIsNone(by_index[index]["error_code"])
+            preview = by_index[index]["preview"]
+            self.assertEqual(preview["name"], "Naleśniki")
+            verify_preview_token(preview["preview_token"], self.user.id, preview["source_url"])
+        self.assertNotIn("10.1.2.3", str(lines))
+
+    def test_preview_batch_respects_global_and_per_host_caps(self) -> None:
+        import asyncio
+
+        from app.services.recipe_import.fetcher import FetchedPage
+        from app.services.recipe_import.http_clients import FetchLimiter
+
+        in_flight: dict[str, int] = {}
+        peaks: dict[str, int] = {}
+
+        async def fake(url):
+            host = url.split("/")[2]
+            in_flight[host] = in_flight.get(host, 0) + 1
+            peaks[host] = max(peaks.get(host, 0), in_flight[host])
+            await asyncio.sleep(0.01)
+            in_flight[host] -= 1
+            return FetchedPage(url=url, html=load_fixture("graph_recipe.html"), content_type="text/html")
+
+        limiter = FetchLimiter(max_concurrent=3, max_per_host=2)
+        urls = [f"https://a.example.com/r/{n}" for n in range(8)] + ["https://b.example.com/r/1", "https://b.example.com/r/2"]
+        with (
+            mock.patch("app.api.v1.recipe_import.fetch_html", side_effect=fake),
+            mock.patch("app.api.v1.recipe_import.batch_fetch_limiter", limiter),
+        ):
+            lines = self._batch(urls)
+
+        self.assertEqual(sorted(line["index"] for line in lines), list(range(len(urls))))
+        self.assertTrue(all(line["preview"] for line in lines))
+        self.assertEqual(limiter.peak_in_flight, 3)
+        # b dostaje drugi slot, gdy tylko zwolni się globalny - stąd <=, nie ==.
+        self.assertEqual(peaks["a.example.com"], 2)
+        self.assertLessEqual(peaks["b.example.com"], 2)
+
+    def test_preview_batch_validates_the_url_list(self) -> None:
+        from app.schemas.recipe_import import MAX_BATCH_URLS
+
+        for urls in ([], ["https://example.com/x"] * (MAX_BATCH_URLS + 1), [""]):
+            response = self.client.post("/api/v1/recipe-import/preview-batch", json={"urls": urls})
+            self.assertEqual(response.status_code, 422)
+
+        self.main_module.app.dependency_overrides.clear()
+        response = self.client.post("/api/v1/recipe-import/preview-batch", json={"urls": ["https://example.com/x"]})
+        self.assertEqual(response.status_code, 401)
+
     def test_confirm_requires_preview_token(self) -> None:
         payload = self._confirm_payload()
         payload.pop("preview_token")
@@ -447,7 +635,9 @@ class RecipeImportEndpointTests(unittest.TestCase):
         async def failing_download(_url):
             raise UpstreamFetchError("boom")
 
-        with mock.patch("app.api.v1.recipe_import.download_and_store_image", side_effect=failing_download):
+        with mock.patch(
+            "app.services.recipe_import.image_jobs.download_and_store_image", side_effect=failing_download
+        ):
             response = self.client.post(
                 "/api/v1/recipe-import/confirm",
                 json=self._confirm_payload(image_url="https://example.com/photo.jpg", download_image=True),
@@ -457,32 +647,34 @@ class RecipeImportEndpointTests(unittest.TestCase):
         data = response.json()
         self.assertEqual(data["recipe"]["image"], "")
         self.assertIn("image_download_failed", data["warnings"])
+        # Pierwsza próba nie wyszła; zadanie czeka na ponowienie.
+        self.assertEqual(data["image_job"]["status"], "pending")
+        self.assertEqual(data["image_job"]["error_code"], "upstream_error")
 
         from app.db.models.recipe import Recipe
 
         recipe = self.db.query(Recipe).filter(Recipe.id == data["recipe"]["id"]).first()
         self.assertIsNotNone(recipe)  # the recipe itself must still be saved
 
-    def test_confirm_deletes_downloaded_image_if_recipe_save_fails(self) -> None:
-        async def fake_download(_url):
-            return "/static/uploads/fake-during-test.jpg"
-
-        with mock.patch("app.api.v1.recipe_import.download_and_store_image", side_effect=fake_download):
-            with mock.patch("app.api.v1.recipe_import.delete_stored_image") as delete_mock:
-                with mock.patch(
-                    "app.services.recipe_service.create_recipe_from_import", side_effect=RuntimeError("db exploded")
-                ):
-                    with mock.patch("sqlalchemy.orm.Session.rollback") as rollback_mock:
-                        response = self.client.post(
-                            "/api/v1/recipe-import/confirm",
-                            json=self._confirm_payload(
-                                image_url="https://example.com/photo.jpg", download_image=True
-                            ),
-                        )
+    def test_confirm_does_not_download_image_if_recipe_save_fails(self) -> None:
+        from app.db.models.image_download_job import ImageDownloadJob
+
+        download = mock.AsyncMock(return_value="/static/uploads/fake-during-test.jpg")
+        with mock.patch("app.services.recipe_import.image_jobs.download_and_store_image", download):
+            with mock.patch(
+                "app.services.recipe_service.create_recipe_from_import", side_effect=RuntimeError("db exploded")
+            ):
+                with mock.patch("sqlalchemy.orm.Session.rollback") as rollback_mock:
+                    response = self.client.post(
+                        "/api/v1/recipe-import/confirm",
+                        json=self._confirm_payload(image_url="https://example.com/photo.jpg", download_image=True),
+                    )
         self.assertEqual(response.status_code, 500)
         self.assertEqual(response.json()["detail"]["error_code"], "recipe_persistence_failed")
         rollback_mock.assert_called_once()
-        delete_mock.assert_called_once_with("/static/uploads/fake-during-test.jpg")
+        # Zdjęcie pobiera dopiero zadanie zapisane razem z przepisem.
+        download.assert_not_called()
+        self.assertEqual(self.db.query(ImageDownloadJob).count(), 0)
 
     def test_old_recipe_crud_still_works_alongside_import(self) -> None:
         # Confirms importing a recipe doesn't interfere with the pre-existing
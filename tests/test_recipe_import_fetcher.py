@@ -15,6 +15,7 @@ from app.services.recipe_import.errors import (
     UpstreamFetchError,
 )
 from app.services.recipe_import.fetcher import _resolve_and_validate, _validate_url
+from app.services.recipe_import.http_clients import HostClientPool
 
 
 class ValidateUrlTests(unittest.TestCase):
@@ -59,59 +60,62 @@ class ValidateUrlTests(unittest.TestCase):
             _validate_url("https://example.com@127.0.0.1/recipe")
 
 
-class ResolveAndValidateTests(unittest.TestCase):
+class ResolveAndValidateTests(unittest.IsolatedAsyncioTestCase):
     """No real network calls: literal IPs and 'localhost' resolve without DNS,
     and everything else is mocked via socket.getaddrinfo."""
 
-    def test_blocks_localhost(self) -> None:
+    def setUp(self) -> None:
+        fetcher.dns_cache.clear()
+
+    async def test_blocks_localhost(self) -> None:
         with self.assertRaises(BlockedHostError):
-            _resolve_and_validate("localhost")
+            await _resolve_and_validate("localhost")
 
-    def test_blocks_loopback_ipv4(self) -> None:
+    async def test_blocks_loopback_ipv4(self) -> None:
         with self.assertRaises(BlockedHostError):
-            _resolve_and_validate("127.0.0.1")
+            await _resolve_and_validate("127.0.0.1")
 
-    def test_blocks_loopback_ipv6(self) -> None:
+    async def test_blocks_loopback_ipv6(self) -> None:
         with self.assertRaises(BlockedHostError):
-            _resolve_and_validate("::1")
+            await _resolve_and_validate("::1")
 
-    def test_blocks_cloud_metadata_address(self) -> None:
+    async def test_blocks_cloud_metadata_address(self) -> None:
         with self.assertRaises(BlockedHostError):
-            _resolve_and_validate("169.254.169.254")
+            await _resolve_and_validate("169.254.169.254")
 
-    def test_blocks_private_ipv4_ranges(self) -> None:
+    async def test_blocks_private_ipv4_ranges(self) -> None:
         for ip in ("10.0.0.5", "172.16.0.5", "192.168.1.5"):
             with self.assertRaises(BlockedHostError):
-                _resolve_and_validate(ip)
+                await _resolve_and_validate(ip)
 
-    def test_blocks_ipv6_unique_local_and_link_local(self) -> None:
+    async def test_blocks_ipv6_unique_local_and_link_local(self) -> None:
         for ip in ("fd00::1", "fe80::1"):
             with self.assertRaises(BlockedHostError):
-                _resolve_and_validate(ip)
+                await _resolve_and_validate(ip)
 
-    def test_blocks_ipv6_mapped_loopback_and_unspecified(self) -> None:
+    async def test_blocks_ipv6_mapped_loopback_and_unspecified(self) -> None:
         for ip in ("::1", "::"):
             with self.assertRaises(BlockedHostError):
-                _resolve_and_validate(ip)
+                await _resolve_and_validate(ip)
 
-    def test_blocks_shared_address_space(self) -> None:
+    async def test_blocks_shared_address_space(self) -> None:
         with self.assertRaises(BlockedHostError):
-            _resolve_and_validate("100.64.0.1")
+            await _resolve_and_validate("100.64.0.1")
 
-    def test_dns_resolution_failure_is_blocked_not_crashed(self) -> None:
+    async def test_dns_resolution_failure_is_blocked_not_crashed(self) -> None:
         with mock.patch("socket.getaddrinfo", side_effect=socket.gaierror("no such host")):
             with self.assertRaises(BlockedHostError):
-                _resolve_and_validate("this-domain-does-not-resolve.invalid")
+                await _resolve_and_validate("this-domain-does-not-resolve.invalid")
 
-    def test_allows_and_returns_a_hostname_resolving_to_a_public_address(self) -> None:
+    async def test_allows_and_returns_a_hostname_resolving_to_a_public_address(self) -> None:
         fake_addrinfo = [
             (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.216.34", 0)),
         ]
         with mock.patch("socket.getaddrinfo", return_value=fake_addrinfo):
-            resolved = _resolve_and_validate("recipes.example.com")
+            resolved = await _resolve_and_validate("recipes.example.com")
         self.assertEqual(resolved, "93.184.216.34")
 
-    def test_blocks_hostname_when_any_resolved_address_is_private(self) -> None:
+    async def test_blocks_hostname_when_any_resolved_address_is_private(self) -> None:
         # Defense against multi-A-record bypass: one public + one private IP
         # must still be blocked, not just the first one checked.
         fake_addrinfo = [
@@ -120,25 +124,25 @@ class ResolveAndValidateTests(unittest.TestCase):
         ]
         with mock.patch("socket.getaddrinfo", return_value=fake_addrinfo):
             with self.assertRaises(BlockedHostError):
-                _resolve_and_validate("sneaky.example.com")
+                await _resolve_and_validate("sneaky.example.com")
 
-    def test_blocks_hostname_when_private_address_comes_first(self) -> None:
+    async def test_blocks_hostname_when_private_address_comes_first(self) -> None:
         fake_addrinfo = [
             (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", 0)),
             (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.216.34", 0)),
         ]
         with mock.patch("socket.getaddrinfo", return_value=fake_addrinfo):
             with self.assertRaises(BlockedHostError):
-                _resolve_and_validate("sneaky2.example.com")
+                await _resolve_and_validate("sneaky2.example.com")
 
-    def test_blocks_ipv6_private_address_mixed_with_public_ipv4(self) -> None:
+    async def test_blocks_ipv6_private_address_mixed_with_public_ipv4(self) -> None:
         fake_addrinfo = [
             (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.216.34", 0)),
             (socket.AF_INET6, socket.SOCK_STREAM, 6, "", ("fd00::1", 0, 0, 0)),
         ]
         with mock.patch("socket.getaddrinfo", return_value=fake_addrinfo):
             with self.assertRaises(BlockedHostError):
-                _resolve_and_validate("dual-stack-sneaky.example.com")
+                await _resolve_and_validate("dual-stack-sneaky.example.com")
 
 
 class FakeStreamResponse:
@@ -208,6 +212,9 @@ class FetchHtmlBehaviorTests(unittest.IsolatedAsyncioTestCase):
             async def __aexit__(self, *args):
                 return None
 
+            async def aclose(self):
+                return None
+
             def stream(self, *args, **kwargs):
                 response = FakeStreamResponse(
                     status_code=200,
@@ -333,6 +340,81 @@ class FetchHtmlBehaviorTests(unittest.IsolatedAsyncioTestCase):
             with self.assertRaises(FetchTimeoutError):
                 await fetcher.fetch_html("https://example.com/slow")
 
+    def _recipe_page_chunks(self) -> list[bytes]:
+        head = (
+            '<html><head><script type="application/ld+json">'
+            '{"@type": "Recipe", "name": "Naleśniki", "recipeIngredient": ["2 jajka"]}'
+            "</script></head><body>"
+        ).encode()
+        split = head.index("ś".encode()) + 1  # granica kawałka w środku znaku UTF-8
+        return [head[:split], head[split:]] + [b"<p>komentarze</p>" * 4000] * 40
+
+    async def test_stops_reading_after_the_recipe_block(self) -> None:
+        chunks = self._recipe_page_chunks()
+        read = []
+
+        class CountingResponse(FakeStreamResponse):
+            async def aiter_bytes(self):
+                for chunk in self._chunks:
+                    read.append(chunk)
+                    yield chunk
+
+        response = CountingResponse(headers={"content-type": "text/html; charset=utf-8"}, chunks=chunks)
+        with mock.patch("httpx.AsyncClient.stream", return_value=FakeStreamCM(response)):
+            page = await fetcher.fetch_html("https://example.com/nalesniki")
+
+        self.assertTrue(page.stopped_early)
+        self.assertEqual(len(read), 2)
+        self.assertIn("Naleśniki", page.html)
+        self.assertNotIn("komentarze", page.html)
+
+    async def test_reads_the_whole_page_without_a_recipe_block_or_when_disabled(self) -> None:
+        chunks = self._recipe_page_chunks()
+        full = b"".join(chunks).decode()
+        for html_chunks, stop_at_recipe in ((chunks[2:], True), (chunks, False)):
+            response = FakeStreamResponse(headers={"content-type": "text/html"}, chunks=html_chunks)
+            with mock.patch("httpx.AsyncClient.stream", return_value=FakeStreamCM(response)):
+                page = await fetcher.fetch_html("https://example.com/post", stop_at_recipe=stop_at_recipe)
+            self.assertFalse(page.stopped_early)
+            self.assertEqual(page.html, b"".join(html_chunks).decode())
+        self.assertEqual(page.html, full)
+
+    async def test_validators_make_a_conditional_get_and_304_is_not_modified(self) -> None:
+        sent = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            sent.append(request.headers)
+            return httpx.Response(304)
+
+        real_client = httpx.AsyncClient
+        mocked_client = lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs)
+        with mock.patch.object(fetcher, "host_clients", HostClientPool(timeout=fetcher.TIMEOUT_SECONDS)), \
+                mock.patch.object(httpx, "AsyncClient", mocked_client):
+            page = await fetcher.fetch_html(
+                "https://example.com/recipe", etag='"v1"', last_modified="Wed, 14 Oct 2026 08:00:00 GMT"
+            )
+            await fetcher.host_clients.aclose()
+
+        self.assertEqual(sent[0]["if-none-match"], '"v1"')
+        self.assertEqual(sent[0]["if-modified-since"], "Wed, 14 Oct 2026 08:00:00 GMT")
+        self.assertEqual(sent[0]["host"], "example.com")
+        self.assertTrue(page.not_modified)
+        self.assertEqual(page.html, "")
+
+    async def test_no_validators_means_an_unconditional_get(self) -> None:
+        captured = {}
+
+        def fake_stream(method, url, *, headers=None, extensions=None, **kwargs):
+            captured["headers"] = dict(headers or {})
+            return FakeStreamCM(FakeStreamResponse(
+                status_code=200, headers={"content-type": "text/html"}, chunks=[b"<html>ok</html>"]
+            ))
+
+        with mock.patch("httpx.AsyncClient.stream", side_effect=fake_stream):
+            await fetcher.fetch_html("https://example.com/recipe")
+        self.assertNotIn("If-None-Match", captured["headers"])
+        self.assertNotIn("If-Modified-Since", captured["headers"])
+
     async def test_non_200_status_raises_upstream_error(self) -> None:
         response = FakeStreamResponse(status_code=500, headers={"content-type": "text/html"})
         with mock.patch("httpx.AsyncClient.stream", return_value=FakeStreamCM(response)):
@@ -347,6 +429,9 @@ class DnsRebindingMitigationTests(unittest.IsolatedAsyncioTestCase):
     an in-flight fetch, because nothing re-resolves the hostname at connect
     time (httpx connects to the literal IP already baked into the URL)."""
 
+    def setUp(self) -> None:
+        fetcher.dns_cache.clear()
+
     async def test_getaddrinfo_is_called_exactly_once_per_attempt(self) -> None:
         call_count = {"n": 0}
         real_getaddrinfo = socket.getaddrinfo
@@ -402,5 +487,96 @@ class DnsRebindingMitigationTests(unittest.IsolatedAsyncioTestCase):
         self.assertNotIn("10.0.0.1", captured_url["value"])
 
 
+class SharedClientAndDnsCacheTests(unittest.IsolatedAsyncioTestCase):
+    """The DNS cache may skip getaddrinfo, never the address check; clients
+    are shared per hostname, never across hostnames on the same IP."""
+
+    def setUp(self) -> None:
+        fetcher.dns_cache.clear()
+        self.pool = HostClientPool(timeout=fetcher.TIMEOUT_SECONDS, max_clients=2)
+        self._pool_patch = mock.patch.object(fetcher, "host_clients", self.pool)
+        self._pool_patch.start()
+
+    async def asyncTearDown(self) -> None:
+        await self.pool.aclose()
+
+    def tearDown(self) -> None:
+        self._pool_patch.stop()
+        fetcher.dns_cache.clear()
+
+    async def test_cached_answer_is_re_validated_on_every_use(self) -> None:
+        public = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.216.34", 0))]
+        private = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", 0))]
+        with mock.patch("socket.getaddrinfo", side_effect=[public, private]) as getaddrinfo:
+            self.assertEqual(await _resolve_and_validate("cached.example.com"), "93.184.216.34")
+            self.assertEqual(await _resolve_and_validate("cached.example.com"), "93.184.216.34")
+            for _ in range(2):
+                with self.assertRaises(BlockedHostError):
+                    await _resolve_and_validate("cached-private.example.com")
+        self.assertEqual(getaddrinfo.call_count, 2)
+        self.assertEqual(fetcher.dns_cache.stats()["hits"], 2)
+
+    async def test_resolution_failures_are_not_cached(self) -> None:
+        with mock.patch("socket.getaddrinfo", side_effect=socket.gaierror("no such host")) as getaddrinfo:
+            for _ in range(2):
+                with self.assertRaises(BlockedHostError):
+                    await _resolve_and_validate("flaky.example.com")
+        self.assertEqual(getaddrinfo.call_count, 2)
+
+    async def test_page_and_image_fetch_share_one_client_per_host(self) -> None:
+        page = FakeStreamResponse(status_code=200, headers={"content-type": "text/html"}, chunks=[b"<html></html>"])
+        image = FakeStreamResponse(
+            status_code=200, headers={"content-type": "image/png"}, chunks=[b"\x89PNG\r\n\x1a\n"]
+        )
+        with (
+            mock.patch.object(fetcher, "_resolve_and_validate", return_value="93.184.216.34"),
+            mock.patch("httpx.AsyncClient.stream", side_effect=[FakeStreamCM(page), FakeStreamCM(image)]),
+        ):
+            await fetcher.fetch_html("https://example.com/recipe")
+            await fetcher.fetch_image("https://example.com/photo.png")
+        self.assertEqual(self.pool.stats(), {"clients": 1, "in_use": 0, "created": 1, "reused": 1})
+
+    async def test_hostnames_sharing_an_address_never_share_a_client(self) -> None:
+        first = await self.pool.acquire("https", "a.example.com", 443)
+        self.assertIs(await self.pool.acquire("https", "A.example.com", 443), first)
+        others = [
+            await self.pool.acquire("https", "b.example.com", 443),
+            await self.pool.acquire("http", "a.example.com", 80),
+        ]
+        self.assertTrue(all(other is not first for other in others))
+        for client in (first, first, *others):
+            await self.pool.release(client)
+        # max_clients=2: the least recently used client is closed, not leaked.
+        self.assertTrue(first.is_closed)
+        self.assertEqual(self.pool.stats()["clients"], 2)
+
+    async def test_eviction_waits_for_the_fetch_that_holds_the_client(self) -> None:
+        slow = await self.pool.acquire("https", "slow.example.com", 443)
+        for host in ("a.example.com", "b.example.com"):
+            await self.pool.release(await self.pool.acquire("https", host, 443))
+        # Evicted from the pool, but its stream is still being read.
+        self.assertFalse(slow.is_closed)
+        self.assertEqual(self.pool.stats(), {"clients": 2, "in_use": 1, "created": 3, "reused": 0})
+        await self.pool.release(slow)
+        self.assertTrue(slow.is_closed)
+        self.assertEqual(self.pool.stats()["in_use"], 0)
+
+    async def test_a_failed_fetch_releases_its_client(self) -> None:
+        with (
+            mock.patch.object(fetcher, "_resolve_and_validate", return_value="93.184.216.34"),
+            mock.patch("httpx.AsyncClient.stream", side_effect=httpx.ConnectError("refused")),
+        ):
+            with self.assertRaises(UpstreamFetchError):
+                await fetcher.fetch_html("https://example.com/recipe")
+        self.assertEqual(self.pool.stats()["in_use"], 0)
+
+    async def test_new_event_loop_closes_the_idle_clients_of_the_old_one(self) -> None:
+        idle = await self.pool.acquire("https", "a.example.com", 443)
+        await self.pool.release(idle)
+        self.pool._loop = None  # jak po zamknięciu pętli TestClienta
+        await self.pool.release(await self.pool.acquire("https", "b.example.com", 443))
+        self.assertTrue(idle.is_closed)
+        self.assertEqual(self.pool.stats()["clients"], 1)
+
 if __name__ == "__main__":
     unittest.main()
@@ -65,6 +65,9 @@ class FetchImageTests(unittest.IsolatedAsyncioTestCase):
             async def __aexit__(self, *args):
                 return None
 
+            async def aclose(self):
+                return None
+
             def stream(self, *args, **kwargs):
                 return FakeStreamCM(FakeStreamResponse(
                     headers={"content-type": "image/jpeg"}, chunks=[JPEG_MAGIC]
@@ -0,0 +1,302 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+
+def purge_app_modules() -> None:
+    for name in list(sys.modules):
+        if name == "app" or name.startswith("app."):
+            sys.modules.pop(name)
+
+
+class ImageDownloadJobTests(unittest.TestCase):
+    """Kolejka pobierania zdjęć importu: ponowienia z backoffem, podpinanie
+    obrazu, endpoint statusu i runner w lifespanie. Pobieranie jest zawsze
+    mockowane (tam, gdzie importuje je image_jobs)."""
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self._env_patch = mock.patch.dict(
+            os.environ,
+            {
+                "ENV": "dev",
+                "APP_INSTANCE": "dev",
+                "SECRET_KEY": "dev-secret",
+                "DATABASE_URL": f"sqlite:///{Path(self._tmpdir.name) / 'image_jobs.db'}",
+                "MEAL_PLANNER_LOAD_ENV_FILE": "0",
+            },
+            clear=True,
+        )
+        self._env_patch.start()
+
+        import app.main as main_module
+        from fastapi.testclient import TestClient
+
+        from app.core.database import SessionLocal
+        from app.core.security import get_current_user
+        from app.db.models.user import User
+        from app.services.recipe_import import image_jobs
+
+        self.main_module = main_module
+        self.image_jobs = image_jobs
+        self.db = SessionLocal()
+        self.user = User(username="importer", hashed_password="x", role="user")
+        self.other = User(username="someone-else", hashed_password="x", role="user")
+        self.db.add_all([self.user, self.other])
+        self.db.commit()
+        self.db.refresh(self.user)
+        self.db.refresh(self.other)
+
+        self.current_user = self.user
+        main_module.app.dependency_overrides[get_current_user] = lambda: self.current_user
+        self.client = TestClient(main_module.app)
+
+    def tearDown(self) -> None:
+        self.main_module.app.dependency_overrides.clear()
+        self.db.close()
+        from app.core.database import engine
+
+        engine.dispose()
+        self._env_patch.stop()
+        self._tmpdir.cleanup()
+        purge_app_modules()
+
+    def _recipe_with_job(self, image: str = ""):
+        from app.db.models.recipe import Recipe
+
+        recipe = Recipe(name="Placki", image=image, user_id=self.user.id)
+        self.db.add(recipe)
+        self.db.flush()
+        job = self.image_jobs.enqueue(self.db, recipe.id, "https://example.com/photo.jpg")
+        self.db.commit()
+        return recipe, job
+
+    def _confirm(self, url: str = "https://blog.example.com/placki"):
+        from app.services.recipe_import.preview_tokens import issue_preview_token
+
+        return self.client.post(
+            "/api/v1/recipe-import/confirm",
+            json={
+                "preview_token": issue_preview_token(self.user.id, url),
+                "source_url": url,
+                "name": "Placki",
+                "image_url": "https://example.com/photo.jpg",
+                "download_image": True,
+            },
+        )
+
+    def test_failed_attempts_back_off_then_give_up(self) -> None:
+        from app.services.recipe_import.errors import UpstreamFetchError
+
+        recipe, job = self._recipe_with_job()
+        download = mock.AsyncMock(side_effect=UpstreamFetchError("boom"))
+        with mock.patch("app.services.recipe_import.image_jobs.download_and_store_image", download):
+            for attempt in range(1, self.image_jobs.MAX_ATTEMPTS):
+                before = datetime.utcnow()
+                status = asyncio.run(self.image_jobs.run_job(job.id))
+                self.assertEqual(status, self.image_jobs.STATUS_PENDING)
+                self.db.refresh(job)
+                self.assertEqual(job.attempts, attempt)
+                self.assertEqual(job.error_code, "upstream_error")
+                self.assertGreaterEqual(job.next_attempt_at, before + self.image_jobs.retry_delay(attempt))
+
+            # Opóźnienia rosną: 30 s, 5 min, 30 min.
+            delays = [self.image_jobs.retry_delay(n) for n in range(1, self.image_jobs.MAX_ATTEMPTS)]
+            self.assertEqual(delays, sorted(delays))
+
+            status = asyncio.run(self.image_jobs.run_job(job.id))
+        self.assertEqual(status, self.image_jobs.STATUS_FAILED)
+        self.db.refresh(job)
+        self.assertEqual(job.attempts, self.image_jobs.MAX_ATTEMPTS)
+        self.assertEqual(download.await_count, self.image_jobs.MAX_ATTEMPTS)
+
+        # Zakończone zadanie nie jest przejmowane ponownie.
+        self.assertIsNone(asyncio.run(self.image_jobs.run_job(job.id)))
+        self.db.refresh(recipe)
+        self.assertEqual(recipe.image, "")
+
+    def test_backoff_hides_job_from_runner_until_due(self) -> None:
+        from app.services.recipe_import.errors import UpstreamFetchError
+
+        _recipe, job = self._recipe_with_job()
+        self.assertEqual(self.image_jobs._due_job_ids(self.db, 10), [job.id])
+        download = mock.AsyncMock(side_effect=UpstreamFetchError("boom"))
+        with mock.patch("app.services.recipe_import.image_jobs.download_and_store_image", download):
+            asyncio.run(self.image_jobs.run_job(job.id))
+        self.assertEqual(self.image_jobs._due_job_ids(self.db, 10), [])
+
+        self.db.refresh(job)
+        job.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        self.db.commit()
+        self.assertEqual(self.image_jobs._due_job_ids(self.db, 10), [job.id])
+
+    def test_image_pillow_cannot_process_fails_the_job_without_storing_it(self) -> None:
+        from app.services.recipe_import.fetcher import FetchedImage
+        from app.utils import file_utils
+
+        uploads = Path(self._tmpdir.name) / "uploads"
+        uploads.mkdir()
+        recipe, job = self._recipe_with_job()
+        broken = FetchedImage(
+            content=b"\xff\xd8\xff" + b"not really a jpeg", content_type="image/jpeg", extension="jpg"
+        )
+        with mock.patch(
+            "app.services.recipe_import.image_storage.fetch_image", mock.AsyncMock(return_value=broken)
+        ), mock.patch.object(file_utils, "UPLOAD_DIR", uploads):
+            status = asyncio.run(self.image_jobs.run_job(job.id))
+
+        self.assertEqual(status, self.image_jobs.STATUS_PENDING)
+        self.db.refresh(job)
+        self.db.refresh(recipe)
+        self.assertEqual(job.error_code, "invalid_image")
+        self.assertEqual(recipe.image, "")
+        self.assertEqual([p for p in uploads.rglob("*") if p.is_file()], [])
+
+    def test_downloaded_image_never_replaces_existing_one(self) -> None:
+        recipe, job = self._recipe_with_job(image="/static/uploads/chosen-by-user.jpg")
+        download = mock.AsyncMock(return_value="/static/uploads/downloaded.jpg")
+        with mock.patch("app.services.recipe_import.image_jobs.download_and_store_image", download), mock.patch(
+            "app.utils.image_store.release"
+        ) as release:
+            status = asyncio.run(self.image_jobs.run_job(job.id))
+
+        self.assertEqual(status, self.image_jobs.STATUS_DONE)
+        self.db.refresh(recipe)
+        self.assertEqual(recipe.image, "/static/uploads/chosen-by-user.jpg")
+        release.assert_called_once_with(mock.ANY, "/static/uploads/downloaded.jpg")
+
+    def test_only_jobs_past_their_lease_are_requeued(self) -> None:
+        _recipe, stale = self._recipe_with_job()
+        _recipe, live = self._recipe_with_job()
+        for job in (stale, live):
+            job.status = self.image_jobs.STATUS_RUNNING
+            job.attempts = 1
+        stale.updated_at = datetime.utcnow() - timedelta(seconds=self.image_jobs.LEASE_SECONDS + 1)
+        self.db.commit()
+
+        # Świeże running należy do innego, żywego workera - nie ruszamy go.
+        self.assertEqual(self.image_jobs._requeue_interrupted(self.db), 1)
+        self.db.refresh(stale)
+        self.db.refresh(live)
+        self.assertEqual(stale.status, self.image_jobs.STATUS_PENDING)
+        self.assertEqual(stale.attempts, 1)
+        self.assertEqual(live.status, self.image_jobs.STATUS_RUNNING)
+
+    def test_requeued_attempt_cannot_be_finished_by_its_old_owner(self) -> None:
+        recipe, job = self._recipe_with_job()
+        attempt_path = "/static/uploads/spozniony.jpg"
+
+        async def slow_download(url):
+            # Dzierżawa wygasła, a zadanie przejął inny proces.
+            with self.image_jobs.SessionLocal() as db:
+                db.query(self.image_jobs.ImageDownloadJob).update({"attempts": 2})
+                db.commit()
+            return attempt_path
+
+        with mock.patch("app.services.recipe_import.image_jobs.download_and_store_image", slow_download), \
+                mock.patch("app.utils.image_store.release") as release:
+            self.assertIsNone(asyncio.run(self.image_jobs.run_job(job.id)))
+        release.assert_called_once_with(mock.ANY, attempt_path)
+        self.db.refresh(recipe)
+        self.assertEqual(recipe.image, "")
+
+    def test_database_work_runs_off_the_event_loop_thread(self) -> None:
+        import threading
+
+        _recipe, job = self._recipe_with_job()
+        threads = []
+        real_claim, real_attach = self.image_jobs._claim, self.image_jobs._attach
+
+        def record(fn):
+            def wrapper(*args):
+                threads.append(threading.get_ident())
+                return fn(*args)
+            return wrapper
+
+        download = mock.AsyncMock(return_value="/static/uploads/watek.jpg")
+        with mock.patch("app.services.recipe_import.image_jobs.download_and_store_image", download), \
+                mock.patch.object(self.image_jobs, "_claim", record(real_claim)), \
+                mock.patch.object(self.image_jobs, "_attach", record(real_attach)), \
+                mock.patch.object(self.image_jobs, "_due_job_ids", record(self.image_jobs._due_job_ids)):
+            processed = asyncio.run(self.image_jobs.ImageJobRunner().run_due())
+        self.assertEqual(processed, 1)
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_job_status_is_visible_to_recipe_owner_only(self) -> None:
+        download = mock.AsyncMock(return_value="/static/uploads/placki.jpg")
+        with mock.patch("app.services.recipe_import.image_jobs.download_and_store_image", download):
+            response = self._confirm()
+        self.assertEqual(response.status_code, 200, response.text)
+        data = response.json()
+        self.assertEqual(data["warnings"], [])
+        self.assertEqual(data["recipe"]["image"], "/static/uploads/placki.jpg")
+        job_id = data["image_job"]["id"]
+
+        status = self.client.get(f"/api/v1/recipe-import/image-jobs/{job_id}")
+        self.assertEqual(status.status_code, 200)
+        self.assertEqual(status.json()["status"], "done")
+        self.assertEqual(status.json()["image"], "/static/uploads/placki.jpg")
+
+        self.current_user = self.other
+        hidden = self.client.get(f"/api/v1/recipe-import/image-jobs/{job_id}")
+        self.assertEqual(hidden.status_code, 404)
+        self.assertEqual(hidden.json()["detail"]["error_code"], "image_job_not_found")
+        self.assertEqual(self.client.get("/api/v1/recipe-import/image-jobs/999999").status_code, 404)
+
+    def test_confirm_without_image_creates_no_job(self) -> None:
+        from app.db.models.image_download_job import ImageDownloadJob
+        from app.services.recipe_import.preview_tokens import issue_preview_token
+
+        url = "https://blog.example.com/bez-zdjecia"
+        response = self.client.post(
+            "/api/v1/recipe-import/confirm",
+            json={
+                "preview_token": issue_preview_token(self.user.id, url),
+                "source_url": url,
+                "name": "Bez zdjęcia",
+                "image_url": "https://example.com/photo.jpg",
+                "download_image": False,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["image_job"])
+        self.assertEqual(self.db.query(ImageDownloadJob).count(), 0)
+
+    def test_running_runner_attaches_image_after_confirm_returns(self) -> None:
+        from app.services.recipe_import.image_jobs import image_job_runner
+
+        download = mock.AsyncMock(return_value="/static/uploads/w-tle.jpg")
+        with mock.patch("app.services.recipe_import.image_jobs.download_and_store_image", download):
+            with self.client:  # lifespan: runner startuje
+                self.assertTrue(image_job_runner.running)
+                response = self._confirm()
+                self.assertEqual(response.status_code, 200, response.text)
+                data = response.json()
+                self.assertIn("image_download_queued", data["warnings"])
+                self.assertEqual(data["recipe"]["image"], "")
+
+                job_id = data["image_job"]["id"]
+                deadline = time.monotonic() + 5
+                while time.monotonic() < deadline:
+                    job = self.client.get(f"/api/v1/recipe-import/image-jobs/{job_id}").json()
+                    if job["status"] == "done":
+                        break
+                    time.sleep(0.05)
+            self.assertFalse(image_job_runner.running)
+
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["image"], "/static/uploads/w-tle.jpg")
+        recipe = self.client.get(f"/api/v1/recipes/{data['recipe']['id']}").json()
+        self.assertEqual(recipe["image"], "/static/uploads/w-tle.jpg")
+        self.assertEqual(image_job_runner.stats()["succeeded"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+def purge_app_modules() -> None:
+    for name in list(sys.modules):
+        if name == "app" or name.startswith("app."):
+            sys.modules.pop(name)
+
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "recipe_import"
+SOURCE_URL = "https://blog.example.com/zupa"
+
+
+def huge_recipe_page(lines: int = 20000) -> str:
+    ingredients = ", ".join(f'"{n} g mąki pszennej typ 650"' for n in range(lines))
+    return (
+        '<html><head><script type="application/ld+json">'
+        f'{{"@type":"Recipe","name":"Za duży","recipeIngredient":[{ingredients}]}}'
+        "</script></head></html>"
+    )
+
+
+class ParsePoolTests(unittest.TestCase):
+    """Parsowanie w procesach potomnych: wynik jak w procesie aplikacji,
+    limit CPU na stronę i limit kolejki."""
+
+    def setUp(self) -> None:
+        # Procesy robocze odszukują funkcje po nazwie modułu, więc pula musi
+        # pochodzić z modułu aktualnie zarejestrowanego w sys.modules.
+        purge_app_modules()
+        from app.services.recipe_import import parse_pool
+
+        self.parse_pool = parse_pool
+        self.pool = parse_pool.ParsePool(workers=1, queue_limit=2)
+        self.addCleanup(purge_app_modules)
+        self.addCleanup(self.pool.shutdown)
+        self.html = (FIXTURES_DIR / "schema_org_recipe.html").read_text(encoding="utf-8")
+
+    def test_worker_result_matches_in_process_parse(self) -> None:
+        draft, ingredients = asyncio.run(self.pool.parse(self.html, SOURCE_URL))
+
+        expected_draft, expected_ingredients = self.parse_pool.parse_import_page(self.html, SOURCE_URL)
+        self.assertEqual(draft, expected_draft)
+        self.assertEqual(ingredients, expected_ingredients)
+        self.assertEqual(self.pool.stats()["parsed"], 1)
+        self.assertEqual(self.pool.stats()["in_flight"], 0)
+
+    def test_page_over_cpu_budget_times_out_and_worker_survives(self) -> None:
+        from app.services.recipe_import.errors import ParseTimeoutError, error_code_for
+
+        async def scenario():
+            with mock.patch.object(self.parse_pool, "PARSE_CPU_SECONDS", 0.05):
+                with self.assertRaises(ParseTimeoutError) as raised:
+                    await self.pool.parse(huge_recipe_page(), SOURCE_URL)
+            self.assertEqual(error_code_for(raised.exception), "parse_timeout")
+            # Ten sam proces roboczy parsuje następną stronę.
+            draft, _ = await self.pool.parse(self.html, SOURCE_URL)
+            return draft
+
+        self.assertEqual(asyncio.run(scenario()).title, "Naleśniki")
+        stats = self.pool.stats()
+        self.assertEqual((stats["timeouts"], stats["parsed"], stats["crashes"]), (1, 1, 0))
+
+    def test_wall_clock_limit_covers_waiting_in_the_queue(self) -> None:
+        from app.services.recipe_import.errors import ParseTimeoutError
+
+        async def scenario():
+            with mock.patch.object(self.parse_pool, "PARSE_WALL_SECONDS", 0.01):
+                with self.assertRaises(ParseTimeoutError):
+                    await self.pool.parse(self.html, SOURCE_URL)
+
+        asyncio.run(scenario())
+        self.assertEqual(self.pool.stats()["timeouts"], 1)
+
+    def test_full_queue_rejects_at_once(self) -> None:
+        from app.services.recipe_import.errors import ParseQueueFullError, error_code_for
+
+        async def scenario():
+            return await asyncio.gather(
+                *(self.pool.parse(self.html, SOURCE_URL) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(scenario())
+        self.assertIsInstance(results[2], ParseQueueFullError)
+        self.assertEqual(error_code_for(results[2]), "parse_busy")
+        self.assertEqual([draft.title for draft, _ in results[:2]], ["Naleśniki"] * 2)
+        self.assertEqual(self.pool.stats()["rejected"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
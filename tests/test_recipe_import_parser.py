@@ -2,7 +2,7 @@ import unittest
 from pathlib import Path
 
 from app.services.recipe_import.parser import parse_page
-from app.services.recipe_import.schema_org import extract_schema_org_recipe
+from app.services.recipe_import.schema_org import RecipeBlockWatcher, extract_schema_org_recipe, scan_page
 
 FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "recipe_import"
 
@@ -35,6 +35,59 @@ class SchemaOrgExtractionTests(unittest.TestCase):
         self.assertEqual(recipe["name"], "Graph Recipe")
 
 
+class RecipeBlockWatcherTests(unittest.TestCase):
+    def _prefix_at_recipe(self, html: str, chunk_size: int) -> str | None:
+        watcher = RecipeBlockWatcher()
+        for start in range(0, len(html), chunk_size):
+            if watcher.feed(html[start : start + chunk_size]):
+                return html[: start + chunk_size]
+        return None
+
+    def test_prefix_up_to_the_recipe_block_parses_like_the_whole_page(self) -> None:
+        for name in ("schema_org_recipe.html", "multiple_ld_json.html", "graph_recipe.html", "winiary_paella.html"):
+            html = load_fixture(name)
+            for chunk_size in (1, 7, 64):
+                with self.subTest(name=name, chunk_size=chunk_size):
+                    prefix = self._prefix_at_recipe(html, chunk_size)
+                    self.assertIsNotNone(prefix)
+                    self.assertLess(len(prefix), len(html))
+                    self.assertEqual(parse_page(prefix, "https://example.com/r"), parse_page(html, "https://example.com/r"))
+
+    def test_large_block_is_not_rescanned_on_every_chunk(self) -> None:
+        items = ", ".join(f'"{n} g mąki"' for n in range(20000))
+        html = (
+            '<html><head><script type="application/ld+json">'
+            f'{{"@type": "Recipe", "name": "Duży", "recipeIngredient": [{items}]}}'
+            '</script   data-x="1"></head><body>reszta</body></html>'
+        )
+        for chunk_size in (3, 16 * 1024):
+            with self.subTest(chunk_size=chunk_size):
+                watcher = RecipeBlockWatcher()
+                tails = []
+                for start in range(0, len(html), chunk_size):
+                    if watcher.feed(html[start : start + chunk_size]):
+                        break
+                    tails.append(len(watcher._pending))
+                self.assertTrue(watcher.found)
+                # Przeczytana treść bloku nie wraca do bufora skanowanego co
+                # kawałek - zostaje najwyżej jeden niedokończony znacznik.
+                self.assertLessEqual(max(tails), chunk_size + 64)
+
+    def test_pages_without_a_recipe_block_are_never_cut(self) -> None:
+        self.assertIsNone(self._prefix_at_recipe(load_fixture("no_recipe.html"), 16))
+
+    def test_ignores_recipe_json_outside_ld_json_scripts(self) -> None:
+        recipe = '{"@type": "Recipe", "name": "X"}'
+        html = (
+            f"<html><head><!-- <script type=\"application/ld+json\">{recipe}</script> -->"
+            f'<script type="application/ld+json; v=2">{recipe}</script>'
+            f"<script>var s = '<script type=\"application/ld+json\">{recipe}';</script>"
+            "</head><body><p>treść</p></body></html>"
+        )
+        self.assertIsNone(scan_page(html).recipe)
+        self.assertIsNone(self._prefix_at_recipe(html, 5))
+
+
 class ParsePageTests(unittest.TestCase):
     def test_full_schema_org_recipe_is_normalized_completely(self) -> None:
         html = load_fixture("schema_org_recipe.html")
@@ -86,5 +139,37 @@ class ParsePageTests(unittest.TestCase):
         self.assertEqual(draft.instructions, "Mix and bake.")
 
 
+class PageScanTests(unittest.TestCase):
+    def test_scan_stops_at_the_first_recipe_block(self) -> None:
+        html = load_fixture("schema_org_recipe.html").replace(
+            "</body>", "<h1>Komentarze</h1>" + "<p>x</p>" * 1000 + "</body>"
+        )
+        scan = scan_page(html)
+        self.assertEqual(scan.recipe["name"], "Naleśniki")
+        self.assertIsNone(scan.h1)
+
+    def test_fallback_fields_come_from_the_same_pass(self) -> None:
+        html = (
+            "<html><head><title> Tytuł strony </title>"
+            '<script type="application/ld+json">{"@type": "Organization"}</script>'
+            '<meta name="description" content=" Opis ">'
+            '<meta property="og:image" content="https://example.com/a.jpg">'
+            '<meta property="og:image" content="https://example.com/b.jpg">'
+            "</head><body><p>bez nagłówka</p></body></html>"
+        )
+        scan = scan_page(html)
+        self.assertIsNone(scan.recipe)
+        self.assertIsNone(scan.h1)
+        self.assertEqual(scan.title, "Tytuł strony")
+        self.assertEqual(scan.meta_content("description"), "Opis")
+        self.assertEqual(scan.meta_content("og:image"), "https://example.com/a.jpg")
+        self.assertIsNone(scan.meta_content("og:description"))
+
+        draft = parse_page(html, "https://example.com/post")
+        self.assertTrue(draft.used_fallback_parser)
+        self.assertEqual(draft.title, "Tytuł strony")
+        self.assertEqual(draft.description, "Opis")
+
+
 if __name__ == "__main__":
     unittest.main()
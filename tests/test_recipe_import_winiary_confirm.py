@@ -71,7 +71,7 @@ class WiniaryConfirmWorkflowTests(unittest.TestCase):
 
         before = self.db.query(Recipe).count()
         with mock.patch("app.api.v1.recipe_import.fetch_html", side_effect=fake_fetch), mock.patch(
-            "app.api.v1.recipe_import.download_and_store_image", side_effect=fake_image
+            "app.services.recipe_import.image_jobs.download_and_store_image", side_effect=fake_image
         ):
             for suffix, download_image, structured in (
                 ("a", True, True),
@@ -108,21 +108,22 @@ class WiniaryConfirmWorkflowTests(unittest.TestCase):
         self.assertEqual(self.db.query(Recipe).count(), before)
         self.assertEqual(self.db.query(RecipeIngredient).count(), 0)
 
-    def test_integrity_error_returns_controlled_conflict_and_cleans_image(self) -> None:
+    def test_integrity_error_returns_controlled_conflict_without_downloading(self) -> None:
         from sqlalchemy.exc import IntegrityError
 
+        from app.db.models.image_download_job import ImageDownloadJob
+
         async def fake_fetch(url: str):
             return self._fake_page(url)
 
-        async def fake_image(_url: str):
-            return "/static/uploads/winiary-error.webp"
+        download = mock.AsyncMock(return_value="/static/uploads/winiary-error.webp")
 
         with mock.patch("app.api.v1.recipe_import.fetch_html", side_effect=fake_fetch), mock.patch(
-            "app.api.v1.recipe_import.download_and_store_image", side_effect=fake_image
+            "app.services.recipe_import.image_jobs.download_and_store_image", download
         ), mock.patch(
             "app.api.v1.recipe_import.recipe_service.create_recipe_from_import",
             side_effect=IntegrityError("insert", {}, Exception("duplicate")),
-        ), mock.patch("app.api.v1.recipe_import.delete_stored_image") as cleanup:
+        ):
             preview = self.client.post(
                 "/api/v1/recipe-import/preview",
                 json={"url": "https://www.winiary.pl/przepisy/paella-z-kurczakiem-i-ostra-kielbasa/?error=1"},
@@ -134,7 +135,8 @@ class WiniaryConfirmWorkflowTests(unittest.TestCase):
 
         self.assertEqual(response.status_code, 409)
         self.assertEqual(response.json()["detail"]["error_code"], "recipe_persistence_conflict")
-        cleanup.assert_called_once_with("/static/uploads/winiary-error.webp")
+        download.assert_not_called()
+        self.assertEqual(self.db.query(ImageDownloadJob).count(), 0)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,6 @@
+import json
 import os
+import re
 import sys
 import tempfile
 import unittest
@@ -75,6 +77,154 @@ class RecipePaginationTests(unittest.TestCase):
         self.assertEqual([item["name"] for item in response.json()], ["Recipe 3"])
         self.assertEqual(response.headers["X-Recipes-Has-Next"], "false")
 
+    def test_search_ranks_name_hits_before_text_hits(self) -> None:
+        from app.db.models.recipe import Recipe
+
+        self.db.add(Recipe(
+            name="Rice pudding", description="", ingredients="milk", instructions="",
+            user_id=self.user.id, created_at=datetime.utcnow() - timedelta(days=1),
+        ))
+        self.db.commit()
+        response = self.client.get("/api/v1/recipes/?search=RICE")
+        # Older name hit first, newer ingredient-only hit second.
+        self.assertEqual([item["name"] for item in response.json()], ["Rice pudding", "Recipe 3"])
+
+    def test_search_index_follows_updates_and_deletes(self) -> None:
+        from app.db.models.recipe import Recipe
+
+        recipe = self.db.query(Recipe).filter_by(name="Recipe 3").one()
+        recipe.ingredients = "barley"
+        self.db.commit()
+        self.assertEqual(self.client.get("/api/v1/recipes/?search=rice").json(), [])
+        self.assertEqual(
+            [item["name"] for item in self.client.get("/api/v1/recipes/?search=arle").json()],
+            ["Recipe 3"],
+        )
+        self.db.delete(recipe)
+        self.db.commit()
+        self.assertEqual(self.client.get("/api/v1/recipes/?search=arle").json(), [])
+
+    def test_short_search_terms_still_match_substrings(self) -> None:
+        response = self.client.get("/api/v1/recipes/?search=ic")
+        self.assertEqual([item["name"] for item in response.json()], ["Recipe 3"])
+
+    def test_cursor_pages_walk_the_same_order_as_offset_pages(self) -> None:
+        names, cursor, pages = [], "", 0
+        while True:
+            response = self.client.get("/api/v1/recipes/", params={"cursor": cursor, "page_size": 2})
+            self.assertEqual(response.status_code, 200)
+            names += [item["name"] for item in response.json()]
+            pages += 1
+            if response.headers["X-Recipes-Has-Next"] != "true":
+                self.assertNotIn("X-Recipes-Next-Cursor", response.headers)
+                break
+            cursor = response.headers["X-Recipes-Next-Cursor"]
+        self.assertEqual(pages, 3)
+        self.assertEqual(names, [f"Recipe {index}" for index in range(5)])
+
+    def test_offset_page_advertises_cursor_for_switching_modes(self) -> None:
+        first = self.client.get("/api/v1/recipes/?page=1&page_size=2")
+        following = self.client.get(
+            "/api/v1/recipes/", params={"cursor": first.headers["X-Recipes-Next-Cursor"], "page_size": 2}
+        )
+        self.assertEqual([item["name"] for item in following.json()], ["Recipe 2", "Recipe 3"])
+
+    def test_cursor_mode_keeps_other_users_private_recipes_hidden(self) -> None:
+        from app.db.models.recipe import Recipe
+        from app.db.models.user import User
+
+        other = User(username="other", hashed_password="x", role="user")
+        self.db.add(other)
+        self.db.flush()
+        self.db.add_all([
+            Recipe(name="Hidden", instructions="", user_id=other.id, is_public=False),
+            Recipe(name="Shared", instructions="", user_id=other.id, is_public=True),
+        ])
+        self.db.commit()
+        names = [item["name"] for item in self.client.get("/api/v1/recipes/?cursor=&page_size=100").json()]
+        self.assertIn("Shared", names)
+        self.assertNotIn("Hidden", names)
+
+    def test_cursor_pages_merge_own_and_public_recipes_once(self) -> None:
+        from app.db.models.recipe import Recipe
+        from app.db.models.user import User
+
+        other = User(username="other", hashed_password="x", role="user")
+        self.db.add(other)
+        self.db.flush()
+        own = self.db.query(Recipe).filter(Recipe.name == "Recipe 1").one()
+        own.is_public = True
+        # Cudze publiczne przeplatają się czasem z własnymi.
+        for index in (0, 2, 4):
+            self.db.add(Recipe(
+                name=f"Shared {index}", instructions="", user_id=other.id, is_public=True,
+                created_at=datetime.utcnow() - timedelta(minutes=index, seconds=30),
+            ))
+        self.db.commit()
+
+        names, cursor = [], ""
+        while cursor is not None:
+            response = self.client.get("/api/v1/recipes/", params={"cursor": cursor, "page_size": 3})
+            names += [item["name"] for item in response.json()]
+            cursor = response.headers.get("X-Recipes-Next-Cursor")
+        self.assertEqual(names, [
+            "Recipe 0", "Shared 0", "Recipe 1", "Recipe 2", "Shared 2", "Recipe 3", "Recipe 4", "Shared 4",
+        ])
+
+        searched = self.client.get("/api/v1/recipes/", params={"cursor": "", "search": "special"})
+        self.assertEqual([item["name"] for item in searched.json()], ["Recipe 4"])
+
+    def test_malformed_cursor_is_rejected(self) -> None:
+        for cursor in ("not-base64!", "e30", "eyJjIjoxLCJpIjoxfQ"):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(f"/api/v1/recipes/?cursor={cursor}").status_code, 400)
+
+    def _ui_bootstrap(self) -> dict:
+        from app.core.security import get_current_user_optional
+
+        self.main.app.dependency_overrides[get_current_user_optional] = lambda: self.user
+        page = self.client.get("/recipes-ui")
+        self.assertEqual(page.status_code, 200)
+        match = re.search(r"window\.RECIPES_BOOTSTRAP = (.*?);</script>", page.text)
+        self.assertIsNotNone(match)
+        return json.loads(match.group(1))
+
+    def test_ui_page_embeds_only_the_first_visible_page(self) -> None:
+        from app.db.models.ingredient import Ingredient
+        from app.db.models.recipe import Recipe
+        from app.db.models.user import User
+
+        other = User(username="other", hashed_password="x", role="user")
+        self.db.add(other)
+        self.db.flush()
+        self.db.add(Recipe(name="Hidden", instructions="", user_id=other.id, is_public=False))
+        self.db.add_all([Ingredient(name="Rice", is_essential=False), Ingredient(name="Salt", is_essential=False)])
+        for index in range(5, 30):
+            self.db.add(Recipe(
+                name=f"Recipe {index}", instructions="", user_id=self.user.id,
+                created_at=datetime.utcnow() - timedelta(hours=index),
+            ))
+        self.db.commit()
+
+        bootstrap = self._ui_bootstrap()
+        names = [item["name"] for item in bootstrap["recipes"]]
+        self.assertEqual(names, [f"Recipe {index}" for index in range(24)])
+        self.assertTrue(bootstrap["has_next"])
+        self.assertEqual(bootstrap["ingredients_map"], {"rice": False})
+
+        following = self.client.get(
+            "/api/v1/recipes/", params={"cursor": bootstrap["next_cursor"], "page_size": 24}
+        )
+        self.assertEqual([item["name"] for item in following.json()], [f"Recipe {index}" for index in range(24, 30)])
+
+    def test_ui_bootstrap_cannot_break_out_of_the_script_tag(self) -> None:
+        from app.db.models.recipe import Recipe
+
+        self.db.add(Recipe(name="</script><img src=x onerror=alert(1)>", instructions="", user_id=self.user.id))
+        self.db.commit()
+        names = [item["name"] for item in self._ui_bootstrap()["recipes"]]
+        self.assertIn("</script><img src=x onerror=alert(1)>", names)
+
     def test_invalid_page_is_rejected(self) -> None:
         self.assertEqual(self.client.get("/api/v1/recipes/?page=0").status_code, 422)
 
@@ -0,0 +1,108 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+
+def purge_app_modules() -> None:
+    for name in list(sys.modules):
+        if name == "app" or name.startswith("app."):
+            sys.modules.pop(name)
+
+
+class RequestLogWriterTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.env = mock.patch.dict(os.environ, {
+            "ENV": "dev", "APP_INSTANCE": "dev", "SECRET_KEY": "dev-secret",
+            "DATABASE_URL": f"sqlite:///{Path(self.tmp.name) / 'log.db'}",
+            "MEAL_PLANNER_LOAD_ENV_FILE": "0",
+        }, clear=True)
+        self.env.start()
+        import app.main as main_module
+
+        self.main = main_module
+
+    def tearDown(self) -> None:
+        self.main.request_log_writer.stop()
+        from app.core.database import engine
+        engine.dispose()
+        self.env.stop()
+        self.tmp.cleanup()
+        purge_app_modules()
+
+    def rows(self):
+        from app.core.database import SessionLocal
+        from app.db.models.login_log import RequestLog
+
+        db = SessionLocal()
+        try:
+            return db.query(RequestLog).order_by(RequestLog.id).all()
+        finally:
+            db.close()
+
+    def test_rows_are_written_in_batches_and_flushed_on_stop(self) -> None:
+        from app.core.request_log_writer import RequestLogWriter
+
+        writer = RequestLogWriter(batch_size=50, flush_interval=5)
+        writer.start()
+        created = datetime.utcnow() - timedelta(minutes=1)
+        for index in range(120):
+            writer.submit(path=f"/p/{index}", status_code=200, created_at=created)
+        writer.stop()
+
+        rows = self.rows()
+        self.assertEqual([row.path for row in rows], [f"/p/{index}" for index in range(120)])
+        self.assertEqual({row.created_at for row in rows}, {created})
+        stats = writer.stats()
+        self.assertEqual((stats["written"], stats["dropped"], stats["queued"]), (120, 0, 0))
+        self.assertLessEqual(stats["batches"], 4)
+        self.assertFalse(stats["running"])
+
+    def test_full_queue_drops_rows_instead_of_blocking(self) -> None:
+        from app.core.request_log_writer import RequestLogWriter
+
+        writer = RequestLogWriter(queue_size=2, batch_size=1, flush_interval=0.01)
+        release = threading.Event()
+        original_write = writer._write
+        writer._write = lambda rows: release.wait(5) and original_write(rows)
+        writer.start()
+        self.addCleanup(writer.stop)
+
+        writer.submit(path="/first")
+        # Wait until the thread holds "/first", then fill the queue.
+        for _ in range(500):
+            if writer.stats()["queued"] == 0:
+                break
+            threading.Event().wait(0.01)
+        results = [writer.submit(path=f"/next/{index}") for index in range(4)]
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(writer.stats()["dropped"], 2)
+        release.set()
+        writer.stop()
+        self.assertEqual(len(self.rows()), 3)
+
+    def test_middleware_only_enqueues_and_lifespan_flushes(self) -> None:
+        from fastapi.testclient import TestClient
+
+        writer = self.main.request_log_writer
+        with (
+            mock.patch.object(writer, "_write", wraps=writer._write) as write,
+            mock.patch.object(writer, "_flush_interval", 60),
+            TestClient(self.main.app) as client,
+        ):
+            self.assertTrue(writer.running)
+            client.get("/login")
+            self.assertEqual(writer.stats()["enqueued"], 1)
+            self.assertEqual(write.call_count, 0)
+        self.assertFalse(writer.running)
+        self.assertEqual([row.path for row in self.rows()], ["/login"])
+        self.assertEqual(writer.stats()["batches"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
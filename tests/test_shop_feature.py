@@ -138,6 +138,125 @@ class ShopFeatureTests(unittest.TestCase):
                          ["bułki", "pomidor", "ogórek", "mleko", "dezodorant", "nieznany"])
         self.assertEqual(response.json()["unassigned_count"], 1)
 
+    def _count_queries(self, *tables: str):
+        from sqlalchemy import event
+        from app.core.async_database import async_engine
+        from app.core.database import engine
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if any(f"FROM {table}" in statement for table in tables):
+                statements.append(statement)
+
+        # sort-items czyta przez silnik asynchroniczny, reszta API przez synchroniczny.
+        for target in (engine, async_engine.sync_engine if async_engine else None):
+            if target is not None:
+                event.listen(target, "before_cursor_execute", record)
+                self.addCleanup(event.remove, target, "before_cursor_execute", record)
+        return statements
+
+    def test_sort_items_reuses_the_name_index_until_the_catalogue_changes(self) -> None:
+        from app.db.models.ingredient_alias import IngredientAlias
+        from app.services.ingredient_index import ingredient_name_index
+
+        store = self.client.post("/api/v1/stores", json={"name": "Lidl"}).json()
+        section = self.client.post(f"/api/v1/stores/{store['id']}/sections", json={"name": "Warzywa"}).json()
+        tomato = self.client.post("/api/v1/ingredients", json={"name": "pomidor"}).json()
+        self.client.post(f"/api/v1/stores/{store['id']}/placements", json={
+            "ingredient_id": tomato["id"], "store_section_id": section["id"],
+        })
+        payload = {"items": [{"id": "1", "name": "2 pomidory"}, {"id": "2", "name": "pomidor"}]}
+        url = f"/api/v1/stores/{store['id']}/sort-items"
+
+        self.assertEqual(self.client.post(url, json=payload).json()["unassigned_count"], 1)
+        queries = self._count_queries("ingredients", "ingredient_aliases")
+        before = ingredient_name_index.stats()
+        self.assertEqual(self.client.post(url, json=payload).json()["unassigned_count"], 1)
+        self.assertEqual(queries, [])
+        self.assertEqual(ingredient_name_index.stats()["hits"], before["hits"] + 1)
+        self.assertEqual(ingredient_name_index.stats()["rebuilds"], before["rebuilds"])
+
+        # An alias written outside the API still invalidates after commit.
+        self.db.add(IngredientAlias(ingredient_id=tomato["id"], alias_text="pomidory"))
+        self.db.commit()
+        self.assertEqual(ingredient_name_index.stats()["version"], before["version"] + 1)
+        self.assertEqual(self.client.post(url, json=payload).json()["unassigned_count"], 0)
+        self.assertEqual(ingredient_name_index.stats()["rebuilds"], before["rebuilds"] + 1)
+
+    def _route_store(self):
+        store = self.client.post("/api/v1/stores", json={"name": "Biedronka"}).json()
+        url = f"/api/v1/stores/{store['id']}"
+        bakery = self.client.post(f"{url}/sections", json={"name": "Pieczywo", "position": 0}).json()
+        dairy = self.client.post(f"{url}/sections", json={"name": "Nabiał", "position": 1}).json()
+        ids = {name: self.client.post("/api/v1/ingredients", json={"name": name}).json()["id"]
+               for name in ("chleb", "mleko")}
+        placements = {
+            name: self.client.post(f"{url}/placements", json={
+                "ingredient_id": ids[name], "store_section_id": section["id"],
+            }).json()
+            for name, section in (("chleb", bakery), ("mleko", dairy))
+        }
+        return url, bakery, dairy, placements
+
+    def test_sort_items_reuses_the_route_plan_until_the_layout_changes(self) -> None:
+        from app.services.store_route_plan import route_plan_cache
+
+        url, bakery, dairy, placements = self._route_store()
+        payload = {"items": [{"id": "1", "name": "mleko"}, {"id": "2", "name": "chleb"}]}
+        sort = lambda: [item["name"] for item in self.client.post(f"{url}/sort-items", json=payload).json()["items"]]
+
+        self.assertEqual(sort(), ["chleb", "mleko"])
+        queries = self._count_queries("store_sections", "ingredient_store_placements")
+        hits = route_plan_cache.stats()["hits"]
+        self.assertEqual(sort(), ["chleb", "mleko"])
+        self.assertEqual(queries, [])
+        self.assertEqual(route_plan_cache.stats()["hits"], hits + 1)
+
+        self.client.patch(f"{url}/sections/{bakery['id']}", json={"name": "Pieczywo", "position": 5})
+        self.assertEqual(sort(), ["mleko", "chleb"])
+        self.client.delete(f"{url}/placements/{placements['mleko']['id']}")
+        self.assertEqual(sort(), ["chleb", "mleko"])
+
+    def test_layout_etag_follows_the_layout_version(self) -> None:
+        url, bakery, dairy, placements = self._route_store()
+        first = self.client.get(f"{url}/layout")
+        etag = first.headers["ETag"]
+        self.assertEqual(first.headers["Cache-Control"], "private, no-cache")
+
+        unchanged = self.client.get(f"{url}/layout", headers={"If-None-Match": f'"other", W/{etag}'})
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(unchanged.content, b"")
+        self.assertEqual(unchanged.headers["ETag"], etag)
+
+        self.client.patch(f"{url}/placements/{placements['chleb']['id']}", json={"position": 4})
+        changed = self.client.get(f"{url}/layout", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+        self.assertEqual(changed.json()["placements"][0]["position"], 4)
+
+        self.client.patch(url, json={"name": "Biedronka 2"})
+        renamed = self.client.get(f"{url}/layout", headers={"If-None-Match": changed.headers["ETag"]})
+        self.assertEqual(renamed.json()["name"], "Biedronka 2")
+
+    def test_rejected_layout_write_keeps_the_etag(self) -> None:
+        url, bakery, dairy, placements = self._route_store()
+        etag = self.client.get(f"{url}/layout").headers["ETag"]
+        self.current_user = self.user
+        self.assertEqual(self.client.delete(f"{url}/sections/{bakery['id']}").status_code, 403)
+        self.assertEqual(self.client.get(f"{url}/layout", headers={"If-None-Match": etag}).status_code, 304)
+
+    def test_rolled_back_catalogue_write_keeps_the_name_index(self) -> None:
+        from app.db.models.ingredient import Ingredient
+        from app.services.ingredient_index import ingredient_name_index
+
+        version = ingredient_name_index.stats()["version"]
+        self.db.add(Ingredient(name="sól"))
+        self.db.flush()
+        self.db.rollback()
+        self.db.commit()
+        self.assertEqual(ingredient_name_index.stats()["version"], version)
+
     def test_one_ingredient_can_have_different_store_placements(self) -> None:
         ingredient = self.client.post("/api/v1/ingredients", json={"name": "mleko"}).json()
         stores = [self.client.post("/api/v1/stores", json={"name": name}).json() for name in ("Lidl", "Biedronka")]
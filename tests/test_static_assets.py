@@ -0,0 +1,177 @@
+import gzip
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import brotli
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+SCRIPT = "function hello() {\n  return 'meal planner';\n}\n" * 200
+
+
+def purge_app_modules() -> None:
+    for name in list(sys.modules):
+        if name == "app" or name.startswith("app."):
+            sys.modules.pop(name)
+
+
+class CachedStaticFilesTests(unittest.TestCase):
+    """Nagłówki cache, kompresja i 304 na osobnym katalogu - bez całej aplikacji."""
+
+    def setUp(self) -> None:
+        from app.core.static_assets import AssetManifest, CachedStaticFiles
+
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmpdir.name)
+        (self.root / "app.js").write_text(SCRIPT)
+        (self.root / "tiny.css").write_text("body{}")
+        (self.root / "uploads" / "ab" / "cd").mkdir(parents=True)
+        self.digest = "abcd" + "0" * 60
+        (self.root / "uploads" / "ab" / "cd" / f"{self.digest}.jpg").write_bytes(b"\xff\xd8\xff" + b"x" * 2000)
+        (self.root / "uploads" / "0b5e6c1e-legacy.jpg").write_bytes(b"\xff\xd8\xff" + b"y" * 2000)
+
+        self.manifest = AssetManifest(self.root)
+        static = CachedStaticFiles(directory=self.root, manifest=self.manifest)
+        self.client = TestClient(Starlette(routes=[Mount("/static", app=static)]))
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+        purge_app_modules()
+
+    def get(self, url: str, encoding: str = "identity", **headers):
+        return self.client.get(url, headers={"accept-encoding": encoding, **headers})
+
+    def test_fingerprinted_url_is_immutable_and_plain_url_revalidates(self) -> None:
+        url = self.manifest.url("app.js")
+        fingerprint = url.rsplit("=", 1)[1]
+        self.assertEqual(len(fingerprint), 12)
+
+        pinned = self.get(url)
+        self.assertEqual(pinned.headers["cache-control"], "public, max-age=31536000, immutable")
+        self.assertEqual(pinned.headers["etag"], f'"{fingerprint}"')
+        self.assertEqual(pinned.text, SCRIPT)
+
+        for stale in ("/static/app.js", "/static/app.js?v=000000000000"):
+            self.assertEqual(self.get(stale).headers["cache-control"], "no-cache")
+
+        not_modified = self.get("/static/app.js", **{"if-none-match": f'W/"{fingerprint}"'})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+
+    def test_editing_a_file_changes_its_url(self) -> None:
+        before = self.manifest.url("app.js")
+        path = self.root / "app.js"
+        path.write_text(SCRIPT + "// v2\n")
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+
+        after = self.manifest.url("app.js")
+        self.assertNotEqual(before, after)
+        self.assertEqual(self.get(before).headers["cache-control"], "no-cache")
+        self.assertTrue(self.get(after).text.endswith("// v2\n"))
+
+    def test_compressed_body_follows_accept_encoding(self) -> None:
+        url = self.manifest.url("app.js")
+        fingerprint = url.rsplit("=", 1)[1]
+
+        br = self.client.get(url, headers={"accept-encoding": "gzip, br"})
+        self.assertEqual(br.headers["content-encoding"], "br")
+        self.assertEqual(br.headers["etag"], f'"{fingerprint}-br"')
+        self.assertEqual(br.headers["vary"], "Accept-Encoding")
+        self.assertEqual(br.headers["cache-control"], "public, max-age=31536000, immutable")
+        self.assertEqual(br.text, SCRIPT)  # httpx dekoduje po Content-Encoding
+        self.assertLess(int(br.headers["content-length"]), len(SCRIPT) // 10)
+
+        gz = self.client.get(url, headers={"accept-encoding": "gzip, br;q=0"})
+        self.assertEqual(gz.headers["content-encoding"], "gzip")
+        self.assertEqual(gz.text, SCRIPT)
+
+        plain = self.get(url)
+        self.assertNotIn("content-encoding", plain.headers)
+        self.assertEqual(plain.headers["vary"], "Accept-Encoding")
+
+        revalidated = self.client.get(url, headers={"accept-encoding": "br", "if-none-match": f'"{fingerprint}-br"'})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.headers["vary"], "Accept-Encoding")
+
+        # Te same bajty, co dekompresja daje wprost.
+        asset = self.manifest.get("app.js")
+        self.assertEqual(brotli.decompress(asset.encoded["br"]).decode(), SCRIPT)
+        self.assertEqual(gzip.decompress(asset.encoded["gzip"]).decode(), SCRIPT)
+
+    def test_small_files_are_not_compressed(self) -> None:
+        response = self.client.get("/static/tiny.css", headers={"accept-encoding": "br, gzip"})
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertNotIn("vary", response.headers)
+
+    def test_content_addressed_uploads_are_immutable_with_digest_etag(self) -> None:
+        url = f"/static/uploads/ab/cd/{self.digest}.jpg"
+        response = self.get(url, encoding="br, gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["etag"], f'"{self.digest}"')
+        self.assertEqual(response.headers["cache-control"], "public, max-age=31536000, immutable")
+        self.assertNotIn("content-encoding", response.headers)
+
+        # Odświeżone mtime (ponowny zapis tych samych bajtów) nie zmienia ETagu.
+        os.utime(self.root / "uploads" / "ab" / "cd" / f"{self.digest}.jpg")
+        self.assertEqual(self.get(url, **{"if-none-match": f'W/"{self.digest}"'}).status_code, 304)
+        self.assertEqual(self.get(url, **{"if-none-match": "*"}).status_code, 304)
+        self.assertEqual(self.get(url, **{"if-none-match": '"something-else"'}).status_code, 200)
+
+    def test_legacy_uploads_revalidate_with_file_etag(self) -> None:
+        url = "/static/uploads/0b5e6c1e-legacy.jpg"
+        response = self.get(url)
+        self.assertEqual(response.headers["cache-control"], "no-cache")
+        etag = response.headers["etag"]
+        self.assertEqual(self.get(url, **{"if-none-match": etag}).status_code, 304)
+
+
+class StaticUrlTemplateTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self._env_patch = mock.patch.dict(
+            os.environ,
+            {
+                "ENV": "dev",
+                "APP_INSTANCE": "dev",
+                "SECRET_KEY": "dev-secret",
+                "DATABASE_URL": f"sqlite:///{Path(self._tmpdir.name) / 'static.db'}",
+                "MEAL_PLANNER_LOAD_ENV_FILE": "0",
+            },
+            clear=True,
+        )
+        self._env_patch.start()
+
+        import app.main as main_module
+
+        self.main_module = main_module
+        self.client = TestClient(main_module.app)
+
+    def tearDown(self) -> None:
+        from app.core.database import engine
+
+        engine.dispose()
+        self._env_patch.stop()
+        self._tmpdir.cleanup()
+        purge_app_modules()
+
+    def test_login_page_links_fingerprinted_assets(self) -> None:
+        from app.core.static_assets import asset_manifest
+
+        page = self.client.get("/login")
+        self.assertEqual(page.status_code, 200)
+        for name in ("main.css", "themes.css", "login.css", "favicon-32.png"):
+            url = asset_manifest.url(name)
+            self.assertIn(f'href="{url}"', page.text)
+            asset = self.client.get(url)
+            self.assertEqual(asset.status_code, 200)
+            self.assertIn("immutable", asset.headers["cache-control"])
+        self.assertNotIn('href="/static/main.css"', page.text)
+
+
+if __name__ == "__main__":
+    unittest.main()